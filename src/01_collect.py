@@ -1,9 +1,11 @@
 """
 Step 1: Collect posts from r/longevity
 
-This script fetches the last year of posts from r/longevity using the Reddit API
-and saves them to a CSV file.
+This script fetches the last year of posts from r/longevity (and any other
+subreddits in SUBREDDITS) using the Reddit API and saves them to a CSV file.
 """
+import argparse
+import glob
 import os
 import sys
 from datetime import datetime
@@ -12,17 +14,54 @@ import pandas as pd
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.utils.reddit import fetch_posts
+from src.utils.reddit import fetch_posts_bulk, refresh_scores
+from src.utils.state import PipelineState, COLLECTED_POSTS
 
 
-def main():
+def parse_args(argv=None):
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Collect posts from r/longevity")
+    parser.add_argument("--full", action="store_true",
+                        help="Ignore posts collected by earlier runs and fetch the whole window")
+    parser.add_argument("--subreddits", default=os.getenv("SUBREDDITS", "longevity"),
+                        help="Comma-separated subreddits to collect (default: SUBREDDITS or longevity)")
+    parser.add_argument("--refresh-scores", action="store_true",
+                        help="Also update score and comment counts of posts already collected")
+    return parser.parse_args(argv)
+
+
+def update_scores(data_dir: str) -> int:
+    """Refresh score/num_comments in every collected posts CSV. Returns posts updated."""
+    files = sorted(glob.glob(os.path.join(data_dir, "posts_*.csv")))
+    frames = {f: pd.read_csv(f, dtype={"id": str}) for f in files}
+    ids = [i for df in frames.values() if "id" in df.columns for i in df["id"]]
+    if not ids:
+        return 0
+    
+    print(f"Refreshing scores for {len(ids)} collected posts...")
+    updates = refresh_scores(ids)
+    for path, df in frames.items():
+        if "id" not in df.columns:
+            continue
+        found = df["id"].isin(updates.keys())
+        if not found.any():
+            continue
+        for col in ("score", "num_comments"):
+            df.loc[found, col] = df.loc[found, "id"].map(lambda i: updates[i][col])
+        df.to_csv(path, index=False)
+    return len(updates)
+
+
+def main(argv=None):
     """Main collection function."""
+    args = parse_args(argv)
+    subreddits = [s.strip() for s in args.subreddits.split(",") if s.strip()]
+    
     print("=" * 60)
-    print("Reddit Data Collection - r/longevity")
+    print("Reddit Data Collection - " + ", ".join(f"r/{s}" for s in subreddits))
     print("=" * 60)
     
     # Configuration
-    SUBREDDIT = "longevity"
     DAYS_BACK = 365
     MAX_POSTS = 10000
     
@@ -35,19 +74,51 @@ def main():
     
     # Fetch posts
     try:
-        posts = fetch_posts(
-            subreddit_name=SUBREDDIT,
+        state = PipelineState()
+        
+        if args.refresh_scores:
+            print(f"✓ Refreshed scores for {update_scores(DATA_DIR)} posts")
+        
+        since_utc = {}
+        if not args.full:
+            for sub in subreddits:
+                mark = state.get_high_water(f"created_utc:{sub.lower()}")
+                if mark is not None:
+                    since_utc[sub] = mark
+                    print(f"Incremental run: r/{sub} posts newer than "
+                          f"{datetime.fromtimestamp(mark).isoformat()}")
+        
+        posts_by_sub = fetch_posts_bulk(
+            subreddits,
             days_back=DAYS_BACK,
-            max_posts=MAX_POSTS
+            max_posts=MAX_POSTS,
+            since_utc=since_utc,
+            is_seen=None if args.full else (
+                lambda post_id: state.is_processed(COLLECTED_POSTS, post_id)
+            ),
         )
+        posts = [p for sub in subreddits for p in posts_by_sub[sub]]
         
         if not posts:
+            if since_utc:
+                print("✓ No new posts since the last run.")
+                return 0
             print("⚠ No posts fetched. Check your Reddit API credentials.")
             return 1
         
-        # Save to CSV
-        df = pd.DataFrame(posts)
-        df.to_csv(output_file, index=False)
+        # Save to CSV (a second incremental run on the same day appends)
+        df = pd.DataFrame(posts).drop_duplicates("id")
+        append = not args.full and os.path.exists(output_file)
+        df.to_csv(output_file, mode="a" if append else "w", header=not append, index=False)
+        
+        state.mark(COLLECTED_POSTS, df["id"])
+        for sub, sub_posts in posts_by_sub.items():
+            if sub_posts:
+                state.set_high_water(
+                    f"created_utc:{sub.lower()}",
+                    pd.to_datetime(pd.Series([p["created_utc"] for p in sub_posts]), utc=True)
+                    .max().timestamp()
+                )
         
         print(f"\n✓ Saved {len(df)} posts to: {output_file}")
         print(f"  Date range: {df['created_utc'].min()} to {df['created_utc'].max()}")
@@ -0,0 +1,119 @@
+"""
+Step 1b (optional): Collect comments for collected posts
+
+Most claims on Reddit live in comments rather than post bodies. This script
+walks the comment tree of every collected post that has not had its
+comments fetched yet and streams the flattened comments into a parquet
+dataset in chunks, so large threads never have to fit in memory at once.
+"""
+import argparse
+import glob
+import os
+import sys
+from datetime import datetime
+import pandas as pd
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.checkpoint import ChunkedParquetWriter
+from src.utils.reddit import get_reddit_client, iter_comments, REPLACE_MORE_LIMIT, MIN_COMMENT_LENGTH
+from src.utils.state import PipelineState, COLLECTED_COMMENTS
+
+# Comment rows buffered per parquet part, and posts between state checkpoints
+CHECKPOINT_ROWS = 500
+CHECKPOINT_POSTS = 20
+
+
+def parse_args(argv=None):
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Collect comments for collected Reddit posts")
+    parser.add_argument("--max-posts", type=int, default=None,
+                        help="Only fetch comments for this many posts")
+    parser.add_argument("--replace-more", type=int, default=REPLACE_MORE_LIMIT,
+                        help="'Load more comments' stubs expanded per thread")
+    parser.add_argument("--min-length", type=int, default=MIN_COMMENT_LENGTH,
+                        help="Skip comments shorter than this")
+    parser.add_argument("--full", action="store_true",
+                        help="Refetch comments for posts handled by earlier runs")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Main comment collection function."""
+    print("=" * 60)
+    print("Reddit Comment Collection")
+    print("=" * 60)
+
+    args = parse_args(argv)
+
+    DATA_DIR = os.getenv("DATA_DIR", "data/raw")
+    timestamp = datetime.now().strftime("%Y-%m-%d")
+    output_path = os.path.join(DATA_DIR, f"comments_{timestamp}.parquet")
+
+    try:
+        files = sorted(glob.glob(os.path.join(DATA_DIR, "posts_*.csv")))
+        if not files:
+            print(f"✗ No posts files found in {DATA_DIR}. Run 01_collect.py first.")
+            return 1
+        post_ids = list(dict.fromkeys(
+            pid for f in files for pid in pd.read_csv(f, usecols=["id"], dtype={"id": str})["id"]
+        ))
+
+        state = PipelineState()
+        if not args.full:
+            post_ids = state.filter_new(COLLECTED_COMMENTS, post_ids)
+        if args.max_posts is not None:
+            post_ids = post_ids[:args.max_posts]
+        if not post_ids:
+            print("✓ No posts waiting for comments.")
+            return 0
+
+        print(f"Fetching comment trees for {len(post_ids)} posts "
+              f"(up to {args.replace_more} 'load more' expansions each)...\n")
+
+        reddit = get_reddit_client()
+        writer = ChunkedParquetWriter(output_path, chunk_size=CHECKPOINT_ROWS)
+        pending_posts = []
+        failed = 0
+
+        def checkpoint():
+            # Posts count as done only once their comments are on disk
+            writer.flush()
+            state.mark(COLLECTED_COMMENTS, pending_posts)
+            pending_posts.clear()
+
+        try:
+            for idx, post_id in enumerate(post_ids):
+                count = 0
+                try:
+                    for row in iter_comments([post_id], reddit=reddit,
+                                             replace_more_limit=args.replace_more,
+                                             min_length=args.min_length):
+                        writer.write(row)
+                        count += 1
+                except Exception as e:
+                    # Left unmarked so the next run fetches this thread again
+                    failed += 1
+                    print(f"  [{idx+1}/{len(post_ids)}] {post_id}: error loading comments: {e}")
+                    continue
+                pending_posts.append(post_id)
+                print(f"  [{idx+1}/{len(post_ids)}] {post_id}: {count} comments")
+
+                if len(pending_posts) >= CHECKPOINT_POSTS:
+                    checkpoint()
+        finally:
+            checkpoint()
+
+        print(f"\n✓ Saved {writer.rows_written} comments to: {output_path}")
+        if failed:
+            print(f"⚠ Comments failed to load for {failed} posts; they will be retried next run")
+        return 0
+
+    except Exception as e:
+        print(f"\n✗ Error: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,84 +2,225 @@
 Reddit data collection using RSS feeds (NO API credentials needed!)
 
 This approach is inspired by Manus and uses Reddit's public RSS feeds,
-which require NO authentication and have NO rate limits.
+which require NO authentication.
+
+Subreddits are fetched concurrently with asyncio. Requests to the same host
+share a politeness limit, feeds that have not changed since the last run
+are skipped via ETag/If-Modified-Since, and each feed is paged with
+``?after=`` until enough posts have been collected.
 """
+import asyncio
+import os
+import sys
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlencode, urlparse
+
 import feedparser
 import pandas as pd
-from datetime import datetime
-import time
-import os
+import requests
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.utils.ratelimit import TokenBucket
+from src.utils.state import PipelineState, COLLECTED_POSTS
 
-def fetch_posts_via_rss(subreddit: str = "longevity", keywords: list = None, max_posts: int = 100):
+# Reddit rejects requests without a descriptive user agent
+USER_AGENT = os.getenv("REDDIT_USER_AGENT", "longevity-evidence-agent/1.0 (RSS collector)")
+
+# Politeness limits applied per host (all subreddits share www.reddit.com)
+HOST_RATE = float(os.getenv("RSS_HOST_RATE", "2"))
+HOST_CONCURRENCY = int(os.getenv("RSS_HOST_CONCURRENCY", "4"))
+
+# Reddit serves at most 100 entries per feed page
+PAGE_SIZE = 100
+MAX_PAGES = 10
+
+
+class HostLimiter:
+    """Per-host concurrency and request-rate limits for async fetches."""
+
+    def __init__(self, rate: float = HOST_RATE, concurrency: int = HOST_CONCURRENCY):
+        self.rate = rate
+        self.concurrency = concurrency
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def _for(self, host: str):
+        if host not in self._buckets:
+            self._buckets[host] = TokenBucket(self.rate, capacity=self.concurrency)
+            self._semaphores[host] = asyncio.Semaphore(self.concurrency)
+        return self._buckets[host], self._semaphores[host]
+
+    async def get(self, session: requests.Session, url: str, headers: Dict) -> requests.Response:
+        """GET ``url`` in a worker thread once the host's limits allow it."""
+        bucket, semaphore = self._for(urlparse(url).netloc)
+        async with semaphore:
+            await bucket.acquire_async()
+            return await asyncio.to_thread(session.get, url, headers=headers, timeout=30)
+
+
+def _entry_to_post(entry) -> Dict:
+    """Convert a feed entry into the post dictionary format used by the pipeline."""
+    return {
+        "id": entry.id.split('/')[-1] if hasattr(entry, 'id') else entry.link,
+        "title": entry.title,
+        "selftext": entry.get('summary', ''),
+        "url": entry.link,
+        "score": 0,  # RSS doesn't include scores
+        "num_comments": 0,  # RSS doesn't include comment count
+        "created_utc": entry.get('published', datetime.now().isoformat()),
+        "author": entry.get('author', 'unknown')
+    }
+
+
+def _matches(entry, keywords: Optional[list]) -> bool:
+    if not keywords:
+        return True
+    text = (entry.title + ' ' + entry.get('summary', '')).lower()
+    return any(kw.lower() in text for kw in keywords)
+
+
+async def fetch_subreddit(
+    subreddit: str,
+    session: requests.Session,
+    limiter: HostLimiter,
+    keywords: list = None,
+    max_posts: int = 100,
+    state: Optional[PipelineState] = None,
+) -> Tuple[List[Dict], Optional[Dict]]:
     """
-    Fetch posts from Reddit using RSS feeds (NO API needed!)
-    
+    Fetch up to ``max_posts`` matching posts from one subreddit's feed.
+
+    The first page is requested conditionally with the validators saved by
+    the previous run, so an unchanged feed costs a single 304 response.
+    The new validators are returned rather than saved: the caller stores
+    them with ``save_validators`` only once the posts are written, so a
+    failed run never turns the next one into a 304.
+    Further pages follow ``?after=<last entry>`` until enough posts match,
+    the feed runs out, or ``MAX_PAGES`` pages have been read.
+
     Args:
         subreddit: Name of subreddit
+        session: Shared HTTP session
+        limiter: Per-host politeness limiter
         keywords: Optional list of keywords to filter posts
-        max_posts: Maximum posts to return (RSS gives ~25 per request)
-    
+        max_posts: Maximum posts to return
+        state: Pipeline state for conditional-GET validators (optional)
+
     Returns:
-        List of post dictionaries
+        (posts, validators): post dictionaries, and the first page's
+        ETag/Last-Modified keyed by state meta key (None if the feed was
+        unchanged or the fetch failed)
     """
-    # Reddit RSS URL - no authentication needed!
-    url = f"https://www.reddit.com/r/{subreddit}.rss"
-    
-    print(f"Fetching from: {url}")
-    print("(No API credentials needed - using public RSS feed)")
-    
+    base_url = f"https://www.reddit.com/r/{subreddit}.rss"
+    validators_key = f"rss_validators:{base_url}"
+    posts = []
+    validators = None
+    after = None
+
     try:
-        feed = feedparser.parse(url)
-        
-        if not feed.entries:
-            print(f"⚠️ No posts found in feed")
-            return []
-        
-        posts = []
-        for entry in feed.entries:
-            # Extract data from RSS entry
-            post_id = entry.id.split('/')[-1] if hasattr(entry, 'id') else f"rss_{len(posts)}"
-            
-            # Filter by keywords if provided
-            if keywords:
-                text = (entry.title + ' ' + entry.get('summary', '')).lower()
-                if not any(kw.lower() in text for kw in keywords):
-                    continue
-            
-            posts.append({
-                "id": post_id,
-                "title": entry.title,
-                "selftext": entry.get('summary', ''),
-                "url": entry.link,
-                "score": 0,  # RSS doesn't include scores
-                "num_comments": 0,  # RSS doesn't include comment count
-                "created_utc": entry.get('published', datetime.now().isoformat()),
-                "author": entry.get('author', 'unknown')
-            })
-            
-            if len(posts) >= max_posts:
+        for page in range(MAX_PAGES):
+            params = {"limit": PAGE_SIZE}
+            if after:
+                params["after"] = after
+            headers = {"User-Agent": USER_AGENT}
+
+            if page == 0 and state is not None:
+                saved = state.get_meta(validators_key) or {}
+                if saved.get("etag"):
+                    headers["If-None-Match"] = saved["etag"]
+                if saved.get("last_modified"):
+                    headers["If-Modified-Since"] = saved["last_modified"]
+
+            response = await limiter.get(session, f"{base_url}?{urlencode(params)}", headers)
+            if response.status_code == 304:
+                print(f"  r/{subreddit}: unchanged since last run")
+                return [], None
+            response.raise_for_status()
+
+            if page == 0 and state is not None:
+                validators = {validators_key: {
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                }}
+
+            feed = feedparser.parse(response.content)
+            if not feed.entries:
+                break
+            for entry in feed.entries:
+                if _matches(entry, keywords):
+                    posts.append(_entry_to_post(entry))
+                    if len(posts) >= max_posts:
+                        return posts, validators
+
+            last = feed.entries[-1]
+            after = last.id.split('/')[-1] if hasattr(last, 'id') else None
+            if not after or len(feed.entries) < PAGE_SIZE:
                 break
-        
-        return posts
-        
     except Exception as e:
-        print(f"Error fetching RSS: {e}")
-        return []
+        print(f"Error fetching RSS for r/{subreddit}: {e}")
+        # Partial results: fetch the whole feed again next run
+        validators = None
+
+    return posts, validators
+
+
+async def collect_subreddits(
+    subreddits: list,
+    keywords: list = None,
+    max_posts: int = 100,
+    state: Optional[PipelineState] = None,
+) -> Tuple[List[Dict], Dict[str, Dict]]:
+    """
+    Fetch several subreddits concurrently; total time tracks the slowest feed.
 
+    Returns:
+        (posts, validators) -- pass the validators to ``save_validators``
+        once the posts have been written
+    """
+    limiter = HostLimiter()
+    with requests.Session() as session:
+        results = await asyncio.gather(*[
+            fetch_subreddit(sub, session, limiter, keywords, max_posts, state)
+            for sub in subreddits
+        ])
 
-def fetch_multiple_subreddits(subreddits: list, keywords: list = None):
-    """Fetch from multiple subreddits."""
     all_posts = []
-    
-    for sub in subreddits:
-        print(f"\nFetching r/{sub}...")
-        posts = fetch_posts_via_rss(sub, keywords)
+    validators = {}
+    for sub, (posts, feed_validators) in zip(subreddits, results):
+        print(f"  r/{sub}: {len(posts)} posts")
         all_posts.extend(posts)
-        print(f"  Found {len(posts)} posts")
-        time.sleep(2)  # Be polite
-    
-    return all_posts
+        validators.update(feed_validators or {})
+    return all_posts, validators
+
+
+def save_validators(state: PipelineState, validators: Dict[str, Dict]) -> None:
+    """Store conditional-GET validators returned by ``collect_subreddits``."""
+    for key, value in validators.items():
+        state.set_meta(key, value)
+
+
+def fetch_posts_via_rss(subreddit: str = "longevity", keywords: list = None, max_posts: int = 100):
+    """
+    Fetch posts from Reddit using RSS feeds (NO API needed!)
+
+    Args:
+        subreddit: Name of subreddit
+        keywords: Optional list of keywords to filter posts
+        max_posts: Maximum posts to return (feeds are paged 100 entries at a time)
+
+    Returns:
+        List of post dictionaries
+    """
+    print(f"Fetching from: https://www.reddit.com/r/{subreddit}.rss")
+    print("(No API credentials needed - using public RSS feed)")
+    return asyncio.run(collect_subreddits([subreddit], keywords, max_posts))[0]
+
+
+def fetch_multiple_subreddits(subreddits: list, keywords: list = None, max_posts: int = 100,
+                              state: Optional[PipelineState] = None):
+    """Fetch from multiple subreddits concurrently; returns (posts, validators)."""
+    return asyncio.run(collect_subreddits(subreddits, keywords, max_posts, state))
 
 
 # Example keywords for longevity topics
@@ -93,26 +234,36 @@ LONGEVITY_KEYWORDS = [
 if __name__ == "__main__":
     # Example: Fetch from multiple longevity-related subreddits
     subreddits = ['longevity', 'Biohacking', 'Peptides', 'Nootropics']
-    
+
     print("=" * 60)
     print("Reddit RSS Collection (Manus Method - No API Needed!)")
     print("=" * 60)
-    
-    all_posts = fetch_multiple_subreddits(subreddits, LONGEVITY_KEYWORDS)
-    
+
+    state = PipelineState()
+    all_posts, validators = fetch_multiple_subreddits(subreddits, LONGEVITY_KEYWORDS, state=state)
+
+    # Feeds overlap between runs; keep only posts not collected before
+    new_ids = set(state.filter_new(COLLECTED_POSTS, [p["id"] for p in all_posts]))
+    all_posts = [p for p in all_posts if p["id"] in new_ids]
+
     if all_posts:
-        # Save to CSV
-        df = pd.DataFrame(all_posts)
+        # Save to CSV (a second run on the same day appends)
+        df = pd.DataFrame(all_posts).drop_duplicates("id")
         output_dir = "data/raw"
         os.makedirs(output_dir, exist_ok=True)
-        
+
         timestamp = datetime.now().strftime("%Y-%m-%d")
         output_file = os.path.join(output_dir, f"posts_rss_{timestamp}.csv")
-        df.to_csv(output_file, index=False)
-        
+        append = os.path.exists(output_file)
+        df.to_csv(output_file, mode="a" if append else "w", header=not append, index=False)
+        state.mark(COLLECTED_POSTS, df["id"])
+
         print(f"\n✅ SUCCESS!")
-        print(f"✓ Collected {len(all_posts)} posts from {len(subreddits)} subreddits")
+        print(f"✓ Collected {len(df)} new posts from {len(subreddits)} subreddits")
         print(f"✓ Saved to: {output_file}")
         print(f"✓ NO API credentials needed!")
     else:
-        print("\n⚠️ No posts collected")
+        print("\n⚠️ No new posts collected")
+
+    # Only now that the posts are saved and marked can the next run skip unchanged feeds
+    save_validators(state, validators)
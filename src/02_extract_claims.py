@@ -1,78 +1,218 @@
 """
-Step 2: Extract claims from Reddit posts
+Step 2: Extract claims from Reddit posts (and, with --comments, their comments)
 """
+import argparse
 import os
+import shutil
 import sys
+from collections import defaultdict
 from datetime import datetime
 import pandas as pd
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from src.utils.llm import extract_claims_from_post
+from src.utils.llm import iter_extract_claims, default_concurrency, configure_llm_cache, get_llm_cache
+from src.utils.state import PipelineState, EXTRACTED_POSTS, EXTRACTED_COMMENTS, claim_hash
+from src.utils.checkpoint import ChunkedParquetWriter, read_dataset
+from src.utils.dedup import cluster_near_duplicates
 
-def find_latest_posts_file(data_dir: str = "data/raw") -> str:
-    """Find the most recent posts CSV file."""
+# Flush claims to a new part file after this many claims or posts
+CHECKPOINT_ROWS = 200
+CHECKPOINT_POSTS = 50
+
+def load_posts(data_dir: str = "data/raw") -> pd.DataFrame:
+    """Load every posts CSV as one frame, keeping the newest copy of each post."""
     import glob
-    files = glob.glob(os.path.join(data_dir, "posts_*.csv"))
+    files = sorted(glob.glob(os.path.join(data_dir, "posts_*.csv")))
     if not files:
         raise FileNotFoundError(f"No posts files found in {data_dir}")
-    return max(files)
+    df = pd.concat([pd.read_csv(f) for f in files], ignore_index=True)
+    df["id"] = df["id"].astype(str)
+    return df.drop_duplicates("id", keep="last").reset_index(drop=True)
+
+def load_comments(data_dir: str = "data/raw") -> pd.DataFrame:
+    """
+    Load collected comments shaped like posts, so they go through the same extraction.
+
+    Comments have no title; their body stands in for ``selftext`` and
+    ``post_id`` points at the thread they belong to.
+    """
+    import glob
+    paths = sorted(glob.glob(os.path.join(data_dir, "comments_*.parquet")))
+    frames = [read_dataset(p) for p in paths]
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return pd.DataFrame(columns=["id", "post_id", "title", "selftext", "created_utc",
+                                     "score", "num_comments", "kind"])
+    df = pd.concat(frames, ignore_index=True).drop_duplicates("id", keep="last")
+    return pd.DataFrame({
+        "id": df["id"].astype(str),
+        "post_id": df["post_id"].astype(str),
+        "title": "",
+        "selftext": df["body"],
+        "created_utc": df["created_utc"],
+        "score": df["score"],
+        "num_comments": 0,
+        "kind": "comment",
+    }).reset_index(drop=True)
 
-def main():
+def parse_args(argv=None):
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Extract claims from Reddit posts")
+    parser.add_argument("--llm-cache", choices=["on", "off", "refresh"], default="on",
+                        help="Reuse cached LLM results (off = bypass, refresh = recompute and overwrite)")
+    parser.add_argument("--clear-llm-cache", action="store_true",
+                        help="Delete all cached LLM results before running")
+    parser.add_argument("--full", action="store_true",
+                        help="Re-extract every post, not just posts unseen by earlier runs")
+    parser.add_argument("--resume", action="store_true",
+                        help="With --full, continue today's interrupted run instead of starting over")
+    parser.add_argument("--comments", action="store_true",
+                        help="Also extract claims from comments collected by 01_collect_comments.py")
+    parser.add_argument("--no-dedup", action="store_true",
+                        help="Extract every post even if it is a near-duplicate of another")
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """Main claim extraction function."""
     print("=" * 60)
     print("Claim Extraction from Reddit Posts")
     print("=" * 60)
     
-    OUTPUT_DIR = "data/interim"
+    args = parse_args(argv)
+    configure_llm_cache(args.llm_cache, clear=args.clear_llm_cache)
+    
+    RAW_DIR = os.getenv("DATA_DIR", "data/raw")
+    OUTPUT_DIR = os.getenv("INTERIM_DIR", "data/interim")
     os.makedirs(OUTPUT_DIR, exist_ok=True)
     timestamp = datetime.now().strftime("%Y-%m-%d")
     
     try:
-        input_file = find_latest_posts_file("data/raw")
-        print(f"\nLoading posts from: {input_file}")
-        df = pd.read_csv(input_file)
+        state = PipelineState()
+        print(f"\nLoading posts from: {RAW_DIR}")
+        df = load_posts(RAW_DIR)
+        df["post_id"] = df["id"]
+        df["kind"] = "post"
         print(f"✓ Loaded {len(df)} posts")
         
-        print("\nExtracting claims with Ollama (llama3:8b)...")
+        kinds = {"post": EXTRACTED_POSTS}
+        if args.comments:
+            comments = load_comments(RAW_DIR)
+            print(f"✓ Loaded {len(comments)} comments")
+            df = pd.concat([df, comments], ignore_index=True)
+            kinds["comment"] = EXTRACTED_COMMENTS
+        
+        if not args.full:
+            new_ids = set()
+            for kind, state_kind in kinds.items():
+                new_ids.update(state.filter_new(state_kind, df.loc[df["kind"] == kind, "id"]))
+            df = df[df["id"].isin(new_ids)].reset_index(drop=True)
+            print(f"✓ {len(df)} posts/comments not processed by earlier runs")
+            if df.empty:
+                print("✓ Nothing new to extract.")
+                return 0
+        
+        output_path = os.path.join(OUTPUT_DIR, f"claims_{timestamp}.parquet")
+        if args.full:
+            if args.resume:
+                # Claims from comments carry a comment_id; the rest came from post bodies
+                written = read_dataset(output_path, columns=["post_id", "comment_id"]) \
+                    if os.path.exists(output_path) else pd.DataFrame()
+                done = set()
+                if "comment_id" in written.columns:
+                    done.update(written["comment_id"].dropna().astype(str))
+                    written = written[written["comment_id"].isna()]
+                if "post_id" in written.columns:
+                    done.update(written["post_id"].dropna().astype(str))
+                df = df[~df["id"].isin(done)].reset_index(drop=True)
+                print(f"✓ Resuming: {len(done)} posts/comments already written, {len(df)} to go")
+            elif os.path.isdir(output_path):
+                shutil.rmtree(output_path)
+            elif os.path.exists(output_path):
+                os.remove(output_path)
+        
+        rows = df.to_dict("records")
+        
+        # Crossposts, reposts and RSS/API overlap: extract one post per group of
+        # near-duplicates and copy its claims to the other members
+        groups = defaultdict(list)
+        if args.no_dedup:
+            representatives = list(range(len(rows)))
+        else:
+            text = df[["title", "selftext"]].fillna("").astype(str)
+            representatives = cluster_near_duplicates((text["title"] + "\n\n" + text["selftext"]).tolist())
+        for idx, rep in enumerate(representatives):
+            groups[rep].append(rows[idx])
+        rep_indices = sorted(groups)
+        rep_rows = [rows[rep] for rep in rep_indices]
+        if len(rep_rows) < len(rows):
+            print(f"✓ {len(rows) - len(rep_rows)} near-duplicates found; "
+                  f"extracting {len(rep_rows)} representative posts")
+        
+        print(f"\nExtracting claims with Ollama (llama3:8b, {default_concurrency()} parallel requests)...")
         print("This will take a few minutes...\n")
         
-        all_claims = []
-        for idx, row in df.iterrows():
-            print(f"  [{idx+1}/{len(df)}] Processing: {row['title'][:60]}...")
-            
-            try:
-                claims = extract_claims_from_post(
-                    title=row.get("title", ""),
-                    selftext=row.get("selftext", "")
-                )
+        writer = ChunkedParquetWriter(output_path, chunk_size=CHECKPOINT_ROWS)
+        posts = ((row.get("title", ""), row.get("selftext", "")) for row in rep_rows)
+        pending_posts = []
+        failed = 0
+        
+        def checkpoint():
+            # Posts count as processed only once their claims are on disk
+            writer.flush()
+            for kind, state_kind in kinds.items():
+                state.mark(state_kind, [i for k, i in pending_posts if k == kind])
+            pending_posts.clear()
+        
+        try:
+            for idx, (rep_idx, claims) in enumerate(zip(rep_indices, iter_extract_claims(posts))):
+                rep = rows[rep_idx]
+                members = groups[rep_idx]
+                label = rep["title"] or rep["selftext"]
+                print(f"  [{idx+1}/{len(rep_rows)}] Processing {rep['kind']}: {str(label)[:60]}...")
+                
+                if claims is None:
+                    # Left unmarked so the next run retries the whole group
+                    failed += len(members)
+                    print("      ⚠ Extraction failed; will retry next run")
+                    continue
                 
-                for claim in claims:
-                    claim.update({
-                        "post_id": row["id"],
-                        "created_utc": row["created_utc"],
-                        "post_score": row["score"],
-                        "post_comments": row["num_comments"],
-                    })
+                for row in members:
+                    for claim in claims:
+                        linked = dict(claim)
+                        linked.update({
+                            "claim_id": claim_hash(row["id"], claim.get("claim", "")),
+                            "post_id": row["post_id"],
+                            "created_utc": row["created_utc"],
+                            "post_score": row["score"],
+                            "post_comments": row["num_comments"],
+                        })
+                        if row["kind"] == "comment":
+                            linked["comment_id"] = row["id"]
+                        if row is not rep:
+                            linked["duplicate_of"] = rep["id"]
+                        writer.write(linked)
+                    pending_posts.append((row["kind"], row["id"]))
                 
-                all_claims.extend(claims)
-                print(f"      Found {len(claims)} claims")
+                extra = f" (+{len(members) - 1} duplicates)" if len(members) > 1 else ""
+                print(f"      Found {len(claims)} claims{extra}")
                 
-            except Exception as e:
-                print(f"      Warning: Error - {e}")
-                continue
+                if len(pending_posts) >= CHECKPOINT_POSTS:
+                    checkpoint()
+        finally:
+            checkpoint()
         
-        print(f"\n✓ Extracted {len(all_claims)} total claims from {len(df)} posts")
+        print(f"\n✓ Extracted {writer.rows_written} total claims from {len(df) - failed} posts")
+        if failed:
+            print(f"⚠ Extraction failed for {failed} posts/comments (is Ollama running?); "
+                  f"they will be retried next run")
         
-        if not all_claims:
+        if not writer.rows_written:
             print("⚠ No claims extracted.")
-            return 1
+            return 1 if args.full or failed else 0
         
-        claims_df = pd.DataFrame(all_claims)
-        output_file = os.path.join(OUTPUT_DIR, f"claims_{timestamp}.parquet")
-        claims_df.to_parquet(output_file, index=False)
-        
-        print(f"✓ Saved to: {output_file}")
+        print(f"✓ Saved to: {output_path}")
         
+        claims_df = read_dataset(output_path, columns=["topic"])
         print("\nClaim Statistics:")
         print(f"  Total claims: {len(claims_df)}")
         if "topic" in claims_df.columns:
@@ -80,6 +220,12 @@ def main():
             print("\n  Top topics:")
             print(claims_df['topic'].value_counts().head(10).to_string())
         
+        llm_cache = get_llm_cache()
+        if llm_cache is not None:
+            stats = llm_cache.stats()
+            print(f"\n  LLM cache: {stats['hits']} hits, {stats['misses']} misses "
+                  f"({stats['hit_rate']:.0%} hit rate, {stats['bytes'] / 1e6:.1f} MB)")
+        
         return 0
         
     except Exception as e:
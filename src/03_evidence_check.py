@@ -1,103 +1,256 @@
 """
 Step 3: Check claims against PubMed evidence
 """
+import argparse
 import os
+import re
 import sys
+import time
+from collections import defaultdict
 from datetime import datetime
+from typing import List
 import pandas as pd
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from src.utils.pubmed import search_pubmed, format_references, build_search_query
-from src.utils.llm import evaluate_claim
+from src.utils.pubmed import get_pubmed_cache, get_rate_limiter, get_backend, get_local_index
+from src.utils.evidence import check_claims
+from src.utils.dedup import cluster_claims, CLAIM_THRESHOLD
+from src.utils.llm import configure_llm_cache, get_llm_cache
+from src.utils.state import PipelineState, EVALUATED_CLAIMS, claim_hash
+from src.utils.checkpoint import read_dataset
+from src.utils.store import EvidenceStore
 
-def find_latest_claims_file(data_dir: str = "data/interim") -> str:
-    """Find the most recent claims parquet file."""
+# Concurrent esearch requests; the shared NCBI rate limiter still applies
+PUBMED_WORKERS = 4
+
+# Append results to the evidence store after this many claims
+CHECKPOINT_ROWS = 100
+
+# Result fields copied from a canonical claim's check to every claim in its group
+VERDICT_COLUMNS = ["evidence_level", "explanation", "num_papers_found", "pmid_list"]
+
+# Results add_post.py appended to before the evidence store existed
+LEGACY_MAIN_FILE = "claims_evidence_main.csv"
+
+# Pipeline state meta key recording that pre-store evidence files were imported
+LEGACY_IMPORTED_KEY = "evidence_store:legacy_imported"
+
+def with_claim_ids(df: pd.DataFrame) -> pd.DataFrame:
+    """Add a claim_id column to frames written before claims carried one."""
+    if "claim_id" not in df.columns:
+        df = df.copy()
+        df["claim_id"] = [
+            claim_hash(post_id, claim) for post_id, claim in zip(df["post_id"], df["claim"])
+        ]
+    return df
+
+def load_claims(data_dir: str = "data/interim") -> pd.DataFrame:
+    """Load the cumulative claims dataset (every claims parquet file)."""
     import glob
-    files = glob.glob(os.path.join(data_dir, "claims_*.parquet"))
+    files = sorted(glob.glob(os.path.join(data_dir, "claims_*.parquet")))
     if not files:
         raise FileNotFoundError(f"No claims files found in {data_dir}")
-    return max(files)
+    df = pd.concat([with_claim_ids(read_dataset(f)) for f in files], ignore_index=True)
+    return df.drop_duplicates("claim_id", keep="last").reset_index(drop=True)
+
+def find_legacy_evidence_files(data_dir: str = "data/processed") -> List[str]:
+    """
+    Find evidence files written before the evidence store: the most recent
+    dated snapshot (parquet, else CSV) and add_post.py's claims_evidence_main.csv.
+    """
+    import glob
+    main_file = os.path.join(data_dir, LEGACY_MAIN_FILE)
+    files = []
+    for ext in ("parquet", "csv"):
+        dated = [f for f in glob.glob(os.path.join(data_dir, f"claims_evidence_*.{ext}")) if f != main_file]
+        if dated:
+            files.append(max(dated))
+            break
+    if os.path.exists(main_file):
+        files.append(main_file)
+    return files
+
+def import_legacy_evidence(store: EvidenceStore, state: PipelineState,
+                           data_dir: str = "data/processed") -> List[str]:
+    """
+    Copy pre-store evidence files into the store, once.
+
+    Whether the import happened is recorded in the pipeline state rather than
+    inferred from an empty store, so appends by add_post.py or the stream
+    before the first run cannot cause it to be skipped.
+
+    Returns:
+        The files imported (empty if already done)
+    """
+    if state.get_meta(LEGACY_IMPORTED_KEY) is not None:
+        return []
+    files = find_legacy_evidence_files(data_dir)
+    for path in files:
+        df = read_dataset(path) if path.endswith(".parquet") else pd.read_csv(path)
+        if df.empty:
+            continue
+        name = os.path.splitext(os.path.basename(path))[0][len("claims_evidence_"):]
+        # Snapshots are named by run date; the main file is dated by its last write
+        date = name if re.fullmatch(r"\d{4}-\d{2}-\d{2}", name) else \
+            datetime.fromtimestamp(os.path.getmtime(path)).strftime("%Y-%m-%d")
+        store.append(with_claim_ids(df), date=date)
+    state.set_meta(LEGACY_IMPORTED_KEY, [os.path.basename(f) for f in files])
+    return files
+
+def parse_args(argv=None):
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Check claims against PubMed evidence")
+    parser.add_argument("--llm-cache", choices=["on", "off", "refresh"], default="on",
+                        help="Reuse cached LLM results (off = bypass, refresh = recompute and overwrite)")
+    parser.add_argument("--clear-llm-cache", action="store_true",
+                        help="Delete all cached LLM results before running")
+    parser.add_argument("--full", action="store_true",
+                        help="Re-check every claim, not just claims unseen by earlier runs")
+    parser.add_argument("--resume", action="store_true",
+                        help="With --full, continue today's interrupted run instead of starting over")
+    parser.add_argument("--claim-similarity", type=float, default=CLAIM_THRESHOLD,
+                        help="Similarity at which claims on the same topic share one evidence check")
+    parser.add_argument("--no-cluster", action="store_true",
+                        help="Check every claim separately, even near-identical ones")
+    return parser.parse_args(argv)
 
-def main():
+def main(argv=None):
     """Main evidence checking function."""
     print("=" * 60)
     print("Evidence Check - PubMed Verification")
     print("=" * 60)
     
+    args = parse_args(argv)
+    configure_llm_cache(args.llm_cache, clear=args.clear_llm_cache)
+    
     OUTPUT_DIR = "data/processed"
     os.makedirs(OUTPUT_DIR, exist_ok=True)
     timestamp = datetime.now().strftime("%Y-%m-%d")
     
     try:
-        input_file = find_latest_claims_file("data/interim")
-        print(f"\nLoading claims from: {input_file}")
-        claims_df = pd.read_parquet(input_file)
+        state = PipelineState()
+        store = EvidenceStore()
+        for legacy in import_legacy_evidence(store, state, OUTPUT_DIR):
+            print(f"✓ Imported earlier results into the evidence store from: {legacy}")
+        
+        claims_dir = os.getenv("INTERIM_DIR", "data/interim")
+        print(f"\nLoading claims from: {claims_dir}")
+        claims_df = load_claims(claims_dir)
         print(f"✓ Loaded {len(claims_df)} claims")
         
+        if not args.full:
+            new_ids = set(state.filter_new(EVALUATED_CLAIMS, claims_df["claim_id"]))
+            claims_df = claims_df[claims_df["claim_id"].isin(new_ids)].reset_index(drop=True)
+            print(f"✓ {len(claims_df)} claims not checked by earlier runs")
+            if claims_df.empty:
+                print("✓ Nothing new to check.")
+                return 0
+        
+        if args.full:
+            if args.resume:
+                done = set(store.read(columns=["claim_id"], date_from=timestamp, date_to=timestamp,
+                                      latest_only=False)["claim_id"])
+                claims_df = claims_df[~claims_df["claim_id"].isin(done)].reset_index(drop=True)
+                print(f"✓ Resuming: {len(done)} claims already written, {len(claims_df)} to go")
+            else:
+                # Start today's results for these claims over; rows added by
+                # add_post.py or the stream for other claims are kept
+                store.drop_claims(timestamp, claims_df["claim_id"])
+        
         print("\nChecking evidence (PubMed + LLM evaluation)...")
-        print("Respecting PubMed rate limits (~3 req/sec)\n")
+        if get_backend() == "local":
+            print(f"Searching the local PubMed mirror: {get_local_index().path}\n")
+        else:
+            print(f"Respecting PubMed rate limits (~{get_rate_limiter().rate:g} req/sec)\n")
         
-        results = []
+        claims = claims_df.to_dict("records")
         
-        for idx, row in claims_df.iterrows():
-            pct = ((idx + 1) / len(claims_df)) * 100
-            print(f"  [{idx+1}/{len(claims_df)}] ({pct:.1f}%) {row.get('claim', '')[:50]}...")
-            
-            try:
-                query = build_search_query(
-                    claim=row.get("claim", ""),
-                    topic=row.get("topic", "")
-                )
-                
-                papers = search_pubmed(query, max_results=5)
-                references_text = format_references(papers)
-                
-                evaluation = evaluate_claim(
-                    claim=row.get("claim", ""),
-                    topic=row.get("topic", ""),
-                    references_text=references_text
-                )
-                
-                result = {
-                    **row.to_dict(),
-                    "evidence_level": evaluation.get("evidence_level", "unknown"),
-                    "explanation": evaluation.get("explanation", ""),
-                    "num_papers_found": len(papers),
-                    "pmid_list": ",".join([p["pmid"] for p in papers]),
-                }
-                
-                results.append(result)
-                print(f"       Evidence: {evaluation.get('evidence_level', 'unknown')}")
-                
-            except Exception as e:
-                print(f"       Warning: Error - {e}")
-                results.append({
-                    **row.to_dict(),
-                    "evidence_level": "error",
-                    "explanation": str(e),
-                    "num_papers_found": 0,
-                    "pmid_list": "",
-                })
-                continue
+        # Near-identical claims share one PubMed search and LLM evaluation
+        if args.no_cluster:
+            canonical_of = list(range(len(claims)))
+        else:
+            canonical_of = cluster_claims(
+                claims_df["claim"].fillna("").astype(str).tolist(),
+                claims_df["topic"].fillna("").astype(str).tolist(),
+                threshold=args.claim_similarity,
+            )
+        members = defaultdict(list)
+        for idx, canonical in enumerate(canonical_of):
+            members[canonical].append(idx)
+        canonical_indices = sorted(members)
+        canonical_claims = [claims[i] for i in canonical_indices]
+        print(f"✓ {len(claims)} claims grouped into {len(canonical_claims)} distinct claims")
         
-        print(f"\n✓ Checked {len(results)} claims")
+        pending = []
+        checked_count = 0
+        started = time.time()
         
-        results_df = pd.DataFrame(results)
-        output_file = os.path.join(OUTPUT_DIR, f"claims_evidence_{timestamp}.parquet")
-        results_df.to_parquet(output_file, index=False)
+        def checkpoint():
+            # Claims count as checked only once their results are in the store;
+            # failed claims are left unmarked so the next run retries them
+            if pending:
+                store.append(pd.DataFrame(pending), date=timestamp)
+                state.mark(EVALUATED_CLAIMS, [
+                    r["claim_id"] for r in pending if r.get("evidence_level") != "error"
+                ])
+                pending.clear()
         
-        csv_file = os.path.join(OUTPUT_DIR, f"claims_evidence_{timestamp}.csv")
-        results_df.to_csv(csv_file, index=False)
+        try:
+            results = check_claims(canonical_claims, pubmed_workers=PUBMED_WORKERS)
+            for idx, (canonical, result) in enumerate(zip(canonical_indices, results)):
+                verdict = {k: result[k] for k in VERDICT_COLUMNS}
+                for member in members[canonical]:
+                    pending.append({
+                        **claims[member],
+                        **verdict,
+                        "canonical_claim_id": claims[canonical]["claim_id"],
+                    })
+                checked_count += len(members[canonical])
+                if len(pending) >= CHECKPOINT_ROWS:
+                    checkpoint()
+                
+                total = len(canonical_claims)
+                elapsed = time.time() - started
+                rate = (idx + 1) / elapsed if elapsed > 0 else 0.0
+                remaining = (total - idx - 1) / rate if rate > 0 else 0.0
+                pct = ((idx + 1) / total) * 100
+                shared = len(members[canonical]) - 1
+                print(f"  [{idx+1}/{total}] ({pct:.1f}%, {rate:.2f} claims/s, "
+                      f"~{remaining/60:.0f} min left) {result.get('claim', '')[:50]}..."
+                      + (f" (+{shared} similar)" if shared else ""))
+                print(f"       Evidence: {result.get('evidence_level', 'unknown')}")
+        finally:
+            checkpoint()
         
-        print(f"✓ Saved to: {output_file}")
-        print(f"✓ CSV saved to: {csv_file}")
+        elapsed = time.time() - started
+        print(f"\n✓ Checked {checked_count} claims in {elapsed:.0f}s "
+              f"({checked_count / elapsed if elapsed else 0:.2f} claims/s)")
+        # Merge this run's checkpoint fragments into one file per topic
+        store.compact(date=timestamp)
+        manifest = store.manifest()
+        print(f"✓ Saved to evidence store: {store.root} (date={timestamp})")
+        print(f"✓ Dataset version {manifest['version']}: {manifest['rows']} rows, "
+              f"content hash {manifest['content_hash'][:12]}")
         
+        results_df = store.read(columns=["evidence_level"])
         print("\nEvidence Summary:")
         print(f"  Total claims analyzed: {len(results_df)}")
         if "evidence_level" in results_df.columns:
             print("\n  Evidence levels:")
             print(results_df["evidence_level"].value_counts().to_string())
         
+        cache = get_pubmed_cache()
+        if cache is not None:
+            stats = cache.stats()
+            print(f"\n  PubMed cache: {stats['hits']} hits, {stats['misses']} misses "
+                  f"({stats['hit_rate']:.0%} hit rate, {stats['entries']} entries)")
+        
+        llm_cache = get_llm_cache()
+        if llm_cache is not None:
+            stats = llm_cache.stats()
+            print(f"  LLM cache: {stats['hits']} hits, {stats['misses']} misses "
+                  f"({stats['hit_rate']:.0%} hit rate, {stats['bytes'] / 1e6:.1f} MB)")
+        
         print("\n✅ Pipeline complete! Ready for dashboard.")
         return 0
         
@@ -7,16 +7,57 @@ Simply paste Reddit post text or URLs, and the system will:
 2. Verify against PubMed
 3. Generate comparison report
 """
+import argparse
+import csv
 import os
 import sys
+import time
 import pandas as pd
 from datetime import datetime
 import json
+import uuid
+from typing import Dict, Iterable, List, Optional, TextIO
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from src.utils.llm import extract_claims_from_post
-from src.utils.pubmed import search_pubmed, format_references, build_search_query
+from src.utils.llm import extract_claims_from_post, extract_claims_many
+from src.utils.pubmed import search_pubmed, format_references, build_search_query, fetch_summaries
 from src.utils.llm import evaluate_claim
+from src.utils.evidence import check_claims
+from src.utils.state import claim_hash
+from src.utils.store import EvidenceStore
+
+REPORTS_DIR = "data/reports"
+
+# Concurrent esearch requests in batch mode; the shared NCBI rate limiter still applies
+PUBMED_WORKERS = 4
+
+# Accepted field names in batch input, first match wins
+TITLE_FIELDS = ("title",)
+TEXT_FIELDS = ("text", "selftext", "body")
+URL_FIELDS = ("url", "post_url")
+ID_FIELDS = ("post_id", "id")
+
+
+def new_post_id() -> str:
+    """ID for a manually added post; the random suffix keeps concurrent analyses apart."""
+    return f"manual_{datetime.now().strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:6]}"
+
+
+def claim_result(claim_data: Dict, evaluation: Dict, papers: List[Dict], post_id: str, post_url: str) -> Dict:
+    """Result entry for one claim, as stored in an analysis's "results" list."""
+    return {
+        'claim': claim_data.get('claim', ''),
+        'topic': claim_data.get('topic', ''),
+        'type': claim_data.get('type', ''),
+        'direction': claim_data.get('direction', ''),
+        'target': claim_data.get('target', ''),
+        'evidence_level': evaluation.get('evidence_level', 'unknown'),
+        'explanation': evaluation.get('explanation', ''),
+        'num_papers': len(papers),
+        'papers': papers,
+        'post_id': post_id,
+        'post_url': post_url
+    }
 
 
 def analyze_reddit_post(title: str, text: str, post_url: str = "", post_id: str = None):
@@ -30,7 +71,7 @@ def analyze_reddit_post(title: str, text: str, post_url: str = "", post_id: str
     - Comparison analysis
     """
     if not post_id:
-        post_id = f"manual_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        post_id = new_post_id()
     
     print("=" * 70)
     print("ANALYZING REDDIT POST")
@@ -43,6 +84,9 @@ def analyze_reddit_post(title: str, text: str, post_url: str = "", post_id: str
     print("\n[1/3] Extracting claims with AI (Ollama)...")
     claims = extract_claims_from_post(title, text)
     
+    if claims is None:
+        print("   ⚠️  Claim extraction failed (is Ollama running?)")
+        return None
     if not claims:
         print("   ⚠️  No specific longevity claims found in this post")
         return None
@@ -69,19 +113,7 @@ def analyze_reddit_post(title: str, text: str, post_url: str = "", post_id: str
         # Evaluate with LLM
         evaluation = evaluate_claim(claim_text, topic, refs_text)
         
-        results.append({
-            'claim': claim_text,
-            'topic': topic,
-            'type': claim_data.get('type', ''),
-            'direction': claim_data.get('direction', ''),
-            'target': claim_data.get('target', ''),
-            'evidence_level': evaluation.get('evidence_level', 'unknown'),
-            'explanation': evaluation.get('explanation', ''),
-            'num_papers': len(papers),
-            'papers': papers,
-            'post_id': post_id,
-            'post_url': post_url
-        })
+        results.append(claim_result(claim_data, evaluation, papers, post_id, post_url))
         
         print(f"      Evidence: {evaluation.get('evidence_level', 'unknown')}")
     
@@ -100,6 +132,150 @@ def analyze_reddit_post(title: str, text: str, post_url: str = "", post_id: str
     return report_data
 
 
+def analyze_posts(
+    posts: List[Dict],
+    pubmed_workers: int = PUBMED_WORKERS,
+    llm_workers: Optional[int] = None,
+) -> List[Optional[Dict]]:
+    """
+    Analyze many posts together; the batch counterpart of analyze_reddit_post.
+
+    Claims are extracted from all posts concurrently, then every claim goes
+    through one check_claims pipeline, so PubMed searches share the NCBI rate
+    limiter and summary fetches while LLM evaluations run in parallel.
+
+    Args:
+        posts: Dicts with "title", "text" and optional "url" / "post_id"
+        pubmed_workers: Concurrent esearch requests
+        llm_workers: Concurrent LLM calls (default: OLLAMA_NUM_PARALLEL or 4)
+
+    Returns:
+        One analysis per post, in input order (None for posts without claims
+        or whose extraction failed)
+    """
+    posts = [{**post, 'post_id': post.get('post_id') or new_post_id()} for post in posts]
+
+    print(f"\n[1/3] Extracting claims from {len(posts)} posts...")
+    claim_lists = extract_claims_many(
+        [(post['title'], post['text']) for post in posts], concurrency=llm_workers
+    )
+    claims, owners = [], []
+    for i, post_claims in enumerate(claim_lists):
+        claims.extend(post_claims or [])
+        owners.extend([i] * len(post_claims or []))
+    print(f"   ✓ Found {len(claims)} claims in "
+          f"{sum(1 for c in claim_lists if c)}/{len(posts)} posts")
+    failed = sum(1 for c in claim_lists if c is None)
+    if failed:
+        print(f"   ⚠️  Claim extraction failed for {failed} posts (is Ollama running?)")
+
+    print(f"\n[2/3] Verifying {len(claims)} claims against PubMed...")
+    checked = []
+    for n, result in enumerate(check_claims(claims, pubmed_workers, llm_workers), 1):
+        checked.append(result)
+        print(f"   [{n}/{len(claims)}] {result.get('claim', '')[:50]}... "
+              f"{result.get('evidence_level', 'unknown')}")
+
+    # Summaries were fetched (and cached) by check_claims; this only reads them
+    # back. If that still fails, the reports list bare PMIDs rather than the
+    # batch losing every evaluation already done
+    pmids = [p for r in checked for p in r.get('pmid_list', '').split(',') if p]
+    try:
+        papers = fetch_summaries(pmids) if pmids else {}
+    except Exception as e:
+        print(f"   ⚠️  Could not fetch paper details ({e}); reports will list PMIDs only")
+        papers = {}
+
+    print("\n[3/3] Generating comparison reports...")
+    analyses: List[Optional[Dict]] = [None] * len(posts)
+    for i, post in enumerate(posts):
+        if not claim_lists[i]:
+            continue
+        analyses[i] = {
+            'post_title': post['title'],
+            'post_url': post.get('url', ''),
+            'post_id': post['post_id'],
+            'analysis_date': datetime.now().isoformat(),
+            'claims_found': len(claim_lists[i]),
+            'results': [],
+        }
+    for owner, result in zip(owners, checked):
+        post = posts[owner]
+        claim_papers = [
+            papers.get(p) or {'pmid': p, 'title': f"PMID {p}", 'journal': '', 'pubdate': ''}
+            for p in result.get('pmid_list', '').split(',') if p
+        ]
+        analyses[owner]['results'].append(
+            claim_result(result, result, claim_papers, post['post_id'], post.get('url', ''))
+        )
+    return analyses
+
+
+def _first(row: Dict, fields: Iterable[str]) -> str:
+    for field in fields:
+        value = row.get(field)
+        if value is not None and str(value).strip():
+            return str(value)
+    return ""
+
+
+def read_posts(source: TextIO, fmt: str = "jsonl") -> List[Dict]:
+    """
+    Read posts for batch mode from JSON lines or CSV.
+
+    Each record needs a title; the post text may be called text, selftext or
+    body, the link url or post_url, and an optional ID post_id or id.
+    Records without a title or text are skipped with a warning.
+    """
+    if fmt == "csv":
+        rows = list(csv.DictReader(source))
+    else:
+        rows = []
+        for line_no, line in enumerate(source, 1):
+            if not line.strip():
+                continue
+            try:
+                rows.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                print(f"   ⚠️  Skipping line {line_no}: {e}")
+
+    posts = []
+    for n, row in enumerate(rows, 1):
+        post = {
+            'title': _first(row, TITLE_FIELDS),
+            'text': _first(row, TEXT_FIELDS),
+            'url': _first(row, URL_FIELDS),
+            'post_id': _first(row, ID_FIELDS) or None,
+        }
+        if not post['title'] and not post['text']:
+            print(f"   ⚠️  Skipping record {n}: no title or text")
+            continue
+        posts.append(post)
+    return posts
+
+
+def results_to_evidence_rows(analysis_data) -> pd.DataFrame:
+    """Convert an analysis into rows matching the evidence store's columns."""
+    rows = []
+    for result in analysis_data['results']:
+        rows.append({
+            'claim_id': claim_hash(result['post_id'], result['claim']),
+            'claim': result['claim'],
+            'topic': result['topic'],
+            'type': result['type'],
+            'direction': result['direction'],
+            'target': result['target'],
+            'post_id': result['post_id'],
+            'post_url': result['post_url'],
+            'created_utc': analysis_data['analysis_date'],
+            'evidence_level': result['evidence_level'],
+            'explanation': result['explanation'],
+            'num_papers_found': result['num_papers'],
+            'pmid_list': ",".join(p['pmid'] for p in result['papers']),
+        })
+    return pd.DataFrame(rows)
+
+
 def generate_comparison_report(analysis_data):
     """Generate a detailed Markdown comparison report."""
     
@@ -179,7 +355,8 @@ This analysis follows a rigorous 3-step verification process:
         if result['papers']:
             for paper in result['papers']:
                 report += f"\n- **[{paper['title']}](https://pubmed.ncbi.nlm.nih.gov/{paper['pmid']}/)**  \n"
-                report += f"  {paper['journal']}, {paper['pubdate']} (PMID: {paper['pmid']})\n"
+                details = ", ".join(d for d in (paper['journal'], paper['pubdate']) if d)
+                report += f"  {details + ' ' if details else ''}(PMID: {paper['pmid']})\n"
         else:
             report += "\nNo relevant papers found in PubMed.\n"
         
@@ -244,7 +421,99 @@ For critical health decisions, consult the original papers and medical professio
     return report
 
 
-def main():
+def save_report(analysis: Dict, output_dir: str = REPORTS_DIR) -> str:
+    """Write an analysis's comparison report and return its path."""
+    os.makedirs(output_dir, exist_ok=True)
+    post_id = analysis['post_id']
+    name = post_id[len('manual_'):] if post_id.startswith('manual_') else post_id
+    name = "".join(c if c.isalnum() or c in "-_" else "_" for c in name)
+    report_file = os.path.join(output_dir, f"analysis_{name}.md")
+    with open(report_file, 'w') as f:
+        f.write(generate_comparison_report(analysis))
+    return report_file
+
+
+def generate_batch_index(posts: List[Dict], analyses: List[Optional[Dict]], report_files: List[Optional[str]]) -> str:
+    """Markdown index of a batch run: one row per post, linking its report."""
+    with_claims = [a for a in analyses if a]
+    index = f"""# Batch Analysis Index
+
+**Analysis Date:** {datetime.now().strftime('%Y-%m-%d %H:%M')}  
+**Posts:** {len(posts)}  
+**Posts with claims:** {len(with_claims)}  
+**Claims analyzed:** {sum(len(a['results']) for a in with_claims)}
+
+| # | Post | Claims | Supported | Lacking evidence | Report |
+|---|------|--------|-----------|------------------|--------|
+"""
+    for i, (post, analysis, report_file) in enumerate(zip(posts, analyses, report_files), 1):
+        title = (post['title'] or post['text'][:80]).replace('|', '\\|').replace('\n', ' ')
+        if not analysis:
+            index += f"| {i} | {title} | 0 | - | - | No claims found |\n"
+            continue
+        results = analysis['results']
+        supported = sum(1 for r in results if r['evidence_level'] in ['strong_support', 'moderate_support'])
+        lacking = sum(1 for r in results if r['evidence_level'] == 'no_clear_support')
+        name = os.path.basename(report_file)
+        index += f"| {i} | {title} | {len(results)} | {supported} | {lacking} | [{name}]({name}) |\n"
+    return index
+
+
+def parse_args(argv=None):
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Analyze Reddit posts against PubMed evidence")
+    parser.add_argument("title", nargs="?", help="Post title")
+    parser.add_argument("text", nargs="?", help="Post text")
+    parser.add_argument("url", nargs="?", default="", help="Post URL")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="Analyze every post in a JSON lines or CSV file ('-' reads stdin)")
+    parser.add_argument("--format", choices=["jsonl", "csv"],
+                        help="Batch input format (default: from the file extension, jsonl for stdin)")
+    parser.add_argument("--llm-workers", type=int, default=None,
+                        help="Concurrent LLM calls in batch mode (default: OLLAMA_NUM_PARALLEL or 4)")
+    return parser.parse_args(argv)
+
+
+def run_batch(args) -> int:
+    """Analyze every post in the batch input, then store all results with one append."""
+    fmt = args.format or ("csv" if args.batch.lower().endswith(".csv") else "jsonl")
+    if args.batch == "-":
+        posts = read_posts(sys.stdin, fmt)
+    else:
+        with open(args.batch, newline="", encoding="utf-8") as f:
+            posts = read_posts(f, fmt)
+    if not posts:
+        print("\n⚠️  No posts to analyze")
+        return 1
+    
+    started = time.time()
+    analyses = analyze_posts(posts, llm_workers=args.llm_workers)
+    report_files = [save_report(a) if a else None for a in analyses]
+    
+    index_file = os.path.join(REPORTS_DIR, f"batch_{datetime.now().strftime('%Y%m%d%H%M%S')}.md")
+    with open(index_file, 'w') as f:
+        f.write(generate_batch_index(posts, analyses, report_files))
+    
+    done = [a for a in analyses if a]
+    elapsed = time.time() - started
+    print(f"\n✅ Analyzed {len(posts)} posts in {elapsed:.0f}s "
+          f"({len(done)} with claims, {sum(len(a['results']) for a in done)} claims)")
+    print(f"✓ Reports saved to: {REPORTS_DIR}")
+    print(f"✓ Batch index: {index_file}")
+    
+    if done:
+        # One append for the whole batch: a single locked write and manifest update
+        store = EvidenceStore()
+        store.append(pd.concat([results_to_evidence_rows(a) for a in done], ignore_index=True))
+        print(f"✓ Added to evidence store: {store.root}")
+    
+    print(f"\n📄 View the index:")
+    print(f"   cat {index_file}")
+    
+    return 0 if done else 1
+
+
+def main(argv=None):
     """Interactive mode to add new posts."""
     print("=" * 70)
     print("REDDIT POST ANALYZER - Add New Content")
@@ -253,55 +522,38 @@ def main():
     print("\nOptions:")
     print("1. Paste Reddit post text")
     print("2. Enter Reddit URL (future feature)")
-    print("3. Load from file")
+    print("3. Load from file (--batch)")
+    
+    args = parse_args(argv)
+    if args.batch:
+        return run_batch(args)
     
     # For now, demo with command line args
-    if len(sys.argv) < 3:
+    if not args.title or not args.text:
         print("\nUsage:")
         print('  python src/add_post.py "Post Title" "Post Text" [optional_url]')
+        print('  python src/add_post.py --batch posts.jsonl    (or posts.csv, or - for stdin)')
         print("\nExample:")
         print('  python src/add_post.py "Rapamycin results" "I\'ve been taking 6mg weekly..."')
         return 1
     
-    title = sys.argv[1]
-    text = sys.argv[2]
-    url = sys.argv[3] if len(sys.argv) > 3 else ""
-    
     # Analyze
-    analysis = analyze_reddit_post(title, text, url)
+    analysis = analyze_reddit_post(args.title, args.text, args.url)
     
     if not analysis:
         return 1
     
-    # Generate report
-    report = generate_comparison_report(analysis)
-    
-    # Save report
-    output_dir = "data/reports"
-    os.makedirs(output_dir, exist_ok=True)
-    
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    report_file = os.path.join(output_dir, f"analysis_{timestamp}.md")
-    
-    with open(report_file, 'w') as f:
-        f.write(report)
+    # Generate and save report
+    report_file = save_report(analysis)
     
     print(f"\n✅ Analysis complete!")
     print(f"✓ Report saved to: {report_file}")
     
-    # Also append to main evidence database
-    df_new = pd.DataFrame(analysis['results'])
-    
-    # Check if main database exists
-    main_db = "data/processed/claims_evidence_main.csv"
-    if os.path.exists(main_db):
-        df_existing = pd.read_csv(main_db)
-        df_combined = pd.concat([df_existing, df_new], ignore_index=True)
-    else:
-        df_combined = df_new
-    
-    df_combined.to_csv(main_db, index=False)
-    print(f"✓ Added to main database: {main_db}")
+    # Also add to the evidence store the dashboard reads from. Appends only
+    # write a new fragment, so concurrent analyses never rewrite each other.
+    store = EvidenceStore()
+    store.append(results_to_evidence_rows(analysis))
+    print(f"✓ Added to evidence store: {store.root}")
     
     print(f"\n📄 View your report:")
     print(f"   cat {report_file}")
@@ -8,24 +8,160 @@ import pandas as pd
 import streamlit as st
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.utils.checkpoint import read_dataset
+from src.utils.dashboard import EvidenceIndex, EvidenceLoader
+from src.utils.exports import EXPORT_FORMATS, ensure_export, export_path
+from src.utils.store import EvidenceStore
 
-@st.cache_data
-def load_latest_evidence():
-    """Load the most recent evidence file."""
+# Columns the dashboard displays; everything else stays on disk
+DASHBOARD_COLUMNS = [
+    "claim_id", "claim", "topic", "type", "evidence_level", "explanation",
+    "post_score", "post_comments", "num_papers_found", "pmid_list",
+]
+
+# Seconds between checks of the store manifest for new data (one small JSON read)
+REFRESH_SECONDS = 15
+
+# Claims per page in card and table view; only the page in view is sent to the browser
+CARD_PAGE_SIZE = 25
+TABLE_PAGE_SIZE = 200
+
+EVIDENCE_EMOJI = {
+    "strong_support": "✅",
+    "moderate_support": "🟡",
+    "weak_support": "🟠",
+    "mixed": "⚪",
+    "no_clear_support": "❌",
+    "unknown": "❓",
+    "error": "⚠️"
+}
+
+def latest_legacy_file():
+    """Most recent dated evidence file written before the evidence store, if any."""
     processed_dir = "data/processed"
     
     parquet_files = glob.glob(os.path.join(processed_dir, "claims_evidence_*.parquet"))
     if parquet_files:
-        latest_file = max(parquet_files)
-        return pd.read_parquet(latest_file)
+        return max(parquet_files)
     
     csv_files = glob.glob(os.path.join(processed_dir, "claims_evidence_*.csv"))
     if csv_files:
-        latest_file = max(csv_files)
-        return pd.read_csv(latest_file)
+        return max(csv_files)
     
     return None
 
+@st.cache_data(ttl=REFRESH_SECONDS)
+def load_manifest():
+    """The evidence store's manifest without its fragment list (None if the store is empty)."""
+    manifest = EvidenceStore().manifest()
+    if not manifest["fragments"]:
+        return None
+    return {key: value for key, value in manifest.items() if key != "fragments"}
+
+def dataset_version():
+    """Cheap token identifying the current evidence data (None if there is none)."""
+    manifest = load_manifest()
+    if manifest is not None:
+        return f"store:{manifest['version']}:{manifest['content_hash']}"
+    latest_file = latest_legacy_file()
+    if latest_file is None:
+        return None
+    return f"legacy:{latest_file}:{os.path.getmtime(latest_file)}"
+
+@st.cache_resource
+def get_loader():
+    """The process-wide copy of the store's rows, refreshed incrementally."""
+    return EvidenceLoader(EvidenceStore(), DASHBOARD_COLUMNS)
+
+@st.cache_resource(max_entries=1)
+def load_index(version):
+    """Bring the evidence up to date once per dataset version and build its aggregates."""
+    if version is None:
+        return None
+    if version.startswith("store:"):
+        store = EvidenceStore()
+        df = get_loader().refresh()
+        search_index = store.search_index()
+        claim_ids = df["claim_id"].dropna().astype(str) if "claim_id" in df.columns else []
+        if len(claim_ids) and (search_index.row_ids(claim_ids) < 0).any():
+            # Evidence written before the store kept a search index (a store
+            # upgraded in place only indexes what was appended since)
+            store.rebuild_search_index()
+        return EvidenceIndex(df, search_index) if not df.empty else None
+    latest_file = latest_legacy_file()
+    df = read_dataset(latest_file) if latest_file.endswith(".parquet") else pd.read_csv(latest_file)
+    return EvidenceIndex(df) if not df.empty else None
+
+def page_cursors(view_key):
+    """
+    Keyset cursors of the pages visited so far (the last one is the current page).
+
+    Starts over at page one whenever the filters, search or view mode change.
+    """
+    if st.session_state.get("page_view_key") != view_key:
+        st.session_state["page_view_key"] = view_key
+        st.session_state["page_cursors"] = [None]
+    return st.session_state["page_cursors"]
+
+def render_claim_card(row):
+    """Show one claim as an expandable card."""
+    with st.expander(f"**{row['claim'][:100]}...**" if len(row['claim']) > 100 else f"**{row['claim']}**"):
+        col_a, col_b = st.columns([2, 1])
+        
+        with col_a:
+            st.markdown(f"**Topic:** {row.get('topic', 'N/A')}")
+            st.markdown(f"**Type:** {row.get('type', 'N/A')}")
+            
+            emoji = EVIDENCE_EMOJI.get(row.get("evidence_level", "unknown"), "❓")
+            st.markdown(f"**Evidence:** {emoji} {row.get('evidence_level', 'N/A')}")
+            
+            st.markdown("**Explanation:**")
+            st.info(row.get("explanation", "No explanation available"))
+        
+        with col_b:
+            st.markdown(f"**Reddit Score:** ⬆️ {row.get('post_score', 0)}")
+            st.markdown(f"**Comments:** 💬 {row.get('post_comments', 0)}")
+            st.markdown(f"**Papers Found:** 📄 {row.get('num_papers_found', 0)}")
+            
+            if row.get("pmid_list"):
+                pmids = str(row["pmid_list"]).split(",")
+                st.markdown("**PubMed IDs:**")
+                for pmid in pmids[:3]:
+                    if pmid.strip():
+                        st.markdown(f"[{pmid}](https://pubmed.ncbi.nlm.nih.gov/{pmid}/)")
+
+def render_claim_table(page_df):
+    """Show a page of claims as one compact table."""
+    table = page_df.copy()
+    table["evidence_level"] = table["evidence_level"].map(
+        lambda level: f"{EVIDENCE_EMOJI.get(level, '❓')} {level}"
+    )
+    if "pmid_list" in table.columns:
+        first_pmid = table["pmid_list"].fillna("").astype(str).str.split(",").str[0].str.strip()
+        table["pubmed"] = first_pmid.map(
+            lambda pmid: f"https://pubmed.ncbi.nlm.nih.gov/{pmid}/" if pmid else None
+        )
+    columns = [
+        c for c in ["claim", "topic", "evidence_level", "post_score", "num_papers_found", "pubmed", "explanation"]
+        if c in table.columns
+    ]
+    st.dataframe(
+        table[columns],
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            "claim": st.column_config.TextColumn("Claim", width="large"),
+            "topic": st.column_config.TextColumn("Topic"),
+            "evidence_level": st.column_config.TextColumn("Evidence"),
+            "post_score": st.column_config.NumberColumn("Score", format="%d"),
+            "num_papers_found": st.column_config.NumberColumn("Papers"),
+            "pubmed": st.column_config.LinkColumn(
+                "PubMed", display_text=r"https://pubmed\.ncbi\.nlm\.nih\.gov/(\d+)/"
+            ),
+            "explanation": st.column_config.TextColumn("Explanation", width="large"),
+        },
+    )
+
 def main():
     """Main Streamlit app."""
     st.set_page_config(
@@ -37,9 +173,10 @@ def main():
     st.title("🧬 r/longevity Evidence Tracker")
     st.markdown("*Analyzing longevity claims from Reddit against scientific evidence*")
     
-    df = load_latest_evidence()
+    version = dataset_version()
+    index = load_index(version)
     
-    if df is None:
+    if index is None:
         st.error("No evidence data found. Please run the pipeline first:")
         st.code("""
 python src/generate_demo_data.py
@@ -48,91 +185,76 @@ python src/03_evidence_check.py
         """)
         return
     
+    manifest = load_manifest()
+    if manifest is not None:
+        st.sidebar.caption(
+            f"Dataset v{manifest['version']} · {manifest['rows']:,} rows · updated {manifest['updated_at']}"
+        )
+    
     st.sidebar.header("Filters")
     
-    topics = ["All"] + sorted(df["topic"].unique().tolist())
+    topics = ["All"] + sorted(index.topics)
     selected_topic = st.sidebar.selectbox("Topic", topics)
     
-    evidence_levels = ["All"] + sorted(df["evidence_level"].unique().tolist())
+    evidence_levels = ["All"] + sorted(index.levels)
     selected_evidence = st.sidebar.selectbox("Evidence Level", evidence_levels)
     
-    filtered_df = df.copy()
-    
-    if selected_topic != "All":
-        filtered_df = filtered_df[filtered_df["topic"] == selected_topic]
-    
-    if selected_evidence != "All":
-        filtered_df = filtered_df[filtered_df["evidence_level"] == selected_evidence]
-    
-    if "post_score" in filtered_df.columns:
-        filtered_df = filtered_df.sort_values("post_score", ascending=False)
+    filters = {
+        "topic": None if selected_topic == "All" else selected_topic,
+        "evidence_level": None if selected_evidence == "All" else selected_evidence,
+    }
+    summary = index.summary(**filters)
     
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("Total Claims", len(filtered_df))
+        st.metric("Total Claims", summary["total"])
     
     with col2:
-        if "topic" in filtered_df.columns:
-            st.metric("Unique Topics", filtered_df["topic"].nunique())
+        st.metric("Unique Topics", summary["topics"])
     
     with col3:
-        strong_evidence = len(filtered_df[filtered_df["evidence_level"] == "strong_support"])
-        st.metric("Strong Evidence", strong_evidence)
+        st.metric("Strong Evidence", summary["strong"])
     
     with col4:
-        if "post_score" in filtered_df.columns:
-            st.metric("Total Reddit Score", f"{filtered_df['post_score'].sum():,}")
+        if "post_score" in index.df.columns:
+            st.metric("Total Reddit Score", f"{summary['score']:,}")
     
     tab1, tab2, tab3 = st.tabs(["📋 Claims List", "📊 Analytics", "📥 Export"])
     
     with tab1:
         st.subheader("Claims")
         
-        search = st.text_input("🔍 Search claims", "")
-        if search:
-            filtered_df = filtered_df[
-                filtered_df["claim"].str.contains(search, case=False, na=False) |
-                filtered_df["explanation"].str.contains(search, case=False, na=False)
-            ]
+        search = st.text_input(
+            "🔍 Search claims", "",
+            help='All words must match. Use "quotes" for phrases, rapa* for prefixes, OR for either term.',
+        )
+        filters["search"] = search
+        summary = index.summary(**filters)
         
-        for idx, row in filtered_df.head(50).iterrows():
-            with st.expander(f"**{row['claim'][:100]}...**" if len(row['claim']) > 100 else f"**{row['claim']}**"):
-                col_a, col_b = st.columns([2, 1])
-                
-                with col_a:
-                    st.markdown(f"**Topic:** {row.get('topic', 'N/A')}")
-                    st.markdown(f"**Type:** {row.get('type', 'N/A')}")
-                    
-                    evidence_emoji = {
-                        "strong_support": "✅",
-                        "moderate_support": "🟡",
-                        "weak_support": "🟠",
-                        "mixed": "⚪",
-                        "no_clear_support": "❌",
-                        "unknown": "❓",
-                        "error": "⚠️"
-                    }
-                    emoji = evidence_emoji.get(row.get("evidence_level", "unknown"), "❓")
-                    st.markdown(f"**Evidence:** {emoji} {row.get('evidence_level', 'N/A')}")
-                    
-                    st.markdown("**Explanation:**")
-                    st.info(row.get("explanation", "No explanation available"))
-                
-                with col_b:
-                    st.markdown(f"**Reddit Score:** ⬆️ {row.get('post_score', 0)}")
-                    st.markdown(f"**Comments:** 💬 {row.get('post_comments', 0)}")
-                    st.markdown(f"**Papers Found:** 📄 {row.get('num_papers_found', 0)}")
-                    
-                    if row.get("pmid_list"):
-                        pmids = str(row["pmid_list"]).split(",")
-                        st.markdown("**PubMed IDs:**")
-                        for pmid in pmids[:3]:
-                            if pmid.strip():
-                                st.markdown(f"[{pmid}](https://pubmed.ncbi.nlm.nih.gov/{pmid}/)")
+        mode = st.radio("View", ["Cards", "Table"], horizontal=True, label_visibility="collapsed")
+        size = CARD_PAGE_SIZE if mode == "Cards" else TABLE_PAGE_SIZE
+        cursors = page_cursors((filters["topic"], filters["evidence_level"], search, mode))
         
-        if len(filtered_df) > 50:
-            st.info(f"Showing 50 of {len(filtered_df)} claims. Adjust filters to narrow results.")
+        page_df, next_cursor = index.page(**filters, after=cursors[-1], size=size)
+        if mode == "Cards":
+            for _, row in page_df.iterrows():
+                render_claim_card(row)
+        else:
+            render_claim_table(page_df)
+        
+        if summary["total"] > size:
+            pages = -(-summary["total"] // size)
+            nav_prev, nav_info, nav_next = st.columns([1, 2, 1])
+            with nav_prev:
+                st.button("← Previous", disabled=len(cursors) == 1, on_click=cursors.pop)
+            with nav_info:
+                st.caption(f"Page {len(cursors)} of {pages} ({summary['total']} claims)")
+            with nav_next:
+                st.button(
+                    "Next →", disabled=next_cursor is None,
+                    on_click=cursors.append, args=(next_cursor,),
+                )
     
     with tab2:
         st.subheader("Analytics")
@@ -141,22 +263,17 @@ python src/03_evidence_check.py
         
         with col1:
             st.markdown("### Evidence Distribution")
-            evidence_counts = filtered_df["evidence_level"].value_counts()
-            st.bar_chart(evidence_counts)
+            st.bar_chart(summary["evidence_counts"])
         
         with col2:
             st.markdown("### Top Topics")
-            if "topic" in filtered_df.columns:
-                topic_counts = filtered_df["topic"].value_counts().head(10)
-                st.bar_chart(topic_counts)
+            st.bar_chart(summary["topic_counts"].head(10))
         
         st.markdown("### 🔥 Hype vs Evidence Gap")
         st.markdown("*Claims with high Reddit scores but weak evidence*")
         
-        if "post_score" in filtered_df.columns:
-            weak_evidence = filtered_df[
-                filtered_df["evidence_level"].isin(["weak_support", "no_clear_support"])
-            ].sort_values("post_score", ascending=False).head(10)
+        if "post_score" in index.df.columns:
+            weak_evidence = index.top_by_level(["weak_support", "no_clear_support"], 10, **filters)
             
             if not weak_evidence.empty:
                 for _, row in weak_evidence.iterrows():
@@ -169,44 +286,28 @@ python src/03_evidence_check.py
     
     with tab3:
         st.subheader("Export Data")
+        st.caption(f"{summary['total']:,} claims match the current filters and search.")
         
-        csv = filtered_df.to_csv(index=False)
-        st.download_button(
-            label="📥 Download as CSV",
-            data=csv,
-            file_name="longevity_claims_filtered.csv",
-            mime="text/csv"
+        fmt = st.selectbox(
+            "Format", list(EXPORT_FORMATS), format_func=lambda f: EXPORT_FORMATS[f][2]
         )
+        file_name, mime, label = EXPORT_FORMATS[fmt]
         
-        st.markdown("### Generate Markdown Report")
-        if st.button("Generate Report"):
-            markdown = f"""# r/longevity Evidence Report
-
-Generated: {pd.Timestamp.now().strftime("%Y-%m-%d %H:%M")}
-
-## Summary
-- Total claims analyzed: {len(filtered_df)}
-- Unique topics: {filtered_df['topic'].nunique() if 'topic' in filtered_df.columns else 'N/A'}
-- Strong evidence claims: {len(filtered_df[filtered_df['evidence_level'] == 'strong_support'])}
-
-## Evidence Distribution
-{filtered_df['evidence_level'].value_counts().to_markdown()}
-
-## Top 10 Claims by Reddit Score
-"""
-            for idx, row in filtered_df.head(10).iterrows():
-                markdown += f"\n### {row['claim']}\n"
-                markdown += f"- **Topic:** {row.get('topic', 'N/A')}\n"
-                markdown += f"- **Evidence:** {row.get('evidence_level', 'N/A')}\n"
-                markdown += f"- **Reddit Score:** {row.get('post_score', 0)}\n"
-                markdown += f"- **Explanation:** {row.get('explanation', 'N/A')}\n"
-            
-            st.download_button(
-                label="📥 Download Report",
-                data=markdown,
-                file_name="longevity_report.md",
-                mime="text/markdown"
-            )
+        # Exports are written to disk in chunks on request and reused while the
+        # dataset version, filters and format stay the same
+        if st.button("Prepare export"):
+            with st.spinner(f"Writing {label}..."):
+                st.session_state["export_path"] = ensure_export(index, version, filters, fmt)
+        
+        path = st.session_state.get("export_path")
+        if path == export_path(version, filters, fmt) and os.path.exists(path):
+            with open(path, "rb") as f:
+                st.download_button(
+                    label=f"📥 Download {label}",
+                    data=f,
+                    file_name=file_name,
+                    mime=mime
+                )
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,85 @@
+"""
+Build the local PubMed mirror used by PUBMED_BACKEND=local
+
+Loads PubMed baseline/update XML files (pubmed*.xml.gz from
+https://ftp.ncbi.nlm.nih.gov/pubmed/baseline/ and .../updatefiles/) into a
+SQLite FTS5 index. Files are streamed, so each one is processed in constant
+memory. Load the baseline first, then update files in order; updates
+replace changed articles and apply deletions.
+
+Usage:
+    python src/build_pubmed_index.py data/pubmed/baseline/*.xml.gz --longevity-only
+    PUBMED_BACKEND=local python src/03_evidence_check.py
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.pubmed import load_vocabulary
+from src.utils.pubmed_local import LocalPubMedIndex, iter_pubmed_xml
+
+
+def longevity_mesh_terms() -> set:
+    """MeSH headings of every intervention and outcome in the query vocabulary."""
+    vocabulary = load_vocabulary()
+    return {
+        concept["mesh"]
+        for category in ("intervention", "outcome")
+        for concept in vocabulary.get(category, [])
+        if concept.get("mesh")
+    }
+
+
+def parse_args(argv=None):
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Load PubMed XML files into the local search index")
+    parser.add_argument("files", nargs="+", help="PubMed XML files (.xml or .xml.gz) or directories")
+    parser.add_argument("--index", default=None,
+                        help="Index file (default: PUBMED_LOCAL_PATH or data/pubmed/pubmed.sqlite)")
+    parser.add_argument("--longevity-only", action="store_true",
+                        help="Keep only articles indexed with a MeSH heading from the query vocabulary")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Load every given file into the index."""
+    print("=" * 60)
+    print("Local PubMed Index")
+    print("=" * 60)
+
+    args = parse_args(argv)
+    paths = []
+    for item in args.files:
+        if os.path.isdir(item):
+            paths.extend(sorted(glob.glob(os.path.join(item, "*.xml*"))))
+        else:
+            paths.extend(sorted(glob.glob(item)) or [item])
+
+    index = LocalPubMedIndex(args.index)
+    mesh_filter = longevity_mesh_terms() if args.longevity_only else None
+    if mesh_filter:
+        print(f"Keeping articles with any of {len(mesh_filter)} MeSH headings")
+
+    try:
+        for i, path in enumerate(paths, 1):
+            started = time.time()
+            counts = index.load(iter_pubmed_xml(path), mesh_filter=mesh_filter)
+            print(f"  [{i}/{len(paths)}] {os.path.basename(path)}: {counts['loaded']} loaded, "
+                  f"{counts['skipped']} skipped, {counts['deleted']} deleted "
+                  f"({time.time() - started:.0f}s)")
+        index.optimize()
+    except Exception as e:
+        print(f"\n✗ Error: {e}")
+        return 1
+
+    print(f"\n✓ Index has {len(index)} articles: {index.path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+"""
+Live ingest: stream new posts through extraction and evidence checking
+
+Instead of waiting for the next daily batch, this long-running process
+follows the watchlist's new submissions as they are posted. A producer
+thread reads ``subreddit.stream.submissions()`` into a bounded queue; the
+main loop takes posts off it in small batches, extracts their claims,
+checks them against PubMed and appends the results to the evidence store,
+where the dashboard picks them up.
+
+Usage:
+    python src/stream_ingest.py --subreddits longevity,Biohacking
+"""
+import argparse
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Tuple
+import pandas as pd
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.checkpoint import ChunkedParquetWriter
+from src.utils.evidence import check_claims
+from src.utils.llm import extract_claims_many
+from src.utils.reddit import get_reddit_client, post_to_row
+from src.utils.state import (
+    PipelineState, STREAMED_POSTS, EXTRACTED_POSTS, EVALUATED_CLAIMS, claim_hash,
+)
+from src.utils.store import EvidenceStore
+
+# Posts waiting for processing; the stream blocks when this many are queued
+QUEUE_SIZE = 200
+
+# Posts processed together, and how long to wait for a batch to fill
+BATCH_SIZE = 10
+BATCH_WAIT = 30
+
+# Seconds to wait before reconnecting after a stream error
+RECONNECT_DELAY = 30
+
+# Seconds between polls while no new posts arrive; doubles up to the maximum
+IDLE_POLL_MIN = 1
+IDLE_POLL_MAX = 30
+
+
+def parse_args(argv=None):
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Stream new Reddit posts through the pipeline")
+    parser.add_argument("--subreddits", default=os.getenv("SUBREDDITS", "longevity"),
+                        help="Comma-separated subreddits to follow (default: SUBREDDITS or longevity)")
+    parser.add_argument("--backfill", action="store_true",
+                        help="Also process the ~100 most recent posts the stream starts with")
+    return parser.parse_args(argv)
+
+
+def stream_posts(subreddits: List[str], posts: "queue.Queue[Tuple[str, Dict]]",
+                 stop: threading.Event, skip_existing: bool = True) -> None:
+    """Producer: put (subreddit, post row) pairs from the live stream on ``posts``."""
+    while not stop.is_set():
+        try:
+            reddit = get_reddit_client()
+            stream = reddit.subreddit("+".join(subreddits)).stream.submissions(
+                skip_existing=skip_existing, pause_after=0
+            )
+            idle = IDLE_POLL_MIN
+            for post in stream:
+                if stop.is_set():
+                    return
+                if post is None:
+                    # No new posts yet. With pause_after=0 PRAW yields None
+                    # after every empty poll without sleeping, so back off
+                    # here; waiting on ``stop`` keeps shutdown prompt
+                    stop.wait(idle)
+                    idle = min(idle * 2, IDLE_POLL_MAX)
+                    continue
+                idle = IDLE_POLL_MIN
+                subreddit = str(vars(post).get("subreddit", ""))
+                # Blocks while the consumer is behind, so memory stays bounded
+                posts.put((subreddit, post_to_row(post)))
+        except Exception as e:
+            print(f"⚠ Stream error: {e}; reconnecting in {RECONNECT_DELAY}s")
+            stop.wait(RECONNECT_DELAY)
+        # Anything missed while disconnected is older than the stream's start point
+        skip_existing = False
+
+
+def next_batch(posts: "queue.Queue[Tuple[str, Dict]]") -> List[Tuple[str, Dict]]:
+    """Wait for one post, then gather more for up to BATCH_WAIT seconds."""
+    batch = [posts.get()]
+    deadline = time.monotonic() + BATCH_WAIT
+    while len(batch) < BATCH_SIZE:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            batch.append(posts.get(timeout=remaining))
+        except queue.Empty:
+            break
+    return batch
+
+
+def process_batch(batch: List[Tuple[str, Dict]], state: PipelineState, store: EvidenceStore) -> int:
+    """Run one batch of posts through collection, extraction and evidence stages."""
+    timestamp = datetime.now().strftime("%Y-%m-%d")
+    new_ids = set(state.filter_new(STREAMED_POSTS, [row["id"] for _, row in batch]))
+    batch = [(sub, row) for sub, row in batch if row["id"] in new_ids]
+    if not batch:
+        return 0
+
+    # Stage 1: save the posts where 01_collect.py does. They are recorded
+    # under the stream's own state, not COLLECTED_POSTS or 01_collect.py's
+    # high-water marks: the stream starts at "now" and misses posts while
+    # reconnecting, so it says nothing about what the daily run has
+    raw_dir = os.getenv("DATA_DIR", "data/raw")
+    os.makedirs(raw_dir, exist_ok=True)
+    posts_file = os.path.join(raw_dir, f"posts_{timestamp}.csv")
+    posts_df = pd.DataFrame([row for _, row in batch])
+    append = os.path.exists(posts_file)
+    posts_df.to_csv(posts_file, mode="a" if append else "w", header=not append, index=False)
+    state.mark(STREAMED_POSTS, posts_df["id"])
+    for sub, row in batch:
+        state.set_high_water(f"stream_created_utc:{sub.lower()}",
+                             pd.Timestamp(row["created_utc"]).timestamp())
+
+    # Stage 2: extract claims (posts the batch pipeline already did are skipped)
+    unextracted = set(state.filter_new(EXTRACTED_POSTS, [row["id"] for _, row in batch]))
+    rows = [row for _, row in batch if row["id"] in unextracted]
+    claims = []
+    extracted = []
+    for row, post_claims in zip(rows, extract_claims_many(
+            [(row["title"], row["selftext"]) for row in rows])):
+        if post_claims is None:
+            # Left unmarked so the next 02_extract_claims.py run retries it
+            print(f"⚠ Extraction failed for post {row['id']}; will retry in the next batch run")
+            continue
+        extracted.append(row["id"])
+        for claim in post_claims:
+            claim.update({
+                "claim_id": claim_hash(row["id"], claim.get("claim", "")),
+                "post_id": row["id"],
+                "created_utc": row["created_utc"],
+                "post_score": row["score"],
+                "post_comments": row["num_comments"],
+            })
+            claims.append(claim)
+    claims_dir = os.getenv("INTERIM_DIR", "data/interim")
+    with ChunkedParquetWriter(os.path.join(claims_dir, f"claims_{timestamp}.parquet")) as writer:
+        writer.write_many(claims)
+    state.mark(EXTRACTED_POSTS, extracted)
+
+    # Stage 3: check evidence and publish to the store
+    if claims:
+        results = list(check_claims(claims))
+        store.append(pd.DataFrame(results), date=timestamp)
+        state.mark(EVALUATED_CLAIMS, [
+            r["claim_id"] for r in results if r.get("evidence_level") != "error"
+        ])
+    return len(claims)
+
+
+def main(argv=None):
+    """Run the streaming ingest loop until interrupted."""
+    args = parse_args(argv)
+    subreddits = [s.strip() for s in args.subreddits.split(",") if s.strip()]
+
+    print("=" * 60)
+    print("Live Ingest - " + ", ".join(f"r/{s}" for s in subreddits))
+    print("=" * 60)
+
+    state = PipelineState()
+    store = EvidenceStore()
+    posts: "queue.Queue[Tuple[str, Dict]]" = queue.Queue(maxsize=QUEUE_SIZE)
+    stop = threading.Event()
+    producer = threading.Thread(
+        target=stream_posts, args=(subreddits, posts, stop, not args.backfill),
+        name="reddit-stream", daemon=True,
+    )
+    producer.start()
+    print("Waiting for new posts (Ctrl+C to stop)...\n")
+
+    try:
+        while True:
+            batch = next_batch(posts)
+            started = time.time()
+            try:
+                claim_count = process_batch(batch, state, store)
+            except Exception as e:
+                # Unmarked posts are picked up again by the batch pipeline
+                print(f"✗ Error processing batch: {e}")
+                continue
+            print(f"✓ {len(batch)} posts -> {claim_count} claims in {time.time() - started:.0f}s "
+                  f"({posts.qsize()} queued)")
+    except KeyboardInterrupt:
+        print("\nStopping...")
+    finally:
+        stop.set()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
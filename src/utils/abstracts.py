@@ -0,0 +1,68 @@
+"""Compressed on-disk store of PubMed abstracts, one entry per PMID."""
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, Iterable, Optional
+
+
+class AbstractStore:
+    """
+    PubMed abstracts kept in SQLite, zlib-compressed, keyed by PMID.
+
+    Abstracts do not change once published, so entries never expire: each
+    PMID is fetched once and then shared by every claim (and every run)
+    that cites it. Articles without an abstract are stored as empty strings
+    so they are not requested again.
+
+    Args:
+        path: SQLite file (default: PUBMED_ABSTRACTS_PATH or data/cache/abstracts.sqlite)
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv("PUBMED_ABSTRACTS_PATH", "data/cache/abstracts.sqlite")
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS abstracts (
+                pmid INTEGER PRIMARY KEY,
+                data BLOB NOT NULL,
+                fetched_at REAL NOT NULL
+            )"""
+        )
+        self._conn.commit()
+
+    def get_many(self, pmids: Iterable[str]) -> Dict[str, str]:
+        """Return the stored abstracts for ``pmids`` (missing PMIDs are left out)."""
+        ids = list(dict.fromkeys(int(p) for p in pmids if str(p).isdigit()))
+        found = {}
+        with self._lock:
+            for start in range(0, len(ids), 500):
+                batch = ids[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                for pmid, data in self._conn.execute(
+                    f"SELECT pmid, data FROM abstracts WHERE pmid IN ({placeholders})", batch
+                ):
+                    found[str(pmid)] = zlib.decompress(data).decode("utf-8")
+        return found
+
+    def put_many(self, abstracts: Dict[str, str]) -> None:
+        """Store abstracts by PMID, replacing existing entries."""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO abstracts (pmid, data, fetched_at) VALUES (?, ?, ?)",
+                [
+                    (int(pmid), zlib.compress(text.encode("utf-8"), 6), now)
+                    for pmid, text in abstracts.items()
+                ],
+            )
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM abstracts").fetchone()[0]
@@ -0,0 +1,171 @@
+"""Persistent on-disk cache backed by SQLite."""
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+class SQLiteCache:
+    """
+    Key/value cache stored in a single SQLite file.
+
+    Values are stored as JSON. Entries older than ``ttl`` seconds are treated
+    as missing, and once more than ``max_entries`` rows or ``max_bytes`` of
+    values are stored the least recently used ones are evicted.
+
+    Args:
+        path: Location of the SQLite database file
+        namespace: Table name, so several caches can share one file
+        ttl: Seconds an entry stays valid (None = never expires)
+        max_entries: Maximum number of entries kept (None = unbounded)
+        max_bytes: Maximum total size of stored values (None = unbounded)
+    """
+
+    def __init__(
+        self,
+        path: str,
+        namespace: str = "cache",
+        ttl: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+    ):
+        self.path = path
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"""CREATE TABLE IF NOT EXISTS {namespace} (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )"""
+        )
+        columns = [row[1] for row in self._conn.execute(f"PRAGMA table_info({namespace})")]
+        if "size" not in columns:
+            self._conn.execute(
+                f"ALTER TABLE {namespace} ADD COLUMN size INTEGER NOT NULL DEFAULT 0"
+            )
+        self._conn.execute(
+            f"CREATE INDEX IF NOT EXISTS {namespace}_accessed ON {namespace} (accessed_at)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for ``key``, or None if missing or expired."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, created_at FROM {self.namespace} WHERE key = ?",
+                (key,),
+            ).fetchone()
+
+            if row is None or (self.ttl is not None and now - row[1] > self.ttl):
+                if row is not None:
+                    self._conn.execute(f"DELETE FROM {self.namespace} WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+                return None
+
+            self._conn.execute(
+                f"UPDATE {self.namespace} SET accessed_at = ? WHERE key = ?",
+                (now, key),
+            )
+            self._conn.commit()
+            self.hits += 1
+            return json.loads(row[0])
+
+    def set(self, key: str, value: Any) -> None:
+        """Store ``value`` under ``key`` and evict old entries if over capacity."""
+        now = time.time()
+        data = json.dumps(value)
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.namespace} "
+                "(key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, data, len(data), now, now),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def clear(self) -> None:
+        """Remove every entry from the cache."""
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.namespace}")
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {self.namespace}").fetchone()[0]
+
+    def delete(self, key: str) -> None:
+        """Remove a single entry."""
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.namespace} WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def size_bytes(self) -> int:
+        """Total size of the stored values."""
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT COALESCE(SUM(size), 0) FROM {self.namespace}"
+            ).fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current size."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self),
+            "bytes": self.size_bytes(),
+        }
+
+    def _evict(self) -> None:
+        """Drop expired entries and the least recently used ones above the size cap."""
+        if self.ttl is not None:
+            self._conn.execute(
+                f"DELETE FROM {self.namespace} WHERE created_at < ?",
+                (time.time() - self.ttl,),
+            )
+        if self.max_entries is not None:
+            count = self._conn.execute(f"SELECT COUNT(*) FROM {self.namespace}").fetchone()[0]
+            excess = count - self.max_entries
+            if excess > 0:
+                self._conn.execute(
+                    f"""DELETE FROM {self.namespace} WHERE key IN (
+                        SELECT key FROM {self.namespace} ORDER BY accessed_at ASC LIMIT ?
+                    )""",
+                    (excess,),
+                )
+        if self.max_bytes is not None:
+            total = self._conn.execute(
+                f"SELECT COALESCE(SUM(size), 0) FROM {self.namespace}"
+            ).fetchone()[0]
+            if total > self.max_bytes:
+                # Walk entries from least to most recently used until enough is freed
+                freed = 0
+                cutoff = None
+                for accessed_at, size in self._conn.execute(
+                    f"SELECT accessed_at, size FROM {self.namespace} ORDER BY accessed_at ASC"
+                ):
+                    freed += size
+                    cutoff = accessed_at
+                    if total - freed <= self.max_bytes:
+                        break
+                self._conn.execute(
+                    f"DELETE FROM {self.namespace} WHERE accessed_at <= ?", (cutoff,)
+                )
@@ -0,0 +1,118 @@
+"""Append-only parquet datasets for streaming, restartable pipeline runs."""
+import glob
+import os
+import re
+import time
+import uuid
+from typing import Dict, List, Optional, Sequence, Set
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+# Part names written before parts were time-stamped
+_LEGACY_PART = re.compile(r"^part-\d{5}\.parquet$")
+
+
+class ChunkedParquetWriter:
+    """
+    Stream rows into a parquet dataset directory, one part file per chunk.
+
+    Each flush writes ``part-<time_ns>-<random>.parquet`` atomically (temp
+    file + rename), so a crash never leaves a half-written part behind and
+    everything flushed before it survives. Opening an existing directory
+    appends new parts; names are unique, so several writers (e.g. the daily
+    extraction and the live ingest daemon) can append to the same dataset.
+
+    Args:
+        path: Dataset directory (e.g. data/interim/claims_2024-01-01.parquet)
+        chunk_size: Rows buffered before a part is written automatically
+    """
+
+    def __init__(self, path: str, chunk_size: int = 100):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.rows_written = 0
+        self._buffer: List[Dict] = []
+
+        if os.path.isfile(path):
+            # Single-file output from an older run: turn it into the first part
+            legacy = path + ".legacy"
+            os.replace(path, legacy)
+            os.makedirs(path)
+            os.replace(legacy, os.path.join(path, "part-00000.parquet"))
+        os.makedirs(path, exist_ok=True)
+
+    def write(self, row: Dict) -> None:
+        """Buffer one row, flushing a part once ``chunk_size`` rows are pending."""
+        self._buffer.append(row)
+        if len(self._buffer) >= self.chunk_size:
+            self.flush()
+
+    def write_many(self, rows: Sequence[Dict]) -> None:
+        """Buffer several rows."""
+        for row in rows:
+            self.write(row)
+
+    def flush(self) -> int:
+        """Write buffered rows as a new part. Returns the number of rows written."""
+        if not self._buffer:
+            return 0
+        df = pd.DataFrame(self._buffer)
+        name = f"part-{time.time_ns():020d}-{uuid.uuid4().hex[:8]}.parquet"
+        part = os.path.join(self.path, name)
+        tmp = os.path.join(self.path, f".{name}.tmp")
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, part)
+
+        count = len(self._buffer)
+        self.rows_written += count
+        self._buffer = []
+        return count
+
+    def close(self) -> None:
+        """Flush any remaining rows."""
+        self.flush()
+
+    def __enter__(self) -> "ChunkedParquetWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def list_parts(path: str) -> List[str]:
+    """
+    Return the part files of a dataset directory (or the file itself), in write order.
+
+    Parts numbered by older versions (``part-NNNNN.parquet``) come first;
+    time-stamped names then sort by write time.
+    """
+    if os.path.isfile(path):
+        return [path]
+    return sorted(
+        glob.glob(os.path.join(path, "part-*.parquet")),
+        key=lambda p: (_LEGACY_PART.match(os.path.basename(p)) is None, os.path.basename(p)),
+    )
+
+
+def read_dataset(path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Read a dataset directory or single parquet file into one frame.
+
+    Parts are read one by one and concatenated, so chunks whose inferred
+    column types differ (e.g. an all-null column) still combine cleanly.
+    """
+    frames = []
+    for part in list_parts(path):
+        if columns is None:
+            frames.append(pd.read_parquet(part))
+        else:
+            available = _part_columns(part)
+            frames.append(pd.read_parquet(part, columns=[c for c in columns if c in available]))
+    if not frames:
+        return pd.DataFrame(columns=columns or [])
+    return pd.concat(frames, ignore_index=True)
+
+
+def _part_columns(part: str) -> Set[str]:
+    return set(pq.read_schema(part).names)
@@ -0,0 +1,393 @@
+"""Precomputed aggregates and cached filtered views for the dashboard."""
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.utils.search_index import EvidenceSearchIndex
+from src.utils.store import EvidenceStore
+
+# Low-cardinality columns stored as pandas categoricals
+CATEGORICAL_COLUMNS = ["topic", "evidence_level", "type"]
+
+# Evidence levels counted as "strong" in the metrics
+STRONG_LEVEL = "strong_support"
+
+# Filter combinations whose row positions are kept in memory
+VIEW_CACHE_SIZE = 128
+
+# Search matches ordered by relevance; any further matches follow in score order
+RANKED_RESULTS = 500
+
+# Rows per page of the claim list
+PAGE_SIZE = 25
+
+# Keyset cursor: (post_score, claim_id) of the last row on the previous page
+Cursor = Tuple[float, str]
+
+
+class EvidenceIndex:
+    """
+    One dataset version of the evidence, prepared for interactive filtering.
+
+    Built once per dataset version: rows are sorted by Reddit score (then
+    claim_id, so the order is total), the low-cardinality columns become
+    categoricals, and the topic x
+    evidence_level counts and score sums are precomputed. Filters compare
+    category codes instead of strings, and the row positions of each filter
+    combination are cached, so repeated interactions only slice.
+
+    Searches go to the store's full-text index when one is given (ranked,
+    with phrase and prefix queries); otherwise claim and explanation text is
+    lowercased once into an arrow-backed column and scanned for the input.
+
+    ``page()`` serves the filtered rows a page at a time with keyset
+    cursors, so only the rows in view leave the server.
+
+    Args:
+        df: Evidence rows (at least "claim", "topic" and "evidence_level")
+        search_index: Full-text index of the rows' claim_ids; searches fall
+            back to the text scan unless it covers every row
+    """
+
+    def __init__(self, df: pd.DataFrame, search_index: Optional[EvidenceSearchIndex] = None):
+        if "claim_id" not in df.columns:
+            df = df.assign(claim_id=[f"row-{i}" for i in range(len(df))])
+        # The sort key, derived once: rows are ordered by exactly the values
+        # that cursors are later binary-searched in. Missing scores (manual
+        # posts) count as 0; negative (comment) scores sort below them.
+        scores = (
+            pd.to_numeric(df["post_score"], errors="coerce").fillna(0).to_numpy(dtype=np.float64)
+            if "post_score" in df.columns else np.zeros(len(df))
+        )
+        claim_ids = df["claim_id"].astype(str).to_numpy(dtype=object)
+        order = pd.DataFrame({"neg_score": -scores, "claim_id": claim_ids}).sort_values(
+            ["neg_score", "claim_id"], kind="stable"
+        ).index.to_numpy()
+        df = df.iloc[order].reset_index(drop=True)
+        for col in CATEGORICAL_COLUMNS:
+            if col in df.columns:
+                df[col] = df[col].astype("category")
+        self.df = df
+
+        self.topics = list(df["topic"].cat.categories)
+        self.levels = list(df["evidence_level"].cat.categories)
+        self._topic_codes = df["topic"].cat.codes.to_numpy()
+        self._level_codes = df["evidence_level"].cat.codes.to_numpy()
+        self._scores = scores[order] if "post_score" in df.columns else None
+        # Sort key as two ascending arrays, for binary-searching cursors
+        self._neg_scores = -scores[order]
+        self._claim_ids = claim_ids[order]
+        self._search_index = None
+        row_ids = None
+        if search_index is not None and df["claim_id"].is_unique:
+            row_ids = search_index.row_ids(self._claim_ids)
+        if row_ids is not None and (row_ids >= 0).all():
+            self._search_index = search_index
+            # Index row ID -> row position, so search results map back with one lookup
+            self._position_by_row = np.full(int(row_ids.max(initial=-1)) + 1, -1, dtype=np.int64)
+            self._position_by_row[row_ids] = np.arange(len(row_ids))
+        else:
+            # No index, or one missing some rows (whose matches would be lost)
+            text = df["claim"].fillna("").astype(str)
+            if "explanation" in df.columns:
+                text = text + "\n" + df["explanation"].fillna("").astype(str)
+            self._search_text = text.str.lower().astype("string[pyarrow]")
+
+        self._all_counts, self._all_score_sums = self._crosstab(None)
+        self._views: "OrderedDict[Tuple, Tuple[np.ndarray, int]]" = OrderedDict()
+        self._summaries: "OrderedDict[Tuple, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    def _crosstab(self, positions: Optional[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Claim counts and score sums per (topic, evidence_level) for the given rows.
+
+        Rows with a missing topic or level are counted in an extra last
+        row/column, so totals still include them.
+        """
+        topics = self._topic_codes if positions is None else self._topic_codes[positions]
+        levels = self._level_codes if positions is None else self._level_codes[positions]
+        n_topics, n_levels = len(self.topics) + 1, len(self.levels) + 1
+        topics = np.where(topics < 0, n_topics - 1, topics).astype(np.int64)
+        levels = np.where(levels < 0, n_levels - 1, levels)
+        cells = topics * n_levels + levels
+        shape = (n_topics, n_levels)
+        counts = np.bincount(cells, minlength=n_topics * n_levels).reshape(shape)
+        if self._scores is None:
+            return counts, np.zeros(shape)
+        scores = self._scores if positions is None else self._scores[positions]
+        sums = np.bincount(cells, weights=scores, minlength=n_topics * n_levels).reshape(shape)
+        return counts, sums
+
+    def positions(
+        self,
+        topic: Optional[str] = None,
+        evidence_level: Optional[str] = None,
+        search: str = "",
+    ) -> np.ndarray:
+        """
+        Row positions matching the filters, cached per filter tuple.
+
+        Ordered by Reddit score. Searches answered by the full-text index
+        list the RANKED_RESULTS most relevant matches first.
+        """
+        return self._ordered(topic, evidence_level, search)[0]
+
+    def _ordered(
+        self, topic: Optional[str], evidence_level: Optional[str], search: str
+    ) -> Tuple[np.ndarray, int]:
+        """Matching positions plus how many leading ones are in relevance order."""
+        key = (topic, evidence_level, search.strip())
+        with self._lock:
+            cached = self._views.get(key)
+            if cached is not None:
+                self._views.move_to_end(key)
+                return cached
+
+        mask = np.ones(len(self.df), dtype=bool)
+        for value, categories, codes in (
+            (topic, self.topics, self._topic_codes),
+            (evidence_level, self.levels, self._level_codes),
+        ):
+            if value is not None:
+                code = _code(categories, value)
+                mask &= (codes == code) if code >= 0 else False
+        n_ranked = 0
+        if key[2] and self._search_index is not None:
+            row_ids = self._search_index.search(key[2], limit=RANKED_RESULTS)
+            ranked = self._row_positions(row_ids)
+            ranked = ranked[mask[ranked]]
+            result, n_ranked = ranked, len(ranked)
+            if len(row_ids) == RANKED_RESULTS:
+                rest = self._row_positions(self._search_index.search(key[2], ranked=False))
+                rest = np.setdiff1d(rest[mask[rest]], ranked)
+                result = np.concatenate([ranked, rest])
+        elif key[2]:
+            # Narrow the text scan to the rows the category filters left
+            candidates = np.flatnonzero(mask)
+            found = self._search_text.iloc[candidates].str.contains(key[2].lower(), regex=False)
+            mask = np.zeros(len(self.df), dtype=bool)
+            mask[candidates[found.fillna(False).to_numpy(dtype=bool)]] = True
+            result = np.flatnonzero(mask)
+        else:
+            result = np.flatnonzero(mask)
+
+        with self._lock:
+            _remember(self._views, key, (result, n_ranked))
+        return result, n_ranked
+
+    def page(
+        self,
+        topic: Optional[str] = None,
+        evidence_level: Optional[str] = None,
+        search: str = "",
+        after: Optional[Cursor] = None,
+        size: int = PAGE_SIZE,
+    ) -> Tuple[pd.DataFrame, Optional[Cursor]]:
+        """
+        One page of the filtered rows, continuing after a keyset cursor.
+
+        The cursor is the (post_score, claim_id) of the previous page's last
+        row, so a page starts in the same place even after new claims are
+        added, and seeking is a binary search rather than an offset scan.
+
+        Returns:
+            The page's rows and the cursor for the next page (None on the last page)
+        """
+        positions, n_ranked = self._ordered(topic, evidence_level, search)
+        start = self._seek(positions, n_ranked, after)
+        rows = positions[start:start + size]
+        if len(rows) == 0 or start + size >= len(positions):
+            return self.df.iloc[rows], None
+        last = rows[-1]
+        return self.df.iloc[rows], (float(-self._neg_scores[last]), self._claim_ids[last])
+
+    def _seek(self, positions: np.ndarray, n_ranked: int, after: Optional[Cursor]) -> int:
+        """Index in ``positions`` of the first row after the cursor."""
+        if after is None:
+            return 0
+        score, claim_id = after
+        # First row of the whole (score desc, claim_id) order that sorts after the cursor
+        lo = np.searchsorted(self._neg_scores, -score, side="left")
+        hi = np.searchsorted(self._neg_scores, -score, side="right")
+        boundary = lo + np.searchsorted(self._claim_ids[lo:hi], claim_id, side="right")
+        if n_ranked and boundary > 0:
+            # Relevance-ordered prefix: the cursor row is one of its entries
+            in_ranked = np.flatnonzero(positions[:n_ranked] == boundary - 1)
+            if len(in_ranked) and self._claim_ids[boundary - 1] == claim_id:
+                return int(in_ranked[0]) + 1
+        # The rest is in ascending position order, i.e. in sort-key order
+        return n_ranked + int(np.searchsorted(positions[n_ranked:], boundary))
+
+    def _row_positions(self, row_ids: np.ndarray) -> np.ndarray:
+        """Row positions of search-index row IDs, dropping claims not loaded in this version."""
+        row_ids = row_ids[row_ids < len(self._position_by_row)]
+        found = self._position_by_row[row_ids]
+        return found[found >= 0]
+
+    def view(
+        self,
+        topic: Optional[str] = None,
+        evidence_level: Optional[str] = None,
+        search: str = "",
+        limit: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """Rows matching the filters in ``positions`` order (the first ``limit`` only)."""
+        return self.df.iloc[self.positions(topic, evidence_level, search)[:limit]]
+
+    def top_by_level(
+        self,
+        levels: Sequence[str],
+        limit: int,
+        topic: Optional[str] = None,
+        evidence_level: Optional[str] = None,
+        search: str = "",
+    ) -> pd.DataFrame:
+        """First filtered rows (in ``positions`` order) whose evidence level is in ``levels``."""
+        positions = self.positions(topic, evidence_level, search)
+        codes = [c for c in (_code(self.levels, level) for level in levels) if c >= 0]
+        matching = positions[np.isin(self._level_codes[positions], codes)]
+        return self.df.iloc[matching[:limit]]
+
+    def summary(
+        self,
+        topic: Optional[str] = None,
+        evidence_level: Optional[str] = None,
+        search: str = "",
+    ) -> Dict:
+        """
+        Metrics and chart data for a filter combination.
+
+        Without a search term this only slices the precomputed crosstab;
+        with one, the crosstab is recounted over the matching rows.
+
+        Returns:
+            Dictionary with "total", "topics", "strong", "score",
+            "evidence_counts" and "topic_counts" (Series, largest first)
+        """
+        key = (topic, evidence_level, search.strip())
+        with self._lock:
+            cached = self._summaries.get(key)
+            if cached is not None:
+                self._summaries.move_to_end(key)
+                return cached
+
+        if key[2]:
+            counts, sums = self._crosstab(self.positions(topic, evidence_level, search))
+        else:
+            counts, sums = self._all_counts, self._all_score_sums
+            topic_mask = np.ones(counts.shape[0], dtype=bool)
+            level_mask = np.ones(counts.shape[1], dtype=bool)
+            if topic is not None:
+                topic_mask = np.arange(counts.shape[0]) == _code(self.topics, topic)
+            if evidence_level is not None:
+                level_mask = np.arange(counts.shape[1]) == _code(self.levels, evidence_level)
+            counts = counts * topic_mask[:, None] * level_mask[None, :]
+            sums = sums * topic_mask[:, None] * level_mask[None, :]
+
+        by_topic = counts.sum(axis=1)
+        by_level = counts.sum(axis=0)
+        strong = _code(self.levels, STRONG_LEVEL)
+        result = {
+            "total": int(counts.sum()),
+            "topics": int((by_topic[:-1] > 0).sum()),
+            "strong": int(by_level[strong]) if strong >= 0 else 0,
+            "score": int(sums.sum()),
+            "evidence_counts": _nonzero_series(by_level[:-1], self.levels, "evidence_level"),
+            "topic_counts": _nonzero_series(by_topic[:-1], self.topics, "topic"),
+        }
+        with self._lock:
+            _remember(self._summaries, key, result)
+        return result
+
+
+class EvidenceLoader:
+    """
+    The store's newest row per claim, kept in memory and refreshed from its manifest.
+
+    A refresh reads only the fragments the manifest lists as new. A
+    partition that lost fragments (compaction) is re-read as a whole, and a
+    partition that disappeared (a dropped run) triggers a full reload.
+
+    Args:
+        store: Evidence store to follow
+        columns: Columns to load
+    """
+
+    def __init__(self, store: EvidenceStore, columns: Sequence[str]):
+        self.store = store
+        self.columns = list(columns)
+        self.version: Optional[int] = None
+        self.last_read = 0
+        self._content_hash: Optional[str] = None
+        self._fragments: Dict[str, int] = {}
+        self._rows: Optional[pd.DataFrame] = None
+        self._lock = threading.Lock()
+
+    def refresh(self, manifest: Optional[Dict] = None) -> pd.DataFrame:
+        """Bring the rows up to date with the manifest and return them."""
+        with self._lock:
+            manifest = manifest or self.store.manifest()
+            if self._rows is None or manifest["content_hash"] != self._content_hash:
+                try:
+                    self._apply(manifest)
+                except FileNotFoundError:
+                    # A fragment was compacted away after the manifest was read
+                    self._rows = None
+                    self._apply(self.store.manifest())
+            return self._rows[[c for c in self.columns if c in self._rows.columns]]
+
+    def _apply(self, manifest: Dict) -> None:
+        fragments = manifest["fragments"]
+        partitions = {os.path.dirname(f) for f in fragments}
+        removed = [f for f in self._fragments if f not in fragments]
+        if self._rows is None or any(os.path.dirname(f) not in partitions for f in removed):
+            keep, read = None, list(fragments)
+        else:
+            reload = {os.path.dirname(f) for f in removed}
+            keep = self._rows
+            if reload:
+                keep = keep[~keep["fragment"].map(os.path.dirname).isin(reload)]
+            read = [
+                f for f in fragments if f not in self._fragments or os.path.dirname(f) in reload
+            ]
+
+        rows = self.store.read_fragments(read, self.columns)
+        if keep is not None:
+            rows = pd.concat([keep, rows], ignore_index=True)
+        if "claim_id" in rows.columns:
+            rows = rows.sort_values(["date", "fragment"], kind="stable")
+            rows = rows.drop_duplicates("claim_id", keep="last")
+        self._rows = rows.reset_index(drop=True)
+        self._fragments = dict(fragments)
+        self.version = manifest["version"]
+        self._content_hash = manifest["content_hash"]
+        self.last_read = len(read)
+
+
+def _code(categories: list, value: str) -> int:
+    """Category code of ``value`` (-1 if absent, which matches no rows)."""
+    try:
+        return categories.index(value)
+    except ValueError:
+        return -1
+
+
+def _remember(cache: OrderedDict, key: Tuple, value) -> None:
+    """Insert into an LRU dict, evicting the oldest entries past VIEW_CACHE_SIZE."""
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > VIEW_CACHE_SIZE:
+        cache.popitem(last=False)
+
+
+def _nonzero_series(values: np.ndarray, labels: list, name: str) -> pd.Series:
+    series = pd.Series(values, index=pd.Index(labels, name=name), name="count")
+    return series[series > 0].sort_values(ascending=False, kind="stable")
@@ -0,0 +1,252 @@
+"""Near-duplicate detection for posts and claims (MinHash/LSH and TF-IDF similarity)."""
+import math
+import re
+import zlib
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+# 128 hash functions split into 16 bands of 8 rows: pairs with Jaccard
+# similarity around 0.7 or more are likely to share at least one band
+NUM_PERM = 128
+BANDS = 16
+
+# Estimated Jaccard similarity at which two posts count as duplicates
+THRESHOLD = 0.8
+
+# Words per shingle
+SHINGLE_SIZE = 3
+
+# Cosine similarity of TF-IDF vectors at which two claims count as the same claim
+CLAIM_THRESHOLD = 0.8
+
+# Claims per topic above which candidates come from the LSH index instead of
+# comparing every pair
+CLAIM_ANN_MIN = 2000
+
+# Narrower bands for the claim index: short texts need a lower collision threshold
+CLAIM_BANDS = 32
+
+_STOPWORDS = frozenset(
+    "a an and are as at be by can for from has have i in is it its my of on or "
+    "that the this to was were will with".split()
+)
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_URL = re.compile(r"https?://\S+")
+_NON_WORD = re.compile(r"[^a-z0-9+]+")
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, drop URLs and punctuation, and collapse whitespace."""
+    text = _URL.sub(" ", str(text or "").lower())
+    return " ".join(_NON_WORD.sub(" ", text).split())
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> List[str]:
+    """Overlapping word n-grams of normalized text (the whole text if shorter)."""
+    words = normalize_text(text).split()
+    if len(words) <= size:
+        return [" ".join(words)] if words else []
+    return [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+
+
+class MinHasher:
+    """
+    MinHash signatures over shingle sets.
+
+    Uses ``num_perm`` universal hash functions of the form (a*x + b) mod p
+    applied to 32-bit shingle hashes, vectorized with numpy.
+
+    Args:
+        num_perm: Signature length
+        seed: Seed for the hash-function parameters
+    """
+
+    def __init__(self, num_perm: int = NUM_PERM, seed: int = 1):
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self._a = rng.randint(1, 1 << 61, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, 1 << 61, size=num_perm, dtype=np.uint64)
+
+    def signature(self, tokens: Sequence[str]) -> np.ndarray:
+        """MinHash signature of a set of tokens (all max values if empty)."""
+        if not tokens:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        hashes = np.fromiter(
+            (zlib.crc32(t.encode("utf-8")) for t in set(tokens)), dtype=np.uint64
+        )
+        with np.errstate(over="ignore"):
+            permuted = (np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=0)
+
+
+class _UnionFind:
+    """Disjoint sets over 0..n-1 with path halving."""
+
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+
+    def find(self, i: int) -> int:
+        parent = self.parent
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(self, a: int, b: int) -> None:
+        a, b = self.find(a), self.find(b)
+        if a != b:
+            self.parent[b] = a
+
+    def representatives(self, score: Sequence) -> List[int]:
+        """For each item, the member of its set with the highest ``score`` (first on ties)."""
+        best: Dict[int, int] = {}
+        for i in range(len(self.parent)):
+            root = self.find(i)
+            if root not in best or score[i] > score[best[root]]:
+                best[root] = i
+        return [best[self.find(i)] for i in range(len(self.parent))]
+
+
+def cluster_near_duplicates(
+    texts: Sequence[str],
+    threshold: float = THRESHOLD,
+    num_perm: int = NUM_PERM,
+    bands: int = BANDS,
+) -> List[int]:
+    """
+    Group near-duplicate texts and pick one representative per group.
+
+    Signatures are bucketed band by band, so only texts that collide in some
+    band are compared (sub-quadratic in practice). Candidate pairs whose
+    estimated Jaccard similarity reaches ``threshold`` are merged, and the
+    longest text in each group becomes its representative.
+
+    Args:
+        texts: Texts to cluster (e.g. title + selftext per post)
+        threshold: Minimum estimated Jaccard similarity for a duplicate
+        num_perm: MinHash signature length
+        bands: LSH bands (num_perm must be divisible by bands)
+
+    Returns:
+        For each text, the index of its group's representative (itself if unique)
+    """
+    rows = num_perm // bands
+    hasher = MinHasher(num_perm)
+    token_sets = [shingles(t) for t in texts]
+    signatures = np.stack([hasher.signature(s) for s in token_sets]) if texts else None
+
+    groups = _UnionFind(len(texts))
+    for first, other in _lsh_candidates(token_sets, signatures, bands, rows):
+        if groups.find(first) == groups.find(other):
+            continue
+        if float(np.mean(signatures[first] == signatures[other])) >= threshold:
+            groups.union(first, other)
+
+    return groups.representatives([len(normalize_text(t)) for t in texts])
+
+
+def _lsh_candidates(token_sets, signatures, bands: int, rows: int):
+    """Yield index pairs whose signatures collide in at least one band."""
+    for band in range(bands):
+        buckets: Dict[bytes, List[int]] = defaultdict(list)
+        for i, tokens in enumerate(token_sets):
+            if tokens:
+                buckets[signatures[i, band * rows:(band + 1) * rows].tobytes()].append(i)
+        for members in buckets.values():
+            for other in members[1:]:
+                yield members[0], other
+
+
+def claim_tokens(text: str) -> List[str]:
+    """Normalized content words of a claim with plural/tense endings stripped."""
+    tokens = []
+    for word in normalize_text(text).split():
+        if word in _STOPWORDS:
+            continue
+        for suffix in ("ing", "es", "ed", "s"):
+            if len(word) > len(suffix) + 2 and word.endswith(suffix):
+                word = word[:-len(suffix)]
+                break
+        tokens.append(word)
+    return tokens
+
+
+def _tfidf(docs: List[List[str]]) -> List[Dict[str, float]]:
+    """L2-normalized TF-IDF vectors (as sparse dicts) for tokenized documents."""
+    doc_freq = Counter(t for doc in docs for t in set(doc))
+    n = len(docs)
+    vectors = []
+    for doc in docs:
+        weights = {t: c * (math.log((1 + n) / (1 + doc_freq[t])) + 1) for t, c in Counter(doc).items()}
+        norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+        vectors.append({t: w / norm for t, w in weights.items()})
+    return vectors
+
+
+def _similar_pairs(docs: List[List[str]], threshold: float):
+    """Yield index pairs of documents whose TF-IDF cosine similarity reaches ``threshold``."""
+    vectors = _tfidf(docs)
+    if len(docs) <= CLAIM_ANN_MIN:
+        # Small enough to compare every pair with a dense matrix product
+        vocab = {t: j for j, t in enumerate({t for v in vectors for t in v})}
+        matrix = np.zeros((len(docs), len(vocab)), dtype=np.float32)
+        for i, vector in enumerate(vectors):
+            for t, w in vector.items():
+                matrix[i, vocab[t]] = w
+        for start in range(0, len(docs), 512):
+            sims = matrix[start:start + 512] @ matrix.T
+            for i, j in zip(*np.nonzero(sims >= threshold)):
+                if start + i < j:
+                    yield start + i, int(j)
+        return
+
+    # Large: only score pairs the MinHash/LSH index proposes
+    hasher = MinHasher(NUM_PERM)
+    signatures = np.stack([hasher.signature(d) for d in docs])
+    for i, j in _lsh_candidates(docs, signatures, CLAIM_BANDS, NUM_PERM // CLAIM_BANDS):
+        a, b = vectors[i], vectors[j]
+        if sum(w * b.get(t, 0.0) for t, w in a.items()) >= threshold:
+            yield i, j
+
+
+def cluster_claims(
+    claims: Sequence[str],
+    topics: Optional[Sequence[str]] = None,
+    threshold: float = CLAIM_THRESHOLD,
+) -> List[int]:
+    """
+    Group claims that say the same thing and pick a canonical claim per group.
+
+    Claims are compared only within the same topic. Within a topic, pairs
+    whose TF-IDF cosine similarity reaches ``threshold`` are merged; large
+    topics use the MinHash/LSH index to find candidate pairs instead of
+    comparing all of them. The canonical claim is the group's most common
+    normalized wording, shortest first on ties.
+
+    Args:
+        claims: Claim texts
+        topics: Topic per claim (None = compare all claims with each other)
+        threshold: Minimum cosine similarity for two claims to be merged
+
+    Returns:
+        For each claim, the index of its group's canonical claim (itself if unique)
+    """
+    docs = [claim_tokens(c) for c in claims]
+    blocks: Dict[str, List[int]] = defaultdict(list)
+    for i in range(len(claims)):
+        blocks[normalize_text(topics[i]) if topics is not None else ""].append(i)
+
+    groups = _UnionFind(len(claims))
+    for members in blocks.values():
+        block_docs = [docs[i] for i in members]
+        for a, b in _similar_pairs(block_docs, threshold):
+            groups.union(members[a], members[b])
+
+    wording = Counter(" ".join(d) for d in docs)
+    return groups.representatives([
+        (wording[" ".join(d)], -len(str(c))) for d, c in zip(docs, claims)
+    ])
@@ -0,0 +1,143 @@
+"""Pipelined evidence checking: PubMed lookups and LLM evaluations in parallel."""
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from src.utils.pubmed import (
+    search_pmids, fetch_summaries, attach_abstracts, format_references, build_search_query,
+)
+from src.utils.llm import evaluate_claim, default_concurrency
+
+# Claims searched together before their PubMed summaries are fetched in bulk
+CHUNK_SIZE = 200
+
+
+def _search_safe(query: str) -> Optional[List[str]]:
+    """PMIDs matching the query, or None if the search failed."""
+    try:
+        return search_pmids(query, max_results=5)
+    except Exception as e:
+        print(f"Error searching PubMed: {e}")
+        return None
+
+
+def _error_result(claim: Dict, message: str) -> Dict:
+    return {
+        **claim,
+        "evidence_level": "error",
+        "explanation": message,
+        "num_papers_found": 0,
+        "pmid_list": "",
+    }
+
+
+def _evaluate(claim: Dict, papers: List[Dict]) -> Dict:
+    """Run the LLM evaluation for one claim and build its result row."""
+    try:
+        evaluation = evaluate_claim(
+            claim=claim.get("claim", ""),
+            topic=claim.get("topic", ""),
+            references_text=format_references(papers)
+        )
+        return {
+            **claim,
+            "evidence_level": evaluation.get("evidence_level", "unknown"),
+            "explanation": evaluation.get("explanation", ""),
+            "num_papers_found": len(papers),
+            "pmid_list": ",".join([p["pmid"] for p in papers]),
+        }
+    except Exception as e:
+        return _error_result(claim, str(e))
+
+
+def check_claims(
+    claims: List[Dict],
+    pubmed_workers: int = 4,
+    llm_workers: Optional[int] = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[Dict]:
+    """
+    Check claims against PubMed and the LLM, yielding results in input order.
+
+    Two stages overlap: esearch queries run in a pool throttled by the shared
+    NCBI rate limiter, and as soon as a chunk's summaries and abstracts are
+    fetched its claims are handed to a separate, bounded pool of LLM
+    evaluations. The next chunk is already being searched while the current
+    one is evaluated.
+
+    Args:
+        claims: Claim dictionaries with at least "claim" and "topic"
+        pubmed_workers: Concurrent esearch requests
+        llm_workers: Concurrent LLM evaluations (default: OLLAMA_NUM_PARALLEL or 4)
+        chunk_size: Claims per batched summary fetch
+
+    Yields:
+        Claim dictionaries extended with evidence_level, explanation,
+        num_papers_found and pmid_list
+    """
+    llm_workers = llm_workers or default_concurrency()
+
+    chunks = [claims[i:i + chunk_size] for i in range(0, len(claims), chunk_size)]
+    # Evaluations waiting to be yielded; bounded so the feeder cannot run far ahead
+    pending: "queue.Queue[Optional[Future]]" = queue.Queue(maxsize=chunk_size + llm_workers * 4)
+    stop = threading.Event()
+    pubmed_pool = ThreadPoolExecutor(pubmed_workers, thread_name_prefix="pubmed")
+    llm_pool = ThreadPoolExecutor(llm_workers, thread_name_prefix="llm")
+
+    def submit_searches(chunk: List[Dict]) -> Tuple[List[str], Dict[str, Future]]:
+        queries = [build_search_query(c.get("claim", ""), c.get("topic", "")) for c in chunk]
+        return queries, {q: pubmed_pool.submit(_search_safe, q) for q in dict.fromkeys(queries)}
+
+    def feed() -> None:
+        try:
+            upcoming = submit_searches(chunks[0]) if chunks else None
+            for i, chunk in enumerate(chunks):
+                queries, searches = upcoming
+                if i + 1 < len(chunks):
+                    upcoming = submit_searches(chunks[i + 1])
+
+                ids_by_query = {q: f.result() for q, f in searches.items()}
+                try:
+                    papers = fetch_summaries([p for ids in ids_by_query.values() for p in ids or []])
+                except Exception as e:
+                    print(f"Error fetching PubMed summaries: {e}")
+                    papers = {}
+                attach_abstracts(papers)
+
+                for claim, query in zip(chunk, queries):
+                    if stop.is_set():
+                        return
+                    if ids_by_query[query] is None:
+                        # A failed search is not "no papers": report an error so it is retried
+                        failed = Future()
+                        failed.set_result(_error_result(claim, "PubMed search failed"))
+                        pending.put(failed)
+                        continue
+                    claim_papers = [papers[p] for p in ids_by_query[query] if p in papers]
+                    pending.put(llm_pool.submit(_evaluate, claim, claim_papers))
+        except Exception as e:
+            failed = Future()
+            failed.set_exception(e)
+            pending.put(failed)
+        finally:
+            pending.put(None)
+
+    feeder = threading.Thread(target=feed, name="evidence-feeder", daemon=True)
+    feeder.start()
+    try:
+        while True:
+            future = pending.get()
+            if future is None:
+                break
+            yield future.result()
+    finally:
+        stop.set()
+        # Unblock the feeder if it is waiting on a full queue
+        while feeder.is_alive():
+            try:
+                pending.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        pubmed_pool.shutdown(wait=True, cancel_futures=True)
+        llm_pool.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,242 @@
+"""Streaming dashboard exports (CSV, parquet, JSON lines, Markdown, HTML), cached on disk."""
+import hashlib
+import html
+import json
+import os
+import uuid
+from datetime import datetime
+from typing import Callable, Dict, Iterator, Optional, TextIO
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.utils.dashboard import EvidenceIndex
+
+DEFAULT_EXPORT_DIR = "data/cache/exports"
+
+# Rows converted and written at a time, so memory stays flat however big the export
+EXPORT_CHUNK_ROWS = 5000
+
+# Finished exports kept on disk; the least recently written are removed first
+EXPORT_CACHE_MAX_FILES = 20
+
+# Claims listed in the Markdown report, as before exports were streamed
+MARKDOWN_TOP_CLAIMS = 10
+
+# Format -> (download file name, MIME type, label)
+EXPORT_FORMATS = {
+    "csv": ("longevity_claims_filtered.csv", "text/csv", "CSV"),
+    "parquet": ("longevity_claims_filtered.parquet", "application/vnd.apache.parquet", "Parquet"),
+    "jsonl": ("longevity_claims_filtered.jsonl", "application/x-ndjson", "JSON lines"),
+    "md": ("longevity_report.md", "text/markdown", "Markdown report (top 10 claims)"),
+    "html": ("longevity_report.html", "text/html", "HTML report"),
+}
+
+
+def export_path(
+    version: str, filters: Dict, fmt: str, export_dir: Optional[str] = None
+) -> str:
+    """Cache file for an export: named by a hash of the dataset version, filters and format."""
+    key = json.dumps([version, sorted(filters.items()), fmt], default=str)
+    name = hashlib.sha1(key.encode("utf-8")).hexdigest()[:20] + os.path.splitext(EXPORT_FORMATS[fmt][0])[1]
+    return os.path.join(export_dir or os.getenv("EXPORT_DIR", DEFAULT_EXPORT_DIR), name)
+
+
+def ensure_export(
+    index: EvidenceIndex,
+    version: str,
+    filters: Dict,
+    fmt: str,
+    export_dir: Optional[str] = None,
+) -> str:
+    """
+    Path of the export for these filters, writing it first if it is not cached.
+
+    The file is written under a temporary name and renamed when complete, so
+    a cached path always holds a finished export.
+    """
+    path = export_path(version, filters, fmt, export_dir)
+    if os.path.exists(path):
+        return path
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+    try:
+        write_export(index, filters, fmt, tmp)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    _prune(os.path.dirname(path))
+    return path
+
+
+def write_export(
+    index: EvidenceIndex,
+    filters: Dict,
+    fmt: str,
+    path: str,
+    chunk_rows: int = EXPORT_CHUNK_ROWS,
+) -> int:
+    """
+    Stream the rows matching ``filters`` to ``path`` in the given format.
+
+    Args:
+        index: Dashboard index of the current dataset version
+        filters: topic / evidence_level / search, as passed to EvidenceIndex
+        fmt: One of EXPORT_FORMATS
+        path: Output file
+        chunk_rows: Rows converted per chunk
+
+    Returns:
+        Number of rows written
+    """
+    summary = index.summary(**filters)
+    chunks = _chunks(index, filters, chunk_rows)
+    if fmt == "parquet":
+        return _write_parquet(chunks, path)
+    writer = _TEXT_WRITERS[fmt]
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        return writer(f, chunks, summary)
+
+
+def _chunks(index: EvidenceIndex, filters: Dict, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    """
+    Matching rows in display order, ``chunk_rows`` at a time, with categoricals
+    as strings. Always yields at least one (possibly empty) chunk, so empty
+    exports keep their header and schema.
+    """
+    positions = index.positions(**filters)
+    for start in range(0, max(len(positions), 1), chunk_rows):
+        chunk = index.df.iloc[positions[start:start + chunk_rows]]
+        categorical = [c for c in chunk.columns if isinstance(chunk[c].dtype, pd.CategoricalDtype)]
+        yield chunk.astype({c: "string" for c in categorical})
+
+
+def _write_csv(f: TextIO, chunks: Iterator[pd.DataFrame], summary: Dict) -> int:
+    rows = 0
+    for chunk in chunks:
+        chunk.to_csv(f, index=False, header=rows == 0)
+        rows += len(chunk)
+    return rows
+
+
+def _write_jsonl(f: TextIO, chunks: Iterator[pd.DataFrame], summary: Dict) -> int:
+    rows = 0
+    for chunk in chunks:
+        if len(chunk):
+            # to_json already ends each chunk with a newline
+            f.write(chunk.to_json(orient="records", lines=True, force_ascii=False))
+        rows += len(chunk)
+    return rows
+
+
+def _write_parquet(chunks: Iterator[pd.DataFrame], path: str) -> int:
+    """One row group per chunk through a single ParquetWriter."""
+    rows = 0
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table.cast(writer.schema))
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def _write_markdown(f: TextIO, chunks: Iterator[pd.DataFrame], summary: Dict) -> int:
+    f.write(f"""# r/longevity Evidence Report
+
+Generated: {datetime.now().strftime("%Y-%m-%d %H:%M")}
+
+## Summary
+- Total claims analyzed: {summary['total']}
+- Unique topics: {summary['topics']}
+- Strong evidence claims: {summary['strong']}
+
+## Evidence Distribution
+| Evidence level | Claims |
+|---|---|
+""")
+    for level, count in summary["evidence_counts"].items():
+        f.write(f"| {level} | {count} |\n")
+    f.write(f"\n## Top {MARKDOWN_TOP_CLAIMS} Claims by Reddit Score\n")
+
+    rows = 0
+    for chunk in chunks:
+        for row in chunk.head(MARKDOWN_TOP_CLAIMS - rows).to_dict("records"):
+            f.write(f"\n### {row['claim']}\n")
+            f.write(f"- **Topic:** {row.get('topic', 'N/A')}\n")
+            f.write(f"- **Evidence:** {row.get('evidence_level', 'N/A')}\n")
+            f.write(f"- **Reddit Score:** {row.get('post_score', 0)}\n")
+            f.write(f"- **Explanation:** {row.get('explanation', 'N/A')}\n")
+            rows += 1
+        if rows >= MARKDOWN_TOP_CLAIMS:
+            break
+    return rows
+
+
+def _escape(value) -> str:
+    """HTML-escaped text of a cell, with missing values as empty strings."""
+    return html.escape("" if pd.isna(value) else str(value))
+
+
+def _write_html(f: TextIO, chunks: Iterator[pd.DataFrame], summary: Dict) -> int:
+    f.write(f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>r/longevity Evidence Report</title>
+<style>body{{font-family:sans-serif;margin:2em}}table{{border-collapse:collapse}}
+td,th{{border:1px solid #ccc;padding:4px 8px;text-align:left;vertical-align:top}}</style>
+</head><body>
+<h1>r/longevity Evidence Report</h1>
+<p>Generated: {datetime.now().strftime("%Y-%m-%d %H:%M")}</p>
+<h2>Summary</h2>
+<ul><li>Total claims analyzed: {summary['total']}</li>
+<li>Unique topics: {summary['topics']}</li>
+<li>Strong evidence claims: {summary['strong']}</li></ul>
+<h2>Evidence Distribution</h2>
+<table><tr><th>Evidence level</th><th>Claims</th></tr>
+""")
+    for level, count in summary["evidence_counts"].items():
+        f.write(f"<tr><td>{_escape(level)}</td><td>{count}</td></tr>\n")
+    f.write("""</table>
+<h2>Claims by Reddit Score</h2>
+<table><tr><th>Claim</th><th>Topic</th><th>Evidence</th><th>Reddit Score</th><th>Explanation</th></tr>
+""")
+
+    rows = 0
+    for chunk in chunks:
+        for row in chunk.to_dict("records"):
+            f.write(
+                f"<tr><td>{_escape(row['claim'])}</td><td>{_escape(row.get('topic'))}</td>"
+                f"<td>{_escape(row.get('evidence_level'))}</td><td>{_escape(row.get('post_score', 0))}</td>"
+                f"<td>{_escape(row.get('explanation'))}</td></tr>\n"
+            )
+        rows += len(chunk)
+    f.write("</table>\n</body></html>\n")
+    return rows
+
+
+_TEXT_WRITERS: Dict[str, Callable[[TextIO, Iterator[pd.DataFrame], Dict], int]] = {
+    "csv": _write_csv,
+    "jsonl": _write_jsonl,
+    "md": _write_markdown,
+    "html": _write_html,
+}
+
+
+def _prune(export_dir: str, keep: int = EXPORT_CACHE_MAX_FILES) -> None:
+    """Remove the oldest finished exports beyond ``keep``."""
+    files = [
+        os.path.join(export_dir, name) for name in os.listdir(export_dir)
+        if not name.endswith(".tmp")
+    ]
+    files.sort(key=lambda p: os.path.getmtime(p), reverse=True)
+    for stale in files[keep:]:
+        try:
+            os.remove(stale)
+        except FileNotFoundError:
+            pass
@@ -1,13 +1,114 @@
 """LLM utilities for local inference via Ollama."""
+import hashlib
 import json
-from typing import Dict, List, Any
+import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Any, Optional, Tuple
 import ollama
 
+from src.utils.cache import SQLiteCache
 
-def chat_completion(prompt: str, model: str = "llama3:8b") -> str:
+# Seconds before a single Ollama request is abandoned
+DEFAULT_TIMEOUT = float(os.getenv("OLLAMA_TIMEOUT", "300"))
+
+# Bump when a prompt template changes so cached results from the old one are ignored
+EXTRACTION_PROMPT_VERSION = "1"
+EVALUATION_PROMPT_VERSION = "1"
+
+_clients: Dict[float, ollama.Client] = {}
+_clients_lock = threading.Lock()
+_cache: Optional[SQLiteCache] = None
+
+
+def default_concurrency() -> int:
+    """Parallel requests to send to Ollama (matches the server's OLLAMA_NUM_PARALLEL)."""
+    return int(os.getenv("OLLAMA_NUM_PARALLEL", "4"))
+
+
+def get_client(timeout: Optional[float] = None) -> ollama.Client:
+    """Return a shared Ollama client so requests reuse one connection pool."""
+    timeout = timeout if timeout is not None else DEFAULT_TIMEOUT
+    with _clients_lock:
+        if timeout not in _clients:
+            _clients[timeout] = ollama.Client(host=os.getenv("OLLAMA_HOST"), timeout=timeout)
+        return _clients[timeout]
+
+
+def get_llm_cache() -> Optional[SQLiteCache]:
+    """
+    Return the content-addressed cache of parsed LLM results.
+
+    Configured through environment variables:
+        LLM_CACHE: "1" (default), "0" to bypass, or "refresh" to ignore
+            cached entries but overwrite them with fresh results
+        LLM_CACHE_PATH: SQLite file (default: data/cache/llm.sqlite)
+        LLM_CACHE_MAX_MB: size cap before LRU eviction (default: 512)
+    """
+    global _cache
+    if os.getenv("LLM_CACHE", "1") == "0":
+        return None
+    with _clients_lock:
+        if _cache is None:
+            _cache = SQLiteCache(
+                os.getenv("LLM_CACHE_PATH", "data/cache/llm.sqlite"),
+                namespace="llm_results",
+                max_bytes=int(float(os.getenv("LLM_CACHE_MAX_MB", "512")) * 1024 * 1024),
+            )
+    return _cache
+
+
+def configure_llm_cache(mode: str = "on", clear: bool = False) -> None:
+    """
+    Set the LLM cache mode for this process and optionally wipe it.
+
+    Args:
+        mode: "on", "off" (bypass entirely) or "refresh" (recompute and overwrite)
+        clear: Delete every cached result first
+    """
+    os.environ["LLM_CACHE"] = {"on": "1", "off": "0", "refresh": "refresh"}[mode]
+    if clear:
+        cache = get_llm_cache()
+        if cache is None:
+            cache = SQLiteCache(os.getenv("LLM_CACHE_PATH", "data/cache/llm.sqlite"), namespace="llm_results")
+        cache.clear()
+
+
+def llm_cache_key(model: str, prompt_version: str, text: str) -> str:
+    """Hash of (model, prompt template version, input text) used as the cache key."""
+    payload = json.dumps([model, prompt_version, text])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _cached_completion(
+    prompt: str,
+    model: str,
+    prompt_version: str,
+    parse: Callable[[str], Optional[Any]],
+) -> Optional[Any]:
+    """
+    Return the parsed result for a prompt, calling the model only on a cache miss.
+
+    ``parse`` returns None for unusable responses; those are never cached.
+    """
+    cache = get_llm_cache()
+    key = llm_cache_key(model, prompt_version, prompt)
+    if cache is not None and os.getenv("LLM_CACHE", "1") != "refresh":
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    parsed = parse(chat_completion(prompt, model))
+    if cache is not None and parsed is not None:
+        cache.set(key, parsed)
+    return parsed
+
+
+def chat_completion(prompt: str, model: str = "llama3:8b", timeout: Optional[float] = None) -> str:
     """Send a prompt to the local Ollama model and return the response."""
     try:
-        resp = ollama.chat(
+        resp = get_client(timeout).chat(
             model=model,
             messages=[{"role": "user", "content": prompt}]
         )
@@ -17,6 +118,48 @@ def chat_completion(prompt: str, model: str = "llama3:8b") -> str:
         return ""
 
 
+def _map_ordered(fn: Callable[[Any], Any], items: Iterable[Any], concurrency: int) -> Iterator[Any]:
+    """Apply ``fn`` to items in a bounded thread pool, yielding results in input order."""
+    window = deque()
+    with ThreadPoolExecutor(concurrency, thread_name_prefix="ollama") as pool:
+        for item in items:
+            if len(window) >= concurrency * 2:
+                yield window.popleft().result()
+            window.append(pool.submit(fn, item))
+        while window:
+            yield window.popleft().result()
+
+
+def iter_chat_completions(
+    prompts: Iterable[str],
+    model: str = "llama3:8b",
+    concurrency: Optional[int] = None,
+    timeout: Optional[float] = None,
+) -> Iterator[str]:
+    """
+    Run prompts through Ollama in parallel, yielding responses in input order.
+
+    At most ``concurrency`` requests are in flight and only a small window of
+    prompts is pulled from ``prompts`` ahead of the consumer, so a lazy
+    iterable of prompts is never materialized in full. Empty prompts are
+    answered with "" without calling the model.
+    """
+    def complete(prompt: str) -> str:
+        return chat_completion(prompt, model, timeout) if prompt else ""
+
+    return _map_ordered(complete, prompts, concurrency or default_concurrency())
+
+
+def chat_completion_many(
+    prompts: List[str],
+    model: str = "llama3:8b",
+    concurrency: Optional[int] = None,
+    timeout: Optional[float] = None,
+) -> List[str]:
+    """Send many prompts to Ollama concurrently and return responses in order."""
+    return list(iter_chat_completions(prompts, model, concurrency, timeout))
+
+
 def extract_json_from_response(response: str) -> Any:
     """Try to extract and parse JSON from an LLM response."""
     try:
@@ -39,13 +182,13 @@ def extract_json_from_response(response: str) -> Any:
         return {}
 
 
-def extract_claims_from_post(title: str, selftext: str, model: str = "llama3:8b") -> List[Dict]:
-    """Extract longevity-related claims from a Reddit post."""
+def build_extraction_prompt(title: str, selftext: str) -> Optional[str]:
+    """Build the claim-extraction prompt for a post, or None if it has no text."""
     text = f"{title}\n\n{selftext}".strip()
     if not text:
-        return []
+        return None
     
-    prompt = f"""You are an evidence-focused medical research assistant.
+    return f"""You are an evidence-focused medical research assistant.
 
 From the text below, extract SPECIFIC longevity-related claims.
 
@@ -65,17 +208,58 @@ If no clear longevity claims are present, return: []
 TEXT:
 {text[:2000]}
 """
-    
-    response = chat_completion(prompt, model)
+
+
+def parse_claims(response: str) -> Optional[List[Dict]]:
+    """Parse the extraction response into a list of claim dictionaries (None if unusable)."""
     claims = extract_json_from_response(response)
-    if not isinstance(claims, list):
+    if not response or not isinstance(claims, list):
+        return None
+    return [c for c in claims if isinstance(c, dict)]
+
+
+def extract_claims_from_post(title: str, selftext: str, model: str = "llama3:8b") -> Optional[List[Dict]]:
+    """
+    Extract longevity-related claims from a Reddit post.
+
+    Returns [] when the post has no claims and None when extraction failed
+    (Ollama unreachable or an unusable response), so callers can leave the
+    post to be retried instead of recording it as processed.
+    """
+    prompt = build_extraction_prompt(title, selftext)
+    if prompt is None:
         return []
-    return claims
+    claims = _cached_completion(prompt, model, EXTRACTION_PROMPT_VERSION, parse_claims)
+    if claims is None:
+        return None
+    # Copy so callers can annotate claims without touching shared cached results
+    return [dict(c) for c in claims]
 
 
-def evaluate_claim(claim: str, topic: str, references_text: str, model: str = "llama3:8b") -> Dict:
-    """Evaluate a claim against scientific references."""
-    prompt = f"""You are a critical longevity researcher.
+def iter_extract_claims(
+    posts: Iterable[Tuple[str, str]],
+    model: str = "llama3:8b",
+    concurrency: Optional[int] = None,
+) -> Iterator[Optional[List[Dict]]]:
+    """Extract claims from (title, selftext) pairs concurrently, yielding in input order (None on failure)."""
+    def extract(post: Tuple[str, str]) -> Optional[List[Dict]]:
+        return extract_claims_from_post(post[0], post[1], model)
+
+    return _map_ordered(extract, posts, concurrency or default_concurrency())
+
+
+def extract_claims_many(
+    posts: List[Tuple[str, str]],
+    model: str = "llama3:8b",
+    concurrency: Optional[int] = None,
+) -> List[Optional[List[Dict]]]:
+    """Extract claims from many (title, selftext) pairs; one claim list per post (None on failure)."""
+    return list(iter_extract_claims(posts, model, concurrency))
+
+
+def build_evaluation_prompt(claim: str, topic: str, references_text: str) -> str:
+    """Build the evidence-evaluation prompt for a claim and its references."""
+    return f"""You are a critical longevity researcher.
 
 CLAIM:
 "{claim}"
@@ -100,9 +284,38 @@ Return JSON ONLY (no other text):
   "explanation": "..."
 }}
 """
-    
-    response = chat_completion(prompt, model)
+
+
+def parse_evaluation(response: str) -> Optional[Dict]:
+    """Parse the evaluation response into an evidence_level/explanation dict (None if unusable)."""
     result = extract_json_from_response(response)
-    if not isinstance(result, dict):
-        return {"evidence_level": "unknown", "explanation": "Could not parse evaluation"}
+    if not isinstance(result, dict) or "evidence_level" not in result:
+        return None
     return result
+
+
+def evaluate_claim(claim: str, topic: str, references_text: str, model: str = "llama3:8b") -> Dict:
+    """
+    Evaluate a claim against scientific references.
+
+    An empty or unparsable response (including Ollama being unreachable)
+    gives evidence_level "error", like a failed PubMed lookup, so pipeline
+    runs leave the claim to be checked again instead of storing "unknown".
+    """
+    prompt = build_evaluation_prompt(claim, topic, references_text)
+    result = _cached_completion(prompt, model, EVALUATION_PROMPT_VERSION, parse_evaluation)
+    if result is None:
+        return {"evidence_level": "error", "explanation": "LLM evaluation failed (empty or unparsable response)"}
+    return dict(result)
+
+
+def evaluate_claims_many(
+    items: List[Tuple[str, str, str]],
+    model: str = "llama3:8b",
+    concurrency: Optional[int] = None,
+) -> List[Dict]:
+    """Evaluate many (claim, topic, references_text) triples concurrently, in order."""
+    def evaluate(item: Tuple[str, str, str]) -> Dict:
+        return evaluate_claim(item[0], item[1], item[2], model)
+
+    return list(_map_ordered(evaluate, items, concurrency or default_concurrency()))
@@ -1,64 +1,482 @@
 """PubMed search utilities using NCBI E-utilities."""
+import json
+import os
+import random
+import re
+import threading
 import time
+from concurrent.futures import Future
+from functools import lru_cache
 import requests
-from typing import List, Dict
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from xml.etree import ElementTree
+from typing import List, Dict, Optional
+from dotenv import load_dotenv
 
+from src.utils.abstracts import AbstractStore
+from src.utils.cache import SQLiteCache
+from src.utils.pubmed_local import DEFAULT_INDEX_PATH, LocalPubMedIndex, iter_pubmed_articles
+from src.utils.ratelimit import TokenBucket
+
+load_dotenv()
+
+BASE_URL = os.getenv("NCBI_EUTILS_URL", "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/")
+
+_cache: Optional[SQLiteCache] = None
+_session: Optional[requests.Session] = None
+_limiter: Optional[TokenBucket] = None
+_local_index: Optional[LocalPubMedIndex] = None
+_abstract_store: Optional[AbstractStore] = None
+_init_lock = threading.Lock()
+
+# esearch results already requested in this process, keyed by normalized query
+_search_memo: Dict[str, Future] = {}
+SEARCH_MEMO_MAX = 10000
+_memo_lock = threading.Lock()
+
+DEFAULT_VOCABULARY_PATH = os.path.join(os.path.dirname(__file__), "mesh_vocabulary.json")
+
+# Used when a claim names no outcome we know
+DEFAULT_OUTCOME_TERMS = "longevity OR lifespan OR healthspan OR aging"
+TRIAL_FILTERS = "randomized trial OR clinical trial OR meta-analysis OR systematic review"
+
+
+def get_pubmed_cache() -> Optional[SQLiteCache]:
+    """
+    Return the shared on-disk cache for E-utilities responses.
+
+    Configured through environment variables:
+        PUBMED_CACHE: set to "0" to disable caching
+        PUBMED_CACHE_PATH: SQLite file (default: data/cache/pubmed.sqlite)
+        PUBMED_CACHE_TTL_DAYS: entry lifetime in days (default: 7)
+        PUBMED_CACHE_MAX_ENTRIES: size cap before LRU eviction (default: 50000)
+    """
+    global _cache
+    if os.getenv("PUBMED_CACHE", "1") == "0":
+        return None
+    with _init_lock:
+        if _cache is None:
+            _cache = SQLiteCache(
+                os.getenv("PUBMED_CACHE_PATH", "data/cache/pubmed.sqlite"),
+                namespace="eutils",
+                ttl=float(os.getenv("PUBMED_CACHE_TTL_DAYS", "7")) * 86400,
+                max_entries=int(os.getenv("PUBMED_CACHE_MAX_ENTRIES", "50000")),
+            )
+        return _cache
+
+
+def get_backend() -> str:
+    """Search backend: "eutils" (NCBI, default) or "local" (PUBMED_BACKEND=local)."""
+    return os.getenv("PUBMED_BACKEND", "eutils").lower()
+
+
+def get_local_index() -> LocalPubMedIndex:
+    """
+    Return the shared local PubMed mirror (see src/build_pubmed_index.py).
+
+    Raises:
+        RuntimeError: If the mirror is missing or empty, rather than letting
+            every claim come back with no papers
+    """
+    global _local_index
+    with _init_lock:
+        if _local_index is None:
+            path = os.getenv("PUBMED_LOCAL_PATH", DEFAULT_INDEX_PATH)
+            if not os.path.exists(path):
+                raise RuntimeError(
+                    f"No local PubMed mirror at {path}; build it with 'make pubmed-index FILES=...'"
+                )
+            index = LocalPubMedIndex(path)
+            if len(index) == 0:
+                raise RuntimeError(
+                    f"The local PubMed mirror at {path} is empty; build it with 'make pubmed-index FILES=...'"
+                )
+            _local_index = index
+        return _local_index
+
+
+SUMMARY_BATCH_SIZE = 200
+EPOST_THRESHOLD = 1000
+
+# Attempts per E-utilities request when NCBI answers 429 or 5xx; each one
+# takes a rate-limiter token
+MAX_ATTEMPTS = 5
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+RETRY_BACKOFF = 1.0
+
+# PMIDs per efetch request; full records are larger than summaries
+EFETCH_BATCH_SIZE = 200
+
+# Characters of each abstract passed to the LLM
+ABSTRACT_EXCERPT_CHARS = 800
+
+
+def get_abstract_store() -> Optional[AbstractStore]:
+    """
+    Return the shared compressed abstract store.
+
+    Configured through environment variables:
+        PUBMED_ABSTRACTS: set to "0" to skip abstracts (titles only)
+        PUBMED_ABSTRACTS_PATH: SQLite file (default: data/cache/abstracts.sqlite)
+    """
+    global _abstract_store
+    if os.getenv("PUBMED_ABSTRACTS", "1") == "0":
+        return None
+    with _init_lock:
+        if _abstract_store is None:
+            _abstract_store = AbstractStore()
+        return _abstract_store
+
+
+def _cache_get(key: str):
+    cache = get_pubmed_cache()
+    return cache.get(key) if cache is not None else None
+
+
+def _cache_set(key: str, value) -> None:
+    cache = get_pubmed_cache()
+    if cache is not None:
+        cache.set(key, value)
+
+
+def get_rate_limiter() -> TokenBucket:
+    """
+    Return the process-wide limiter for E-utilities requests.
+
+    NCBI allows 3 requests/sec without an API key and 10 requests/sec with
+    NCBI_API_KEY set; NCBI_RATE_LIMIT overrides the rate explicitly.
+    """
+    global _limiter
+    with _init_lock:
+        if _limiter is None:
+            default_rate = "10" if os.getenv("NCBI_API_KEY") else "3"
+            _limiter = TokenBucket(rate=float(os.getenv("NCBI_RATE_LIMIT", default_rate)))
+    return _limiter
+
+
+def get_session() -> requests.Session:
+    """
+    Return a pooled keep-alive session.
+
+    The adapter only retries connection failures; 429/5xx responses are
+    retried by ``eutils_request`` so every attempt goes through the limiter.
+    """
+    global _session
+    with _init_lock:
+        if _session is None:
+            retry = Retry(
+                total=3,
+                status=0,
+                backoff_factor=1.0,
+                allowed_methods=["GET", "POST"],
+            )
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry)
+            _session = requests.Session()
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+    return _session
+
+
+def eutils_request(
+    endpoint: str,
+    params: Optional[Dict] = None,
+    data: Optional[Dict] = None,
+    timeout: float = 30,
+    stream: bool = False,
+) -> requests.Response:
+    """
+    Send one rate-limited request to an E-utilities endpoint.
+
+    Requests with ``data`` are POSTed, everything else is a GET. The NCBI
+    API key and contact details from the environment are added automatically.
+    With ``stream`` the body is left unread so it can be parsed incrementally
+    from ``response.raw``. 429 and 5xx responses are retried up to
+    MAX_ATTEMPTS times with exponential backoff (or the server's Retry-After),
+    taking a fresh rate-limiter token for each attempt.
+    """
+    extra = {}
+    if os.getenv("NCBI_API_KEY"):
+        extra["api_key"] = os.getenv("NCBI_API_KEY")
+    if os.getenv("NCBI_EMAIL"):
+        extra["email"] = os.getenv("NCBI_EMAIL")
+        extra["tool"] = "longevity-reddit-agent"
+
+    for attempt in range(MAX_ATTEMPTS):
+        get_rate_limiter().acquire()
+        if data is not None:
+            response = get_session().post(
+                BASE_URL + endpoint, data={**data, **extra}, timeout=timeout, stream=stream
+            )
+        else:
+            response = get_session().get(
+                BASE_URL + endpoint, params={**(params or {}), **extra}, timeout=timeout, stream=stream
+            )
+        if response.status_code not in RETRY_STATUSES or attempt == MAX_ATTEMPTS - 1:
+            break
+        response.close()
+        time.sleep(_retry_delay(response, attempt))
+    response.raise_for_status()
+    return response
+
+
+def _retry_delay(response: requests.Response, attempt: int) -> float:
+    """Seconds to wait before retrying: Retry-After if given, else jittered exponential backoff."""
+    retry_after = response.headers.get("Retry-After", "")
+    if retry_after.isdigit():
+        return float(retry_after)
+    return RETRY_BACKOFF * 2 ** attempt + random.uniform(0, RETRY_BACKOFF)
+
+
+# PubMed treats these as boolean operators only when written in capitals
+_OPERATORS = re.compile(r"\b(AND|OR|NOT)\b")
+
+
+def normalize_query(query: str) -> str:
+    """
+    Canonical form of a query for memoization and cache keys.
+
+    Search terms are case-insensitive in PubMed, but AND/OR/NOT are operators
+    only in capitals, so those keep their case.
+    """
+    parts = _OPERATORS.split(" ".join(query.split()))
+    return "".join(part if i % 2 else part.lower() for i, part in enumerate(parts))
+
+
+def search_pmids(query: str, max_results: int = 5) -> List[str]:
+    """
+    Return the PMIDs matching a PubMed query (esearch).
+
+    Identical normalized queries are sent at most once per process: later
+    and concurrent callers share the first call's result.
+    """
+    key = f"{max_results}:{normalize_query(query)}"
+    with _memo_lock:
+        future = _search_memo.get(key)
+        owner = future is None
+        if owner:
+            if len(_search_memo) >= SEARCH_MEMO_MAX:
+                # Long-running processes: forget finished lookups, keep in-flight ones
+                for k in [k for k, f in _search_memo.items() if f.done()]:
+                    del _search_memo[k]
+            future = _search_memo[key] = Future()
+    if not owner:
+        return list(future.result())
+
+    try:
+        ids = _search_pmids_uncached(query, key, max_results)
+    except Exception as e:
+        with _memo_lock:
+            _search_memo.pop(key, None)
+        future.set_exception(e)
+        raise
+    future.set_result(ids)
+    return list(ids)
+
+
+def _search_pmids_uncached(query: str, key: str, max_results: int) -> List[str]:
+    if get_backend() == "local":
+        return get_local_index().search(query, max_results)
+
+    search_key = f"esearch:{key}"
+    ids = _cache_get(search_key)
+    if ids is not None:
+        return ids
 
-def search_pubmed(query: str, max_results: int = 5) -> List[Dict]:
-    """Search PubMed for articles matching the query."""
-    base_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/"
-    
     search_params = {
         "db": "pubmed",
         "term": query,
         "retmode": "json",
         "retmax": max_results
     }
-    
-    try:
-        search_response = requests.get(
-            base_url + "esearch.fcgi",
-            params=search_params,
-            timeout=10
+    search_response = eutils_request("esearch.fcgi", params=search_params, timeout=10)
+    ids = search_response.json().get("esearchresult", {}).get("idlist", [])
+    _cache_set(search_key, ids)
+    return ids
+
+
+def _summary_to_paper(pmid: str, item: Dict) -> Dict:
+    return {
+        "pmid": pmid,
+        "title": item.get("title", ""),
+        "journal": item.get("fulljournalname", ""),
+        "pubdate": item.get("pubdate", ""),
+    }
+
+
+def _esummary_by_ids(ids: List[str]) -> Dict:
+    """POST one esummary request for an explicit list of PMIDs."""
+    response = eutils_request(
+        "esummary.fcgi",
+        data={"db": "pubmed", "id": ",".join(ids), "retmode": "json"}
+    )
+    return response.json().get("result", {})
+
+
+def _esummary_by_history(ids: List[str]) -> Dict:
+    """Upload PMIDs with epost, then page through esummary on the WebEnv."""
+    post_response = eutils_request("epost.fcgi", data={"db": "pubmed", "id": ",".join(ids)})
+    root = ElementTree.fromstring(post_response.content)
+    web_env = root.findtext("WebEnv")
+    query_key = root.findtext("QueryKey")
+    if not web_env or not query_key:
+        raise ValueError("epost did not return a WebEnv")
+
+    result = {"uids": []}
+    for start in range(0, len(ids), SUMMARY_BATCH_SIZE):
+        response = eutils_request(
+            "esummary.fcgi",
+            params={
+                "db": "pubmed",
+                "WebEnv": web_env,
+                "query_key": query_key,
+                "retstart": start,
+                "retmax": SUMMARY_BATCH_SIZE,
+                "retmode": "json",
+            }
         )
-        search_response.raise_for_status()
-        search_data = search_response.json()
-        
-        ids = search_data.get("esearchresult", {}).get("idlist", [])
-        if not ids:
-            return []
-        
-        time.sleep(0.35)
-        
-        summary_params = {
-            "db": "pubmed",
-            "id": ",".join(ids),
-            "retmode": "json"
+        page = response.json().get("result", {})
+        result["uids"].extend(page.pop("uids", []))
+        result.update(page)
+    return result
+
+
+def fetch_summaries(pmids: List[str]) -> Dict[str, Dict]:
+    """
+    Fetch title/journal/date summaries for many PMIDs at once.
+
+    PMIDs are de-duplicated and looked up in the cache first. The remaining
+    ones are fetched in batches of SUMMARY_BATCH_SIZE per request; lists longer
+    than EPOST_THRESHOLD are uploaded once with epost and paged via WebEnv.
+
+    Returns:
+        Dictionary mapping PMID to paper dict
+    """
+    if get_backend() == "local":
+        return get_local_index().summaries(pmids)
+
+    papers = {}
+    missing = []
+    for pmid in dict.fromkeys(pmids):
+        cached = _cache_get(f"summary:{pmid}")
+        if cached is not None:
+            papers[pmid] = cached
+        else:
+            missing.append(pmid)
+
+    if len(missing) > EPOST_THRESHOLD:
+        results = [_esummary_by_history(missing)]
+    else:
+        results = [
+            _esummary_by_ids(missing[i:i + SUMMARY_BATCH_SIZE])
+            for i in range(0, len(missing), SUMMARY_BATCH_SIZE)
+        ]
+
+    for result in results:
+        for pmid in result.get("uids", []):
+            paper = _summary_to_paper(pmid, result.get(pmid, {}))
+            papers[pmid] = paper
+            _cache_set(f"summary:{pmid}", paper)
+
+    return papers
+
+
+def _efetch_abstracts(ids: List[str]) -> Dict[str, str]:
+    """POST one efetch request and stream-parse the abstracts out of the XML."""
+    response = eutils_request(
+        "efetch.fcgi",
+        data={"db": "pubmed", "id": ",".join(ids), "retmode": "xml"},
+        timeout=60,
+        stream=True,
+    )
+    try:
+        response.raw.decode_content = True
+        return {
+            row["pmid"]: row["abstract"]
+            for row in iter_pubmed_articles(response.raw)
+            if "pmid" in row
         }
-        
-        summary_response = requests.get(
-            base_url + "esummary.fcgi",
-            params=summary_params,
-            timeout=10
-        )
-        summary_response.raise_for_status()
-        summary_data = summary_response.json()
-        
-        results = []
-        for pmid in ids:
-            item = summary_data.get("result", {}).get(pmid, {})
-            results.append({
-                "pmid": pmid,
-                "title": item.get("title", ""),
-                "journal": item.get("fulljournalname", ""),
-                "pubdate": item.get("pubdate", ""),
-            })
-        
-        return results
-        
+    finally:
+        response.close()
+
+
+def fetch_abstracts(pmids: List[str]) -> Dict[str, str]:
+    """
+    Fetch abstracts for many PMIDs, each one at most once.
+
+    Stored abstracts are read from the compressed abstract store; the rest
+    are fetched with efetch in batches of EFETCH_BATCH_SIZE and stored. PMIDs
+    without an abstract are stored as empty strings so they are not fetched
+    again. With the local backend the abstracts come from the mirror.
+
+    Returns:
+        Dictionary mapping PMID to abstract text ("" if it has none)
+    """
+    if get_backend() == "local":
+        return get_local_index().abstracts(pmids)
+    store = get_abstract_store()
+    if store is None:
+        return {}
+
+    pmids = list(dict.fromkeys(pmids))
+    abstracts = store.get_many(pmids)
+    missing = [p for p in pmids if p not in abstracts]
+    for i in range(0, len(missing), EFETCH_BATCH_SIZE):
+        batch = missing[i:i + EFETCH_BATCH_SIZE]
+        fetched = _efetch_abstracts(batch)
+        fetched.update({p: "" for p in batch if p not in fetched})
+        store.put_many(fetched)
+        abstracts.update(fetched)
+    return abstracts
+
+
+def attach_abstracts(papers: Dict[str, Dict]) -> Dict[str, Dict]:
+    """Add an "abstract" field to each paper in a PMID -> paper mapping, in place."""
+    try:
+        abstracts = fetch_abstracts(list(papers))
+    except Exception as e:
+        print(f"Error fetching PubMed abstracts: {e}")
+        abstracts = {}
+    for pmid, paper in papers.items():
+        paper["abstract"] = abstracts.get(pmid, "")
+    return papers
+
+
+def search_pubmed_many(queries: List[str], max_results: int = 5) -> List[List[Dict]]:
+    """
+    Search PubMed for many queries, sharing one batched summary fetch.
+
+    Each query is run through esearch, then the PMIDs of all queries are
+    resolved together with fetch_summaries and fetch_abstracts and handed
+    back per query.
+
+    Returns:
+        One list of papers per query, in the same order as ``queries``
+    """
+    id_lists = []
+    for query in queries:
+        try:
+            id_lists.append(search_pmids(query, max_results))
+        except Exception as e:
+            print(f"Error searching PubMed: {e}")
+            id_lists.append([])
+
+    try:
+        papers = fetch_summaries([pmid for ids in id_lists for pmid in ids])
     except Exception as e:
-        print(f"Error searching PubMed: {e}")
-        return []
+        print(f"Error fetching PubMed summaries: {e}")
+        return [[] for _ in queries]
+    attach_abstracts(papers)
+
+    return [
+        [papers.get(pmid) or _summary_to_paper(pmid, {}) for pmid in ids]
+        for ids in id_lists
+    ]
+
+
+def search_pubmed(query: str, max_results: int = 5) -> List[Dict]:
+    """Search PubMed for articles matching the query."""
+    return search_pubmed_many([query], max_results)[0]
 
 
 def format_references(papers: List[Dict]) -> str:
@@ -68,11 +486,95 @@ def format_references(papers: List[Dict]) -> str:
     lines = []
     for p in papers:
         lines.append(f"- {p['title']} ({p['journal']}, {p['pubdate']}) [PMID: {p['pmid']}]")
+        abstract = p.get("abstract", "")
+        if abstract:
+            if len(abstract) > ABSTRACT_EXCERPT_CHARS:
+                abstract = abstract[:ABSTRACT_EXCERPT_CHARS].rsplit(" ", 1)[0] + " ..."
+            lines.append(f"  Abstract: {abstract}")
     return "\n".join(lines)
 
 
+@lru_cache(maxsize=None)
+def load_vocabulary(path: Optional[str] = None) -> Dict[str, List[Dict]]:
+    """
+    Load the MeSH vocabulary used to map claim wording to search concepts.
+
+    The file (default: MESH_VOCAB_PATH or mesh_vocabulary.json next to this
+    module) maps each category (intervention, outcome, organism) to a list of
+    concepts with a MeSH heading (or null) and the phrases that name it.
+    """
+    with open(path or os.getenv("MESH_VOCAB_PATH", DEFAULT_VOCABULARY_PATH)) as f:
+        return json.load(f)
+
+
+@lru_cache(maxsize=None)
+def _phrase_patterns(path: Optional[str] = None) -> Dict[str, List]:
+    """Compiled phrase matchers per category, longest phrase first."""
+    patterns = {}
+    for category, concepts in load_vocabulary(path).items():
+        entries = [
+            (re.compile(r"(?<![\w+-])" + re.escape(term.lower()) + r"(?![\w+-])"), i)
+            for i, concept in enumerate(concepts)
+            for term in concept["terms"]
+        ]
+        entries.sort(key=lambda e: -len(e[0].pattern))
+        patterns[category] = entries
+    return patterns
+
+
+def extract_concepts(text: str, path: Optional[str] = None) -> Dict[str, List[Dict]]:
+    """Find the vocabulary concepts named in ``text``, per category."""
+    vocabulary = load_vocabulary(path)
+    found = {}
+    for category, entries in _phrase_patterns(path).items():
+        remaining = " ".join(str(text).lower().split())
+        indices = []
+        for pattern, index in entries:
+            if pattern.search(remaining):
+                # Blank out the match so shorter phrases inside it don't match again
+                remaining = pattern.sub(" ", remaining)
+                if index not in indices:
+                    indices.append(index)
+        found[category] = [vocabulary[category][i] for i in sorted(indices)]
+    return found
+
+
+def _concept_clause(concept: Dict) -> str:
+    parts = [f'"{concept["mesh"]}"[MeSH Terms]'] if concept.get("mesh") else []
+    parts += [f'"{term}"[tiab]' for term in sorted(set(concept["terms"]))]
+    return "(" + " OR ".join(parts) + ")"
+
+
 def build_search_query(claim: str, topic: str) -> str:
-    """Build an optimized PubMed search query from a claim and topic."""
-    base_terms = f"{topic} longevity lifespan healthspan aging"
-    filters = "randomized trial OR clinical trial OR meta-analysis OR systematic review"
-    return f"({base_terms}) AND ({filters})"
+    """
+    Build a PubMed search query from a claim and its topic.
+
+    Intervention, outcome and organism terms are picked out of the claim and
+    topic using the MeSH vocabulary, and each concept becomes a clause that
+    matches its MeSH heading or any of its phrases in title/abstract. Claims
+    about non-human organisms drop the clinical-trial filter, since such
+    evidence comes from animal studies. Concepts are emitted in sorted
+    order, so claims naming the same concepts produce the same query.
+    """
+    concepts = extract_concepts(f"{topic} {claim}")
+    topic_concepts = extract_concepts(str(topic))["intervention"]
+
+    interventions = concepts["intervention"] or topic_concepts
+    if interventions:
+        intervention = " OR ".join(sorted({_concept_clause(c) for c in interventions}))
+    else:
+        intervention = f'"{" ".join(str(topic).split())}"[tiab]' if str(topic).strip() else ""
+
+    outcomes = concepts["outcome"]
+    outcome = " OR ".join(sorted({_concept_clause(c) for c in outcomes})) \
+        if outcomes else DEFAULT_OUTCOME_TERMS
+
+    clauses = [f"({intervention})"] if intervention else []
+    clauses.append(f"({outcome})")
+
+    organisms = concepts["organism"]
+    if organisms:
+        clauses.append("(" + " OR ".join(sorted(f'"{o["mesh"]}"[MeSH Terms]' for o in organisms)) + ")")
+    if not organisms or any(o["mesh"] == "Humans" for o in organisms):
+        clauses.append(f"({TRIAL_FILTERS})")
+    return " AND ".join(clauses)
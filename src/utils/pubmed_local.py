@@ -0,0 +1,278 @@
+"""Local PubMed mirror: load baseline/update XML into SQLite FTS5 and search it offline."""
+import gzip
+import os
+import re
+import sqlite3
+import threading
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Set
+from xml.etree import ElementTree
+
+DEFAULT_INDEX_PATH = "data/pubmed/pubmed.sqlite"
+
+# Articles inserted per transaction while loading
+LOAD_BATCH_SIZE = 5000
+
+# PubMed field tags the query translator understands, and the FTS columns they search
+FIELD_COLUMNS = {
+    "mesh terms": "mesh",
+    "mesh": "mesh",
+    "mh": "mesh",
+    "tiab": "{title abstract}",
+    "title/abstract": "{title abstract}",
+    "ti": "title",
+    "title": "title",
+    "ab": "abstract",
+    "pt": "pubtypes",
+    "publication type": "pubtypes",
+}
+
+_QUERY_TOKEN = re.compile(r'\(|\)|"[^"]*"(?:\[[^\]]+\])?|[^\s()"]+(?:\[[^\]]+\])?')
+
+
+def _text(element: Optional[ElementTree.Element]) -> str:
+    """All text inside an element, including nested markup such as <i>."""
+    return " ".join("".join(element.itertext()).split()) if element is not None else ""
+
+
+def _pubdate(article: ElementTree.Element) -> str:
+    date = article.find("Journal/JournalIssue/PubDate")
+    if date is None:
+        return ""
+    medline = date.findtext("MedlineDate")
+    if medline:
+        return medline
+    return " ".join(p for p in (date.findtext("Year"), date.findtext("Month"), date.findtext("Day")) if p)
+
+
+def parse_article(element: ElementTree.Element) -> Optional[Dict]:
+    """Turn a <PubmedArticle> element into a row dict (None if it has no PMID)."""
+    citation = element.find("MedlineCitation")
+    if citation is None:
+        return None
+    pmid = citation.findtext("PMID")
+    article = citation.find("Article")
+    if not pmid or article is None:
+        return None
+    return {
+        "pmid": pmid.strip(),
+        "title": _text(article.find("ArticleTitle")),
+        "abstract": " ".join(_text(a) for a in article.findall("Abstract/AbstractText")),
+        "journal": article.findtext("Journal/Title") or "",
+        "pubdate": _pubdate(article),
+        "mesh": "; ".join(
+            _text(d) for d in citation.findall("MeshHeadingList/MeshHeading/DescriptorName")
+        ),
+        "pubtypes": "; ".join(
+            _text(p) for p in article.findall("PublicationTypeList/PublicationType")
+        ),
+    }
+
+
+def iter_pubmed_articles(source: IO[bytes]) -> Iterator[Dict]:
+    """
+    Stream articles and deletions out of PubMed XML (a file or HTTP response body).
+
+    Uses iterparse and clears the tree after each article, so memory stays
+    flat even for full baseline files.
+
+    Yields:
+        Article row dicts, or {"delete": [pmids]} for <DeleteCitation> blocks
+    """
+    root = None
+    for event, element in ElementTree.iterparse(source, events=("start", "end")):
+        if root is None:
+            root = element
+        if event != "end":
+            continue
+        if element.tag == "PubmedArticle":
+            row = parse_article(element)
+            if row is not None:
+                yield row
+            root.clear()
+        elif element.tag == "DeleteCitation":
+            yield {"delete": [p.text.strip() for p in element.findall("PMID") if p.text]}
+            root.clear()
+
+
+def iter_pubmed_xml(path: str) -> Iterator[Dict]:
+    """Stream articles and deletions out of a PubMed XML file (.xml or .xml.gz)."""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as f:
+        yield from iter_pubmed_articles(f)
+
+
+def to_fts_query(query: str) -> str:
+    """
+    Translate a PubMed-style boolean query into an FTS5 MATCH expression.
+
+    Quoted phrases and words keep their field tags ([MeSH Terms], [tiab],
+    [pt], ...) as FTS column filters; untagged terms search every column.
+    AND/OR/NOT and parentheses carry over unchanged.
+    """
+    parts = []
+    for token in _QUERY_TOKEN.findall(query):
+        if token in ("(", ")") or token in ("AND", "OR", "NOT"):
+            parts.append(token)
+            continue
+        field = None
+        match = re.match(r'^(.*?)\[([^\]]+)\]$', token)
+        if match:
+            token, field = match.group(1), match.group(2).lower()
+        phrase = " ".join(re.findall(r"\w+", token.strip('"')))
+        if not phrase:
+            continue
+        term = f'"{phrase}"'
+        column = FIELD_COLUMNS.get(field) if field else None
+        parts.append(f"{column} : {term}" if column else term)
+
+    # Drop operators left dangling by terms that had no searchable words
+    expr = " ".join(parts)
+    for _ in range(3):
+        expr = re.sub(r"\(\s*(AND|OR|NOT)\s+", "(", expr)
+        expr = re.sub(r"\s+(AND|OR|NOT)\s*\)", ")", expr)
+        expr = re.sub(r"\(\s*\)", "", expr)
+        expr = re.sub(r"\b(AND|OR|NOT)\s+(AND|OR|NOT)\b", r"\2", expr)
+    return re.sub(r"^\s*(AND|OR|NOT)\s+|\s+(AND|OR|NOT)\s*$", "", expr).strip()
+
+
+class LocalPubMedIndex:
+    """
+    PubMed articles in a SQLite FTS5 index.
+
+    Title, abstract, MeSH headings and publication types are indexed with
+    the porter tokenizer; searches rank matches with bm25, so a lookup takes
+    milliseconds instead of two NCBI round-trips.
+
+    Args:
+        path: SQLite file (default: PUBMED_LOCAL_PATH or data/pubmed/pubmed.sqlite)
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv("PUBMED_LOCAL_PATH", DEFAULT_INDEX_PATH)
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # The rowid is the PMID, so lookups and replacements by PMID are direct
+        self._conn.execute(
+            """CREATE VIRTUAL TABLE IF NOT EXISTS articles USING fts5(
+                title,
+                abstract,
+                mesh,
+                pubtypes,
+                journal UNINDEXED,
+                pubdate UNINDEXED,
+                tokenize = 'porter unicode61'
+            )"""
+        )
+        self._conn.commit()
+
+    def load(
+        self,
+        rows: Iterable[Dict],
+        mesh_filter: Optional[Set[str]] = None,
+        batch_size: int = LOAD_BATCH_SIZE,
+    ) -> Dict[str, int]:
+        """
+        Insert or replace articles, applying deletions, in batched transactions.
+
+        Args:
+            rows: Output of ``iter_pubmed_xml``
+            mesh_filter: Keep only articles with at least one of these MeSH headings
+            batch_size: Articles per transaction
+
+        Returns:
+            Counts of "loaded", "skipped" and "deleted" articles
+        """
+        counts = {"loaded": 0, "skipped": 0, "deleted": 0}
+        wanted = {m.lower() for m in mesh_filter} if mesh_filter else None
+        batch: List[Dict] = []
+
+        def flush():
+            with self._lock:
+                self._conn.executemany(
+                    "DELETE FROM articles WHERE rowid = ?", [(int(r["pmid"]),) for r in batch]
+                )
+                self._conn.executemany(
+                    """INSERT INTO articles (rowid, title, abstract, mesh, pubtypes, journal, pubdate)
+                       VALUES (:rowid, :title, :abstract, :mesh, :pubtypes, :journal, :pubdate)""",
+                    [{**r, "rowid": int(r["pmid"])} for r in batch],
+                )
+                self._conn.commit()
+            counts["loaded"] += len(batch)
+            batch.clear()
+
+        for row in rows:
+            if "delete" in row:
+                flush()
+                with self._lock:
+                    self._conn.executemany(
+                        "DELETE FROM articles WHERE rowid = ?", [(int(p),) for p in row["delete"]]
+                    )
+                    self._conn.commit()
+                counts["deleted"] += len(row["delete"])
+                continue
+            if wanted is not None and not wanted.intersection(
+                m.strip().lower() for m in row["mesh"].split(";")
+            ):
+                counts["skipped"] += 1
+                continue
+            batch.append(row)
+            if len(batch) >= batch_size:
+                flush()
+        flush()
+        return counts
+
+    def optimize(self) -> None:
+        """Merge the FTS index segments (run after large loads)."""
+        with self._lock:
+            self._conn.execute("INSERT INTO articles(articles) VALUES ('optimize')")
+            self._conn.commit()
+
+    def search(self, query: str, max_results: int = 5) -> List[str]:
+        """Return the PMIDs best matching a PubMed-style query."""
+        expr = to_fts_query(query)
+        if not expr:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT rowid FROM articles WHERE articles MATCH ? ORDER BY bm25(articles) LIMIT ?",
+                (expr, max_results),
+            ).fetchall()
+        return [str(r[0]) for r in rows]
+
+    def abstracts(self, pmids: List[str]) -> Dict[str, str]:
+        """Abstract text for PMIDs present in the index."""
+        ids = list(dict.fromkeys(int(p) for p in pmids if str(p).isdigit()))
+        found = {}
+        with self._lock:
+            for start in range(0, len(ids), 500):
+                batch = ids[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                for pmid, abstract in self._conn.execute(
+                    f"SELECT rowid, abstract FROM articles WHERE rowid IN ({placeholders})", batch
+                ):
+                    found[str(pmid)] = abstract or ""
+        return found
+
+    def summaries(self, pmids: List[str]) -> Dict[str, Dict]:
+        """Title/journal/date for PMIDs present in the index."""
+        ids = list(dict.fromkeys(int(p) for p in pmids if str(p).isdigit()))
+        papers = {}
+        with self._lock:
+            for start in range(0, len(ids), 500):
+                batch = ids[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                for pmid, title, journal, pubdate in self._conn.execute(
+                    f"SELECT rowid, title, journal, pubdate FROM articles WHERE rowid IN ({placeholders})",
+                    batch,
+                ):
+                    papers[str(pmid)] = {
+                        "pmid": str(pmid), "title": title, "journal": journal, "pubdate": pubdate,
+                    }
+        return papers
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
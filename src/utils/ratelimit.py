@@ -0,0 +1,67 @@
+"""Thread-safe rate limiting utilities."""
+import asyncio
+import threading
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter shared between threads.
+
+    Tokens refill continuously at ``rate`` per second up to ``capacity``.
+    Each request takes one token and only waits when the bucket is empty,
+    so time already spent on the previous request counts towards the budget.
+
+    Args:
+        rate: Tokens added per second
+        capacity: Maximum burst size (default: 1, i.e. evenly spaced requests)
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else 1.0
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """
+        Block until tokens are available and take them.
+
+        Returns:
+            Seconds spent waiting
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+    async def acquire_async(self, tokens: float = 1.0) -> float:
+        """
+        Like ``acquire`` but sleeps with ``asyncio.sleep``, for use in coroutines.
+
+        Returns:
+            Seconds spent waiting
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                wait = (tokens - self._tokens) / self.rate
+            await asyncio.sleep(wait)
+            waited += wait
@@ -1,7 +1,8 @@
 """Reddit data collection utilities using PRAW."""
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import List, Dict
+from typing import Callable, Iterable, Iterator, List, Dict, Optional
 import praw
 from dotenv import load_dotenv
 
@@ -19,23 +20,65 @@ def get_reddit_client() -> praw.Reddit:
     )
 
 
+# reddit.info() accepts at most 100 fullnames per request
+INFO_BATCH_SIZE = 100
+
+# "Load more comments" stubs expanded per thread (each one is an API request)
+REPLACE_MORE_LIMIT = 8
+
+# Comments shorter than this rarely contain a claim
+MIN_COMMENT_LENGTH = 40
+
+
+def post_to_row(post) -> Dict:
+    """
+    Build a post row from the data that came with the listing.
+
+    Reads the submission's loaded attributes directly, because accessing a
+    missing attribute on a PRAW object triggers an extra request per post.
+    """
+    data = vars(post)
+    author = data.get("author")
+    return {
+        "id": data["id"],
+        "title": data.get("title", ""),
+        "selftext": data.get("selftext", ""),
+        "url": data.get("url", ""),
+        "score": data.get("score", 0),
+        "num_comments": data.get("num_comments", 0),
+        "created_utc": datetime.fromtimestamp(data["created_utc"], tz=timezone.utc).isoformat(),
+        "author": author.name if author is not None else "[deleted]",
+    }
+
+
 def fetch_posts(
     subreddit_name: str = "longevity",
     days_back: int = 365,
-    max_posts: int = 10000
+    max_posts: int = 10000,
+    since_utc: Optional[float] = None,
+    is_seen: Optional[Callable[[str], bool]] = None,
+    reddit: Optional[praw.Reddit] = None,
 ) -> List[Dict]:
     """
     Fetch posts from a subreddit within the specified time window.
     
+    Listings are newest-first, so paging stops as soon as a post older than
+    the cutoff or at or below ``since_utc`` is reached. Posts ``is_seen``
+    reports as collected are skipped but do not stop paging: other
+    collectors (e.g. RSS) record posts without covering everything older.
+    
     Args:
         subreddit_name: Name of the subreddit (default: "longevity")
         days_back: How many days back to fetch (default: 365)
         max_posts: Maximum number of posts to fetch (default: 10000)
+        since_utc: High-water mark from a previous run (epoch seconds)
+        is_seen: Returns True for post IDs collected before, to skip them
+        reddit: Client to use (default: a new authenticated client)
     
     Returns:
         List of dictionaries containing post data
     """
-    reddit = get_reddit_client()
+    reddit = reddit or get_reddit_client()
     sub = reddit.subreddit(subreddit_name)
     
     cutoff = datetime.now(timezone.utc) - timedelta(days=days_back)
@@ -46,28 +89,163 @@ def fetch_posts(
     print(f"Fetching posts from r/{subreddit_name} (last {days_back} days)...")
     
     for post in sub.new(limit=None):
-        created = datetime.fromtimestamp(post.created_utc, tz=timezone.utc)
+        row = post_to_row(post)
+        created_utc = vars(post)["created_utc"]
+        
+        if created_utc < cutoff.timestamp():
+            break
         
-        if created < cutoff:
+        if since_utc is not None and created_utc <= since_utc:
+            print(f"  r/{subreddit_name}: reached posts from a previous run, stopping")
             break
         
-        rows.append({
-            "id": post.id,
-            "title": post.title,
-            "selftext": post.selftext,
-            "url": post.url,
-            "score": post.score,
-            "num_comments": post.num_comments,
-            "created_utc": created.isoformat(),
-            "author": str(post.author),
-        })
+        if is_seen is not None and is_seen(row["id"]):
+            continue
+        
+        rows.append(row)
         
         count += 1
         if count % 100 == 0:
-            print(f"  Fetched {count} posts...")
+            print(f"  r/{subreddit_name}: fetched {count} posts...")
         
         if count >= max_posts:
             break
     
-    print(f"✓ Fetched {len(rows)} posts")
+    print(f"✓ Fetched {len(rows)} posts from r/{subreddit_name}")
     return rows
+
+
+def fetch_posts_bulk(
+    subreddit_names: List[str],
+    days_back: int = 365,
+    max_posts: int = 10000,
+    since_utc: Optional[Dict[str, float]] = None,
+    is_seen: Optional[Callable[[str], bool]] = None,
+    workers: int = 4,
+) -> Dict[str, List[Dict]]:
+    """
+    Fetch listings for several subreddits in parallel.
+    
+    Each worker thread uses its own Reddit client, since PRAW instances are
+    not thread-safe. PRAW's own rate-limit handling still applies per client.
+    
+    Args:
+        subreddit_names: Subreddits to fetch
+        days_back: How many days back to fetch
+        max_posts: Maximum posts per subreddit
+        since_utc: High-water mark per subreddit from previous runs
+        is_seen: Returns True for post IDs collected before, to skip them
+        workers: Subreddits fetched at once
+    
+    Returns:
+        Mapping of subreddit name to its post rows
+    """
+    since_utc = since_utc or {}
+    
+    def fetch(name: str) -> List[Dict]:
+        return fetch_posts(
+            subreddit_name=name,
+            days_back=days_back,
+            max_posts=max_posts,
+            since_utc=since_utc.get(name),
+            is_seen=is_seen,
+            reddit=get_reddit_client(),
+        )
+    
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(subreddit_names)))) as pool:
+        return dict(zip(subreddit_names, pool.map(fetch, subreddit_names)))
+
+
+def refresh_scores(
+    post_ids: Iterable[str],
+    reddit: Optional[praw.Reddit] = None,
+    batch_size: int = INFO_BATCH_SIZE,
+) -> Dict[str, Dict]:
+    """
+    Look up current score and comment count for posts we already have.
+    
+    Uses ``reddit.info`` with up to 100 fullnames per request instead of
+    loading each submission on its own.
+    
+    Args:
+        post_ids: Post IDs (without the ``t3_`` prefix)
+        reddit: Client to use (default: a new authenticated client)
+        batch_size: Fullnames per request (max 100)
+    
+    Returns:
+        Mapping of post ID to {"score", "num_comments"}; deleted posts are omitted
+    """
+    reddit = reddit or get_reddit_client()
+    fullnames = [f"t3_{pid}" for pid in dict.fromkeys(str(p) for p in post_ids)]
+    
+    updates = {}
+    for start in range(0, len(fullnames), batch_size):
+        for post in reddit.info(fullnames=fullnames[start:start + batch_size]):
+            data = vars(post)
+            updates[data["id"]] = {
+                "score": data.get("score", 0),
+                "num_comments": data.get("num_comments", 0),
+            }
+    return updates
+
+
+def iter_comments(
+    post_ids: Iterable[str],
+    reddit: Optional[praw.Reddit] = None,
+    replace_more_limit: Optional[int] = REPLACE_MORE_LIMIT,
+    min_length: int = MIN_COMMENT_LENGTH,
+) -> Iterator[Dict]:
+    """
+    Stream flattened comment rows for each post's comment tree.
+    
+    Each thread's "load more comments" stubs are expanded at most
+    ``replace_more_limit`` times, then the tree is walked depth-first and
+    rows are yielded one at a time, so callers can write them out in
+    chunks instead of holding every comment of every thread in memory.
+    Deleted, removed and very short comments are skipped.
+    
+    Args:
+        post_ids: Posts whose comments to fetch
+        reddit: Client to use (default: a new authenticated client)
+        replace_more_limit: Stubs expanded per thread (None = all, 0 = none)
+        min_length: Minimum comment length kept
+    
+    Yields:
+        Comment dictionaries with id, post_id, parent_id, body, score,
+        created_utc, author and depth
+    
+    Raises:
+        Whatever PRAW raises when a comment tree cannot be loaded (rate
+        limit, network error), so callers never mistake a failed thread
+        for one without comments
+    """
+    reddit = reddit or get_reddit_client()
+    
+    for post_id in post_ids:
+        submission = reddit.submission(id=str(post_id))
+        submission.comments.replace_more(limit=replace_more_limit)
+        
+        stack = list(reversed(submission.comments))
+        while stack:
+            comment = stack.pop()
+            if isinstance(comment, praw.models.MoreComments):
+                continue  # stub left over once the replace_more budget is spent
+            data = vars(comment)
+            stack.extend(reversed(data.get("_replies") or []))
+            
+            body = data.get("body") or ""
+            if body in ("[deleted]", "[removed]") or len(body) < min_length:
+                continue
+            author = data.get("author")
+            yield {
+                "id": data["id"],
+                "post_id": str(post_id),
+                "parent_id": data.get("parent_id", ""),
+                "body": body,
+                "score": data.get("score", 0),
+                "created_utc": datetime.fromtimestamp(
+                    data["created_utc"], tz=timezone.utc
+                ).isoformat(),
+                "author": author.name if author is not None else "[deleted]",
+                "depth": data.get("depth", 0),
+            }
\ No newline at end of file
@@ -0,0 +1,167 @@
+"""Full-text search over evidence claims and explanations (SQLite FTS5)."""
+import os
+import re
+import sqlite3
+import threading
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Rows inserted per transaction
+INSERT_BATCH_SIZE = 5000
+
+# bm25 column weights: a match in the claim counts more than one in the explanation
+CLAIM_WEIGHT = 2.0
+EXPLANATION_WEIGHT = 1.0
+
+_QUERY_TOKEN = re.compile(r'"[^"]*"?|\S+')
+
+
+def to_match_query(text: str) -> str:
+    """
+    Translate dashboard search input into an FTS5 MATCH expression.
+
+    Words must all match (in any order); "quoted text" matches as a phrase;
+    a trailing * matches any word starting with the prefix; OR between two
+    terms matches either. Punctuation never reaches FTS5, so any input is a
+    valid query.
+    """
+    parts: List[str] = []
+    for token in _QUERY_TOKEN.findall(text):
+        if token == "OR":
+            if parts and parts[-1] != "OR":
+                parts.append("OR")
+            continue
+        if token.startswith('"'):
+            words = re.findall(r"\w+", token)
+            if words:
+                parts.append('"' + " ".join(words) + '"')
+            continue
+        words = re.findall(r"\w+", token)
+        for i, word in enumerate(words):
+            prefix = token.endswith("*") and i == len(words) - 1
+            parts.append(f'"{word}"' + ("*" if prefix else ""))
+    while parts and parts[-1] == "OR":
+        parts.pop()
+    return " ".join(parts)
+
+
+class EvidenceSearchIndex:
+    """
+    FTS5 index of claim and explanation text, keyed by claim_id.
+
+    Kept up to date by EvidenceStore.append, so the dashboard searches an
+    inverted index instead of scanning every row. Re-indexing a claim_id
+    replaces its previous text, matching the store's newest-row-wins reads.
+
+    Args:
+        path: SQLite file (":memory:" for a throwaway index)
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # FTS rowids come from this table so replacements by claim_id are direct lookups
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS claim_ids (id INTEGER PRIMARY KEY, claim_id TEXT UNIQUE NOT NULL)"
+        )
+        self._conn.execute(
+            """CREATE VIRTUAL TABLE IF NOT EXISTS claims USING fts5(
+                claim,
+                explanation,
+                tokenize = 'porter unicode61',
+                prefix = '2 3'
+            )"""
+        )
+        self._conn.commit()
+
+    def add(self, rows: Iterable[Tuple[str, str, str]]) -> int:
+        """
+        Insert or replace (claim_id, claim, explanation) rows.
+
+        Returns:
+            Number of rows indexed
+        """
+        count = 0
+        batch: List[Tuple[str, str, str]] = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= INSERT_BATCH_SIZE:
+                count += self._add_batch(batch)
+                batch = []
+        if batch:
+            count += self._add_batch(batch)
+        return count
+
+    def _add_batch(self, batch: List[Tuple[str, str, str]]) -> int:
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO claim_ids (claim_id) VALUES (?)", [(r[0],) for r in batch]
+            )
+            rowids = {}
+            keys = list({r[0] for r in batch})
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rowids.update(self._conn.execute(
+                    f"SELECT claim_id, id FROM claim_ids WHERE claim_id IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                ))
+            # Later rows for the same claim_id win
+            rows = {rowids[claim_id]: (claim, explanation) for claim_id, claim, explanation in batch}
+            self._conn.executemany("DELETE FROM claims WHERE rowid = ?", [(i,) for i in rows])
+            self._conn.executemany(
+                "INSERT INTO claims (rowid, claim, explanation) VALUES (?, ?, ?)",
+                [(i, claim, explanation) for i, (claim, explanation) in rows.items()],
+            )
+            self._conn.commit()
+        return len(batch)
+
+    def row_ids(self, claim_ids: Sequence[str]) -> np.ndarray:
+        """Index row ID of each claim_id (-1 for claims not in the index)."""
+        with self._lock:
+            rows = self._conn.execute("SELECT claim_id, id FROM claim_ids").fetchall()
+        if not rows:
+            return np.full(len(claim_ids), -1, dtype=np.int64)
+        known, ids = zip(*rows)
+        found = pd.Index(known).get_indexer(list(claim_ids))
+        return np.where(found >= 0, np.asarray(ids, dtype=np.int64)[found], -1)
+
+    def search(self, text: str, limit: Optional[int] = None, ranked: bool = True) -> np.ndarray:
+        """
+        Index row IDs of the claims matching the search input.
+
+        Args:
+            text: Dashboard search input (see ``to_match_query``)
+            limit: Maximum number of matches (default: all)
+            ranked: Best bm25 match first; unranked is much cheaper for common terms
+
+        Returns:
+            Row IDs (map them to claims with ``row_ids``); empty if the input
+            has no searchable words
+        """
+        expr = to_match_query(text)
+        if not expr:
+            return np.empty(0, dtype=np.int64)
+        order = f"ORDER BY bm25(claims, {CLAIM_WEIGHT}, {EXPLANATION_WEIGHT})" if ranked else ""
+        with self._lock:
+            cursor = self._conn.execute(
+                f"SELECT rowid FROM claims WHERE claims MATCH ? {order} LIMIT ?",
+                (expr, -1 if limit is None else limit),
+            )
+            return np.fromiter((r[0] for r in cursor), dtype=np.int64)
+
+    def clear(self) -> None:
+        """Remove every indexed claim."""
+        with self._lock:
+            self._conn.execute("DELETE FROM claims")
+            self._conn.execute("DELETE FROM claim_ids")
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM claim_ids").fetchone()[0]
@@ -0,0 +1,130 @@
+"""Pipeline state shared between runs, so each stage only works on new data."""
+import hashlib
+import os
+import sqlite3
+import json
+import threading
+import time
+from typing import Any, Iterable, List, Optional
+
+# Kinds of IDs tracked by the state store
+COLLECTED_POSTS = "collected_post"
+COLLECTED_COMMENTS = "collected_comments"  # keyed by post ID
+EXTRACTED_POSTS = "extracted_post"
+EXTRACTED_COMMENTS = "extracted_comment"
+EVALUATED_CLAIMS = "evaluated_claim"
+# Posts seen by stream_ingest.py; kept apart from COLLECTED_POSTS so the live
+# stream never makes 01_collect.py think it already has a post
+STREAMED_POSTS = "streamed_post"
+
+
+def claim_hash(post_id: str, claim: str) -> str:
+    """Stable ID for a claim: hash of its post and normalized text."""
+    normalized = " ".join(str(claim).lower().split())
+    return hashlib.sha1(f"{post_id}\x00{normalized}".encode("utf-8")).hexdigest()[:16]
+
+
+class PipelineState:
+    """
+    SQLite-backed record of what earlier runs already processed.
+
+    Stores sets of processed IDs per kind (collected posts, extracted posts,
+    evaluated claims), named high-water marks such as the newest
+    ``created_utc`` seen per subreddit, and small JSON values such as the
+    HTTP validators of fetched feeds.
+
+    Args:
+        path: SQLite file (default: PIPELINE_STATE_PATH or data/state.sqlite)
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv("PIPELINE_STATE_PATH", "data/state.sqlite")
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS processed (
+                kind TEXT NOT NULL,
+                id TEXT NOT NULL,
+                processed_at REAL NOT NULL,
+                PRIMARY KEY (kind, id)
+            )"""
+        )
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS high_water (
+                key TEXT PRIMARY KEY,
+                value REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            )"""
+        )
+        self._conn.commit()
+
+    def filter_new(self, kind: str, ids: Iterable[str]) -> List[str]:
+        """Return the IDs (in input order) that have not been marked for ``kind``."""
+        ids = [str(i) for i in ids]
+        seen = set()
+        with self._lock:
+            for start in range(0, len(ids), 500):
+                batch = ids[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                seen.update(
+                    row[0] for row in self._conn.execute(
+                        f"SELECT id FROM processed WHERE kind = ? AND id IN ({placeholders})",
+                        [kind, *batch],
+                    )
+                )
+        return [i for i in ids if i not in seen]
+
+    def is_processed(self, kind: str, id_: str) -> bool:
+        """True if ``id_`` has been marked for ``kind``."""
+        return not self.filter_new(kind, [id_])
+
+    def mark(self, kind: str, ids: Iterable[str]) -> None:
+        """Record IDs as processed for ``kind``."""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO processed (kind, id, processed_at) VALUES (?, ?, ?)",
+                [(kind, str(i), now) for i in ids],
+            )
+            self._conn.commit()
+
+    def get_high_water(self, key: str) -> Optional[float]:
+        """Return the high-water mark stored under ``key``, if any."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM high_water WHERE key = ?", (key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def set_high_water(self, key: str, value: float) -> None:
+        """Raise the high-water mark for ``key`` to ``value`` (never lowers it)."""
+        with self._lock:
+            self._conn.execute(
+                """INSERT INTO high_water (key, value) VALUES (?, ?)
+                   ON CONFLICT(key) DO UPDATE SET value = MAX(value, excluded.value)""",
+                (key, value),
+            )
+            self._conn.commit()
+
+    def get_meta(self, key: str) -> Optional[Any]:
+        """Return the JSON value stored under ``key``, if any."""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set_meta(self, key: str, value: Any) -> None:
+        """Store a JSON-serializable value under ``key``."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                (key, json.dumps(value)),
+            )
+            self._conn.commit()
@@ -0,0 +1,460 @@
+"""Partitioned parquet store for evidence results."""
+import hashlib
+import json
+import os
+import re
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Sequence, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows: fragments are still uniquely named, just unlocked
+    fcntl = None
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from src.utils.search_index import EvidenceSearchIndex
+
+DEFAULT_STORE_DIR = "data/processed/evidence"
+
+# Columns used as hive partitions: date=YYYY-MM-DD/topic_key=<slug>/
+PARTITION_COLUMNS = ["date", "topic_key"]
+
+# Fixed types for known columns so every fragment shares one schema
+STRING_COLUMNS = [
+    "claim_id", "claim", "topic", "type", "direction", "target", "post_id",
+    "created_utc", "evidence_level", "explanation", "pmid_list", "post_url", "comment_id",
+    "duplicate_of", "canonical_claim_id",
+]
+INT_COLUMNS = ["post_score", "post_comments", "num_papers_found"]
+
+# Fragments a partition may collect before append() compacts it
+COMPACT_THRESHOLD = 64
+
+# Full-text index of claims and explanations, kept next to the fragments
+SEARCH_INDEX_FILE = "search.sqlite"
+
+# Dataset version, row count, content hash and fragment list, rewritten on every change
+MANIFEST_FILE = "manifest.json"
+
+
+def topic_key(topic: Optional[str]) -> str:
+    """Filesystem-safe partition value for a topic ("NAD+" -> "nad-plus")."""
+    text = str(topic or "").lower().replace("+", " plus ")
+    slug = re.sub(r"[^a-z0-9]+", "-", text).strip("-")
+    return slug[:60] or "unknown"
+
+
+def _normalize(df: pd.DataFrame) -> pd.DataFrame:
+    """Coerce known columns to their fixed types."""
+    df = df.copy()
+    for col in STRING_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype("string")
+    for col in INT_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0).astype("int64")
+    return df
+
+
+class EvidenceStore:
+    """
+    Evidence results as one parquet dataset partitioned by run date and topic.
+
+    Every append writes new fragment files, so existing data is never
+    rewritten. Reads push column projection and partition/row filters down
+    to pyarrow, so callers only load the slices they ask for.
+
+    Several processes can append at once: appends and reads take a shared
+    lock on ``<root>/.lock``, while compaction and claim drops take it
+    exclusively. Partitions that collect many small fragments are merged
+    back into one by ``compact()``, which append() runs automatically once
+    a partition passes ``compact_threshold`` fragments.
+
+    append() also adds each claim's text to a full-text search index
+    (``<root>/search.sqlite``, see ``search_index()``), and every change
+    bumps the version in ``<root>/manifest.json`` (see ``manifest()``), so
+    readers can tell cheaply whether, and which, fragments changed.
+
+    Args:
+        root: Dataset directory (default: EVIDENCE_STORE_DIR or data/processed/evidence)
+        compact_threshold: Fragments per partition before auto-compaction (None = never)
+    """
+
+    def __init__(self, root: Optional[str] = None, compact_threshold: Optional[int] = COMPACT_THRESHOLD):
+        self.root = root or os.getenv("EVIDENCE_STORE_DIR", DEFAULT_STORE_DIR)
+        self.compact_threshold = compact_threshold
+        self._search_index: Optional[EvidenceSearchIndex] = None
+
+    @contextmanager
+    def _locked(self, exclusive: bool = False, name: str = ".lock") -> Iterator[None]:
+        """Hold the store-wide lock (shared for appends/reads, exclusive for rewrites)."""
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(self.root, exist_ok=True)
+        with open(os.path.join(self.root, name), "a") as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def fragments(self) -> List[str]:
+        """All fragment files currently in the store."""
+        paths = []
+        for dirpath, _, filenames in os.walk(self.root):
+            paths.extend(os.path.join(dirpath, f) for f in filenames if f.endswith(".parquet"))
+        return sorted(paths)
+
+    def is_empty(self) -> bool:
+        return not self.fragments()
+
+    def version(self) -> str:
+        """
+        Token that changes whenever the store's contents change.
+
+        Fragments are never modified in place and every append or compaction
+        writes newly named files, so the set of fragment names identifies
+        the data exactly.
+        """
+        return self.manifest()["content_hash"]
+
+    def manifest(self) -> Dict:
+        """
+        The store's manifest, rebuilt from the fragments if it is missing.
+
+        Returns:
+            Dictionary with "version" (incremented on every change), "rows"
+            (stored rows, including superseded ones), "content_hash",
+            "updated_at" and "fragments" (relative path -> row count)
+        """
+        try:
+            with open(os.path.join(self.root, MANIFEST_FILE)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return self.rebuild_manifest()
+
+    def rebuild_manifest(self) -> Dict:
+        """Recount every fragment and rewrite the manifest (e.g. for older stores)."""
+        if not os.path.isdir(self.root):
+            return _manifest_body(0, {})
+        with self._locked(name=".manifest.lock", exclusive=True):
+            previous = _read_json(os.path.join(self.root, MANIFEST_FILE))
+            fragments = {}
+            for path in self.fragments():
+                try:
+                    fragments[os.path.relpath(path, self.root)] = pq.read_metadata(path).num_rows
+                except FileNotFoundError:  # compacted away while listing
+                    continue
+            manifest = _manifest_body(previous.get("version", 0) + 1, fragments)
+            _write_json(os.path.join(self.root, MANIFEST_FILE), manifest)
+            return manifest
+
+    def _update_manifest(self, added: Dict[str, int], removed: Sequence[str] = ()) -> None:
+        """Record fragments written (absolute path -> rows) and removed, and bump the version."""
+        path = os.path.join(self.root, MANIFEST_FILE)
+        if not os.path.exists(path):
+            self.rebuild_manifest()
+            return
+        with self._locked(name=".manifest.lock", exclusive=True):
+            current = _read_json(path)
+            fragments = dict(current.get("fragments", {}))
+            for fragment in removed:
+                fragments.pop(os.path.relpath(fragment, self.root), None)
+            for fragment, rows in added.items():
+                fragments[os.path.relpath(fragment, self.root)] = rows
+            _write_json(path, _manifest_body(current.get("version", 0) + 1, fragments))
+
+    def append(self, df: pd.DataFrame, date: Optional[str] = None) -> List[str]:
+        """
+        Add rows to the store as new fragments, one per (date, topic) partition.
+
+        Args:
+            df: Evidence rows
+            date: Partition date (default: today); rows keep their own ``date`` if present
+
+        Returns:
+            Paths of the fragments written
+        """
+        if df.empty:
+            return []
+        df = _normalize(df)
+        if "date" not in df.columns:
+            df["date"] = date or datetime.now().strftime("%Y-%m-%d")
+        df["topic_key"] = df["topic"].map(topic_key) if "topic" in df.columns else "unknown"
+
+        written = {}
+        with self._locked():
+            for (day, key), group in df.groupby(PARTITION_COLUMNS, sort=False):
+                partition = os.path.join(self.root, f"date={day}", f"topic_key={key}")
+                table = pa.Table.from_pandas(
+                    group.drop(columns=PARTITION_COLUMNS), preserve_index=False
+                )
+                written[_write_fragment(partition, table)] = table.num_rows
+            self._update_manifest(written)
+
+        if "claim_id" in df.columns and "claim" in df.columns:
+            self.search_index().add(_search_rows(df))
+
+        if self.compact_threshold:
+            for partition in {os.path.dirname(p) for p in written}:
+                if len(_partition_fragments(partition)) > self.compact_threshold:
+                    self._compact_partition(partition)
+        return list(written)
+
+    def search_index(self) -> EvidenceSearchIndex:
+        """
+        The full-text index of claim and explanation text.
+
+        Claims dropped from the store stay in the index; searches should be
+        matched against the rows actually read from the store.
+        """
+        if self._search_index is None:
+            self._search_index = EvidenceSearchIndex(os.path.join(self.root, SEARCH_INDEX_FILE))
+        return self._search_index
+
+    def rebuild_search_index(self) -> int:
+        """
+        Re-index every claim currently in the store (e.g. data written before the index existed).
+
+        Returns:
+            Number of claims indexed
+        """
+        df = self.read(columns=["claim_id", "claim", "explanation"])
+        index = self.search_index()
+        index.clear()
+        if "claim_id" not in df.columns or "claim" not in df.columns:
+            return 0
+        return index.add(_search_rows(df))
+
+    def compact(self, date: Optional[str] = None) -> int:
+        """
+        Merge each partition's fragments into a single file.
+
+        Within a partition, rows sharing a claim_id collapse to the most
+        recently written one.
+
+        Args:
+            date: Only compact partitions for this run date (default: all)
+
+        Returns:
+            Number of partitions rewritten
+        """
+        prefix = os.path.join(self.root, f"date={date}", "") if date else ""
+        partitions = sorted({
+            os.path.dirname(f) for f in self.fragments() if f.startswith(prefix)
+        })
+        return sum(self._compact_partition(p) for p in partitions)
+
+    def _compact_partition(self, partition: str) -> bool:
+        with self._locked(exclusive=True):
+            fragments = _partition_fragments(partition)
+            if len(fragments) < 2:
+                return False
+            frames = [pd.read_parquet(f) for f in fragments]
+            df = _normalize(pd.concat(frames, ignore_index=True))
+            if "claim_id" in df.columns:
+                df = df.drop_duplicates("claim_id", keep="last")
+            merged = _write_fragment(partition, pa.Table.from_pandas(df, preserve_index=False))
+            for fragment in fragments:
+                os.remove(fragment)
+            self._update_manifest({merged: len(df)}, removed=fragments)
+            return True
+
+    def drop_claims(self, date: str, claim_ids: Sequence[str]) -> int:
+        """
+        Remove the rows for ``claim_ids`` from the ``date`` partitions.
+
+        Fragments holding none of them are left untouched; the others are
+        rewritten without those rows. Rows for other claims (e.g. added by
+        add_post.py or the stream) stay.
+
+        Returns:
+            Number of rows removed
+        """
+        drop = set(map(str, claim_ids))
+        prefix = os.path.join(self.root, f"date={date}", "")
+        removed_rows = 0
+        with self._locked(exclusive=True):
+            for fragment in [f for f in self.fragments() if f.startswith(prefix)]:
+                df = pd.read_parquet(fragment)
+                if "claim_id" not in df.columns:
+                    continue
+                keep = ~df["claim_id"].astype(str).isin(drop)
+                if keep.all():
+                    continue
+                removed_rows += int((~keep).sum())
+                added = {}
+                if keep.any():
+                    table = pa.Table.from_pandas(_normalize(df[keep]), preserve_index=False)
+                    added[_write_fragment(os.path.dirname(fragment), table)] = table.num_rows
+                os.remove(fragment)
+                self._update_manifest(added, removed=[fragment])
+        return removed_rows
+
+    def dataset(self, fragments: Optional[Sequence[str]] = None) -> Optional[ds.Dataset]:
+        """The store (or only ``fragments``) as a pyarrow dataset with one schema, or None if empty."""
+        fragments = self.fragments() if fragments is None else list(fragments)
+        if not fragments:
+            return None
+        schema = pa.unify_schemas(
+            [pq.read_schema(f) for f in fragments], promote_options="permissive"
+        )
+        partitioning = ds.partitioning(
+            pa.schema([("date", pa.string()), ("topic_key", pa.string())]), flavor="hive"
+        )
+        for field in partitioning.schema:
+            if schema.get_field_index(field.name) == -1:
+                schema = schema.append(field)
+        return ds.dataset(
+            fragments, schema=schema, format="parquet",
+            partitioning=partitioning, partition_base_dir=self.root,
+        )
+
+    def read(
+        self,
+        columns: Optional[Sequence[str]] = None,
+        topic: Optional[str] = None,
+        evidence_level: Optional[Union[str, Sequence[str]]] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        filter: Optional[ds.Expression] = None,
+        latest_only: bool = True,
+    ) -> pd.DataFrame:
+        """
+        Read a slice of the store.
+
+        Args:
+            columns: Columns to load (default: all)
+            topic: Only this topic (prunes partitions by topic_key)
+            evidence_level: Only these evidence level(s)
+            date_from / date_to: Inclusive run-date bounds (YYYY-MM-DD)
+            filter: Extra pyarrow expression ANDed with the above
+            latest_only: Keep only the newest row per claim_id
+
+        Returns:
+            DataFrame with the requested columns (empty if nothing matches)
+        """
+        with self._locked():
+            return self._read(
+                columns, topic, evidence_level, date_from, date_to, filter, latest_only
+            )
+
+    def _read(self, columns, topic, evidence_level, date_from, date_to, filter, latest_only):
+        dataset = self.dataset()
+        if dataset is None:
+            return pd.DataFrame(columns=list(columns or []))
+
+        expr = filter
+        conditions = []
+        if topic is not None:
+            conditions.append(ds.field("topic_key") == topic_key(topic))
+            conditions.append(ds.field("topic") == topic)
+        if evidence_level is not None:
+            levels = [evidence_level] if isinstance(evidence_level, str) else list(evidence_level)
+            conditions.append(ds.field("evidence_level").isin(levels))
+        if date_from is not None:
+            conditions.append(ds.field("date") >= date_from)
+        if date_to is not None:
+            conditions.append(ds.field("date") <= date_to)
+        for condition in conditions:
+            expr = condition if expr is None else expr & condition
+
+        names = set(dataset.schema.names)
+        wanted = list(columns) if columns is not None else [
+            n for n in dataset.schema.names if n != "topic_key"
+        ]
+        load = [c for c in wanted if c in names]
+        dedupe = latest_only and "claim_id" in names
+        if dedupe:
+            load += [c for c in ("claim_id", "date") if c not in load]
+
+        df = dataset.to_table(columns=load, filter=expr).to_pandas()
+        if dedupe:
+            df = df.sort_values("date", kind="stable").drop_duplicates("claim_id", keep="last")
+            df = df[[c for c in wanted if c in df.columns]].reset_index(drop=True)
+        return df
+
+    def read_fragments(self, fragments: Sequence[str], columns: Sequence[str]) -> pd.DataFrame:
+        """
+        Read whole fragments, as listed in the manifest (paths relative to the root).
+
+        Adds the partition ``date`` and a ``fragment`` column holding each
+        row's relative fragment path. No deduplication by claim_id is done.
+        """
+        with self._locked():
+            dataset = self.dataset([os.path.join(self.root, f) for f in fragments])
+            if dataset is None:
+                return pd.DataFrame(columns=list(columns) + ["date", "fragment"])
+            names = set(dataset.schema.names)
+            load = [c for c in columns if c in names and c != "date"] + ["date", "__filename"]
+            df = dataset.to_table(columns=load).to_pandas()
+        df["fragment"] = [os.path.relpath(f, self.root) for f in df.pop("__filename")]
+        return df
+
+
+def _search_rows(df: pd.DataFrame) -> Iterator[tuple]:
+    """(claim_id, claim, explanation) tuples for the search index, skipping rows without an ID."""
+    df = df[df["claim_id"].notna()]
+    claims = df["claim"].fillna("").astype(str)
+    explanations = (
+        df["explanation"].fillna("").astype(str) if "explanation" in df.columns
+        else pd.Series("", index=df.index)
+    )
+    return zip(df["claim_id"].astype(str), claims, explanations)
+
+
+def _manifest_body(version: int, fragments: Dict[str, int]) -> Dict:
+    digest = hashlib.sha1()
+    for name in sorted(fragments):
+        digest.update(name.encode("utf-8") + b"\0")
+    return {
+        "version": version,
+        "rows": sum(fragments.values()),
+        "content_hash": digest.hexdigest(),
+        "updated_at": datetime.now().isoformat(timespec="seconds"),
+        "fragments": fragments,
+    }
+
+
+def _read_json(path: str) -> Dict:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_json(path: str, data: Dict) -> None:
+    """Write JSON atomically, so readers never see a partial file."""
+    tmp = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def _partition_fragments(partition: str) -> List[str]:
+    """Fragment files of one partition directory, oldest first."""
+    if not os.path.isdir(partition):
+        return []
+    return sorted(
+        os.path.join(partition, f) for f in os.listdir(partition) if f.endswith(".parquet")
+    )
+
+
+def _write_fragment(partition: str, table: pa.Table) -> str:
+    """Atomically write ``table`` as a new fragment named so that names sort by write time."""
+    os.makedirs(partition, exist_ok=True)
+    name = f"part-{time.time_ns():020d}-{uuid.uuid4().hex[:8]}.parquet"
+    path = os.path.join(partition, name)
+    tmp = os.path.join(partition, f".{name}.tmp")
+    pq.write_table(table, tmp)
+    os.replace(tmp, path)
+    return path
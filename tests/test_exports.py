@@ -0,0 +1,47 @@
+"""Exports must be well formed however many chunks they are written in."""
+import json
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.utils.dashboard import EvidenceIndex
+from src.utils.exports import write_export
+
+
+def make_index(n):
+    return EvidenceIndex(pd.DataFrame({
+        "claim_id": [f"c{i:03d}" for i in range(n)],
+        "claim": [f"claim {i}" for i in range(n)],
+        "explanation": ["line one\nline two"] * n,
+        "topic": ["rapamycin"] * n,
+        "evidence_level": ["weak_support"] * n,
+        "post_score": list(range(n)),
+    }))
+
+
+def test_jsonl_every_line_is_a_record(tmp_path):
+    index = make_index(11)
+    path = tmp_path / "claims.jsonl"
+    assert write_export(index, {}, "jsonl", str(path), chunk_rows=4) == 11
+    lines = path.read_text(encoding="utf-8").split("\n")
+    assert lines[-1] == ""
+    records = [json.loads(line) for line in lines[:-1]]
+    assert [r["claim_id"] for r in records] == list(index.view()["claim_id"])
+
+
+def test_csv_has_one_header(tmp_path):
+    index = make_index(11)
+    path = tmp_path / "claims.csv"
+    write_export(index, {}, "csv", str(path), chunk_rows=4)
+    assert len(pd.read_csv(path)) == 11
+
+
+def test_markdown_lists_top_ten(tmp_path):
+    index = make_index(25)
+    path = tmp_path / "report.md"
+    assert write_export(index, {}, "md", str(path), chunk_rows=4) == 10
+    text = path.read_text(encoding="utf-8")
+    assert text.count("\n### ") == 10
+    assert "Total claims analyzed: 25" in text
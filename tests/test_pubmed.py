@@ -0,0 +1,121 @@
+"""PubMed client: query keys, rate limiting and retries, without the network."""
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.utils import pubmed
+from src.utils.pubmed import normalize_query
+from src.utils.ratelimit import TokenBucket
+
+
+def test_normalize_query_keeps_operators():
+    assert normalize_query("Rapamycin  AND\tMice") == normalize_query("rapamycin AND mice")
+    assert normalize_query("rapamycin OR metformin") != normalize_query("rapamycin or metformin")
+    assert normalize_query("(A NOT b)") == "(a NOT b)"
+    assert normalize_query("ORANGE juice") == "orange juice"
+
+
+class StubAdapter(requests.adapters.BaseAdapter):
+    """Answers requests with the given status codes in turn, recording each one."""
+
+    def __init__(self, statuses, headers=None):
+        super().__init__()
+        self.statuses = list(statuses)
+        self.headers = headers or {}
+        self.requests = []
+
+    def send(self, request, **kwargs):
+        self.requests.append(request)
+        response = requests.Response()
+        response.status_code = self.statuses.pop(0)
+        response.headers.update(self.headers)
+        response._content = b"{}"
+        response.request = request
+        response.url = request.url
+        return response
+
+    def close(self):
+        pass
+
+
+class CountingBucket(TokenBucket):
+    """Never waits; counts the tokens taken."""
+
+    def __init__(self):
+        super().__init__(rate=1.0)
+        self.acquired = 0
+
+    def acquire(self, tokens=1.0):
+        self.acquired += 1
+        return 0.0
+
+
+@pytest.fixture
+def stub_eutils(monkeypatch):
+    """Point the shared session at a StubAdapter and record the backoff sleeps."""
+    def install(statuses, headers=None):
+        adapter = StubAdapter(statuses, headers)
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        bucket = CountingBucket()
+        sleeps = []
+        monkeypatch.setattr(pubmed, "_session", session)
+        monkeypatch.setattr(pubmed, "_limiter", bucket)
+        monkeypatch.setattr(pubmed.time, "sleep", sleeps.append)
+        return adapter, bucket, sleeps
+    return install
+
+
+def test_token_bucket_paces_requests():
+    rate, capacity, n = 50.0, 5, 20
+    bucket = TokenBucket(rate=rate, capacity=capacity)
+    start = time.monotonic()
+    for _ in range(n):
+        bucket.acquire()
+    assert time.monotonic() - start >= (n - capacity) / rate * 0.95
+
+
+def test_token_bucket_is_shared_between_threads():
+    rate, n = 100.0, 30
+    bucket = TokenBucket(rate=rate)
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        list(pool.map(lambda _: bucket.acquire(), range(n)))
+    assert time.monotonic() - start >= (n - 1) / rate * 0.95
+
+
+def test_retries_take_a_token_per_attempt(stub_eutils):
+    adapter, bucket, sleeps = stub_eutils([429, 503, 200])
+    response = pubmed.eutils_request("esearch.fcgi", params={"term": "rapamycin"})
+    assert response.status_code == 200
+    assert len(adapter.requests) == 3
+    assert bucket.acquired == 3
+    assert len(sleeps) == 2 and sleeps[0] < sleeps[1]
+
+
+def test_retry_after_is_honoured(stub_eutils):
+    adapter, bucket, sleeps = stub_eutils([429, 200], headers={"Retry-After": "7"})
+    pubmed.eutils_request("esummary.fcgi", data={"id": "1,2"})
+    assert adapter.requests[0].method == "POST"
+    assert sleeps == [7.0]
+
+
+def test_gives_up_after_max_attempts(stub_eutils):
+    adapter, bucket, sleeps = stub_eutils([503] * pubmed.MAX_ATTEMPTS)
+    with pytest.raises(requests.HTTPError):
+        pubmed.eutils_request("esearch.fcgi", params={"term": "rapamycin"})
+    assert bucket.acquired == pubmed.MAX_ATTEMPTS
+    assert len(sleeps) == pubmed.MAX_ATTEMPTS - 1
+
+
+def test_client_errors_are_not_retried(stub_eutils):
+    adapter, bucket, sleeps = stub_eutils([400])
+    with pytest.raises(requests.HTTPError):
+        pubmed.eutils_request("esearch.fcgi", params={"term": "rapamycin"})
+    assert len(adapter.requests) == 1 and not sleeps
@@ -0,0 +1,33 @@
+"""Evidence store maintenance must only touch the rows it is asked to."""
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.utils.store import EvidenceStore
+
+
+def rows(ids, topic="rapamycin"):
+    return pd.DataFrame({
+        "claim_id": ids,
+        "claim": [f"claim {i}" for i in ids],
+        "topic": [topic] * len(ids),
+        "evidence_level": ["weak_support"] * len(ids),
+    })
+
+
+def test_drop_claims_keeps_other_rows(tmp_path):
+    store = EvidenceStore(str(tmp_path))
+    store.append(rows(["a", "b"]), date="2026-01-01")
+    store.append(rows(["a", "manual"], topic="nad+"), date="2026-01-02")
+    store.append(rows(["b", "c"]), date="2026-01-02")
+
+    assert store.drop_claims("2026-01-02", ["a", "b"]) == 2
+
+    remaining = store.read(columns=["claim_id", "date"], latest_only=False)
+    assert sorted(zip(remaining["date"], remaining["claim_id"])) == [
+        ("2026-01-01", "a"), ("2026-01-01", "b"),
+        ("2026-01-02", "c"), ("2026-01-02", "manual"),
+    ]
+    assert store.manifest()["rows"] == 4